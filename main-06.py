@@ -2,6 +2,8 @@
 # Use the inertial sensor to know exactly which direction the robot is facing
 
 from vex import *
+from robot.turning import TurnController  # Profiled PID turns (see robot/turning.py)
+from robot.startup import Startup         # Set up devices at the same time (see robot/startup.py)
 
 # Setup
 brain = Brain()
@@ -25,10 +27,29 @@ WHEEL_DIAMETER = 4.0
 WHEEL_CIRCUMFERENCE = WHEEL_DIAMETER * 3.14159
 TURN_SPEED = 30  # Percent
 
+# Turn controller settings
+MAX_TURN_SPEED = 100   # Percent - the controller slows down by itself near the end
+TURN_TOLERANCE = 1     # Degrees - close enough to call the turn done
+TURN_TIMEOUT = 3000    # Milliseconds - give up if the turn takes longer
+
 # Direction constants (English-like!)
 LEFT = "left"
 RIGHT = "right"
 
+# The turn controller watches the inertial sensor and adjusts motor power
+# every 10 ms to land exactly on the angle
+turn_controller = TurnController([front_left_motor, back_left_motor],
+                                 [front_right_motor, back_right_motor],
+                                 inertial_sensor,
+                                 max_speed=MAX_TURN_SPEED,
+                                 tolerance=TURN_TOLERANCE,
+                                 timeout_ms=TURN_TIMEOUT)
+
+# Where the robot should be facing (degrees). Each turn aims at this absolute
+# heading, so a small error in one turn is fixed by the next one instead of
+# adding up.
+target_heading = 0
+
 # FUNCTION: Move forward or backward
 def move(direction, distance, unit):
     """Move the robot forward or backward a certain distance."""
@@ -50,40 +71,27 @@ def turn(direction, angle, unit=DEGREES):
     Turn the robot using the inertial sensor for precise angle measurement.
 
     Example: turn(RIGHT, 90) - Turn right exactly 90 degrees
+
+    The turn starts at full speed and slows down smoothly as it gets close,
+    so it is fast AND accurate. Returns how long the turn took (milliseconds).
     """
-    # Reset the sensor so we're starting from 0
-    inertial_sensor.reset_heading()
-    wait(50, MSEC)  # Give sensor time to reset
-
-    # Start turning
-    if direction == RIGHT:
-        # Right turn: left wheels forward, right wheels backward
-        front_left_motor.spin(FORWARD, TURN_SPEED, PERCENT)
-        back_left_motor.spin(FORWARD, TURN_SPEED, PERCENT)
-        front_right_motor.spin(REVERSE, TURN_SPEED, PERCENT)
-        back_right_motor.spin(REVERSE, TURN_SPEED, PERCENT)
-
-        # Keep turning until we reach the target angle
-        while inertial_sensor.heading() < angle:
-            wait(5, MSEC)
-
-    elif direction == LEFT:
-        # Left turn: right wheels forward, left wheels backward
-        front_left_motor.spin(REVERSE, TURN_SPEED, PERCENT)
-        back_left_motor.spin(REVERSE, TURN_SPEED, PERCENT)
-        front_right_motor.spin(FORWARD, TURN_SPEED, PERCENT)
-        back_right_motor.spin(FORWARD, TURN_SPEED, PERCENT)
-
-        # heading() goes 0-359, wrapping around
-        # For left turns, heading decreases (wraps to 359, 358, etc)
-        # So we wait until heading is greater than (360 - angle)
-        target_heading = 360 - angle
-
-        while inertial_sensor.heading() < target_heading or inertial_sensor.heading() < 5:
-            wait(5, MSEC)
-
-    # Stop all motors
-    stop()
+    global target_heading
+
+    # Right turns are positive angles, left turns are negative
+    if direction == LEFT:
+        angle = -angle
+
+    target_heading = (target_heading + angle) % 360
+    result = turn_controller.turn_to(target_heading)
+    return result.settle_ms
+
+# FUNCTION: Get the drive motors ready
+def set_up_motors():
+    """Brake when stopping, so the robot stops where the move ended."""
+    front_left_motor.set_stopping(BRAKE)
+    back_left_motor.set_stopping(BRAKE)
+    front_right_motor.set_stopping(BRAKE)
+    back_right_motor.set_stopping(BRAKE)
 
 # FUNCTION: Stop all motors
 def stop():
@@ -100,11 +108,18 @@ if __name__ == "__main__":
 
     # IMPORTANT: Calibrate the inertial sensor
     # Robot must be COMPLETELY STILL during calibration!
-    inertial_sensor.calibrate()
-    while inertial_sensor.is_calibrating():
-        wait(50, MSEC)
+    # The motors are set up while the sensor calibrates, and wait() waits
+    # for both (at most 5 seconds)
+    startup = Startup(timeout_ms=5000)
+    startup.calibrate("imu", inertial_sensor)
+    startup.add("motors", set_up_motors)
+    startup.wait()
 
     brain.screen.print("Calibration complete!")
+    for line in startup.summary():      # how long each part took
+        brain.screen.new_line()
+        brain.screen.print(line)
+    brain.screen.new_line()
     brain.screen.new_line()
     brain.screen.print("Starting movement...")
 
@@ -112,18 +127,20 @@ if __name__ == "__main__":
 
     # Demonstrate precise turning in a square pattern
     move(FORWARD, 24, INCHES)
-    turn(RIGHT, 90)
+    turn_time = turn(RIGHT, 90)
 
     move(FORWARD, 24, INCHES)
-    turn(RIGHT, 90)
+    turn_time += turn(RIGHT, 90)
 
     move(FORWARD, 24, INCHES)
-    turn(RIGHT, 90)
+    turn_time += turn(RIGHT, 90)
 
     move(FORWARD, 24, INCHES)
-    turn(RIGHT, 90)
+    turn_time += turn(RIGHT, 90)
 
     # Final heading should be very close to 0 (where we started)
     brain.screen.new_line()
     brain.screen.print("Final heading:", inertial_sensor.heading())
+    brain.screen.new_line()
+    brain.screen.print("Time spent turning:", turn_time, "ms")
     brain.play_sound(SoundType.POWER_DOWN)
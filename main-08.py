@@ -2,6 +2,10 @@
 # Use a line sensor to follow a line or detect colors on the field
 
 from vex import *
+from robot.display import Display  # Only redraws lines that changed (see robot/display.py)
+from robot.color import color_of   # Hue -> color name with one table lookup (see robot/color.py)
+from robot.linefollow import LineFollower  # Smooth PID line following (see robot/linefollow.py)
+from robot.sensors import SensorHub  # Read each sensor once per loop (see robot/sensors.py)
 
 # Setup
 brain = Brain()
@@ -13,6 +17,15 @@ back_right_motor = Motor(Ports.PORT12, True)
 # NEW: Line sensor (also called Optical sensor)
 line_sensor = Optical(Ports.PORT2)
 
+# Sensor hub: sensors.sample() reads the line sensor's brightness and hue
+# once, and the rest of the loop uses those same values
+sensors = SensorHub()
+sensors.add_optical("line", line_sensor)
+
+# Screen: set named lines of text; a background thread draws only the
+# lines that changed, at most 10 times per second
+display = Display(brain.screen, rate_hz=10)
+
 # Constants
 FORWARD = DirectionType.FWD
 PERCENT = VelocityUnits.PCT
@@ -24,6 +37,13 @@ DRIVE_SPEED = 30      # Base speed when following line
 TURN_SPEED = 20       # How much to adjust when correcting
 BRIGHTNESS_THRESHOLD = 50  # Light vs dark (adjust for your surface)
 
+# Smooth line following: steers MORE the further the sensor is from the
+# edge of the line, so it can go much faster without losing the line
+FOLLOW_SPEED = 70     # Forward speed on a straight line
+line_follower = LineFollower([front_left_motor, back_left_motor],
+                             [front_right_motor, back_right_motor],
+                             line_sensor, speed=FOLLOW_SPEED)
+
 # FUNCTION: Check if sensor sees a dark line
 def is_on_line():
     """
@@ -34,41 +54,32 @@ def is_on_line():
     return brightness < BRIGHTNESS_THRESHOLD
 
 # FUNCTION: Get color detected by sensor
-def get_color():
+def get_color(hue=None):
     """
     Returns the color detected by the optical sensor.
     Returns color name as a string.
+    Pass a hue you have already read to use it instead of reading again.
     """
-    hue = line_sensor.hue()  # 0-360 degrees on color wheel
-
-    # Classify color based on hue value
-    if hue < 15 or hue > 345:
-        return "red"
-    elif hue < 45:
-        return "orange"
-    elif hue < 75:
-        return "yellow"
-    elif hue < 155:
-        return "green"
-    elif hue < 250:
-        return "blue"
-    elif hue < 330:
-        return "purple"
-    else:
-        return "unknown"
-
-# FUNCTION: Follow a line
-def follow_line(duration_seconds):
+    if hue is None:
+        hue = line_sensor.hue()  # 0-360 degrees on color wheel
+
+    # Look the color up in a table made once from these hue ranges:
+    #   red: under 15 or 345 and up    orange: 15-45    yellow: 45-75
+    #   green: 75-155    blue: 155-250    purple: 250-330    else: unknown
+    return color_of(hue)
+
+# FUNCTION: Follow a line (simple version)
+def follow_line_simple(duration_seconds):
     """
     Follow a dark line on the ground for a specified time.
     The sensor should be mounted at the front of the robot.
+    This is the simple "bang-bang" version - see follow_line() below.
 
     How it works:
     - If sensor sees line (dark): turn slightly to stay on it
     - If sensor sees bright (off line): turn back toward line
     """
-    brain.screen.print("Following line...")
-    brain.screen.new_line()
+    display.set("status", "Following line...")
 
     # Calculate end time
     start_time = brain.timer.time(SECONDS)
@@ -83,9 +94,8 @@ def follow_line(duration_seconds):
             front_right_motor.spin(FORWARD, DRIVE_SPEED + TURN_SPEED, PERCENT)
             back_right_motor.spin(FORWARD, DRIVE_SPEED + TURN_SPEED, PERCENT)
 
-            brain.screen.clear_screen()
-            brain.screen.set_cursor(1, 1)
-            brain.screen.print("On line!")
+            # Only stores the text - the screen is redrawn only if it changed
+            display.set("status", "On line!")
         else:
             # Off the line - turn right to find it
             front_left_motor.spin(FORWARD, DRIVE_SPEED + TURN_SPEED, PERCENT)
@@ -93,16 +103,32 @@ def follow_line(duration_seconds):
             front_right_motor.spin(FORWARD, DRIVE_SPEED - TURN_SPEED, PERCENT)
             back_right_motor.spin(FORWARD, DRIVE_SPEED - TURN_SPEED, PERCENT)
 
-            brain.screen.clear_screen()
-            brain.screen.set_cursor(1, 1)
-            brain.screen.print("Off line - searching...")
+            display.set("status", "Off line - searching...")
 
-        brain.screen.render()
         wait(20, MSEC)
 
     # Stop when done
     stop()
 
+# FUNCTION: Follow a line (smooth version)
+def follow_line(duration_seconds):
+    """
+    Follow the left edge of a dark line smoothly for a specified time.
+
+    How it works:
+    - First, sweep the sensor over the line and the floor to learn how dark
+      the line and how bright the floor is. The middle is the "edge" value.
+    - Then steer by how far the brightness is from the edge value:
+      a little off = turn a little, far off = turn a lot (and slow down)
+    """
+    display.set("status", "Calibrating...")
+    darkest, brightest, midpoint = line_follower.calibrate()
+    display.set("threshold", "Edge brightness:", midpoint)
+
+    display.set("status", "Following line...")
+    line_follower.follow(duration_seconds * 1000)
+    display.set("status", "Wobble:", line_follower.wobble())
+
 # FUNCTION: Stop all motors
 def stop():
     """Stop the robot from moving."""
@@ -114,20 +140,19 @@ def stop():
 # FUNCTION: Display sensor readings
 def display_sensor_info():
     """Show sensor values on brain screen."""
-    brain.screen.clear_screen()
-    brain.screen.set_cursor(1, 1)
-    brain.screen.print("Brightness:", line_sensor.brightness())
-    brain.screen.new_line()
-    brain.screen.print("Hue:", line_sensor.hue())
-    brain.screen.new_line()
-    brain.screen.print("Color:", get_color())
-    brain.screen.render()
+    # Read the sensor ONCE: all three lines show the same moment
+    line = sensors.sample()["line"]
+    display.set("brightness", "Brightness:", line.brightness)
+    display.set("hue", "Hue:", line.hue)
+    display.set("color", "Color:", get_color(line.hue))
 
 # MAIN PROGRAM: Demonstrate line sensor
 if __name__ == "__main__":
-    brain.screen.print("Line Sensor Demo")
-    brain.screen.new_line()
-    brain.screen.print("Reading sensor for 3 sec...")
+    # Start the background thread that draws the screen
+    display.start()
+
+    display.set("title", "Line Sensor Demo")
+    display.set("status", "Reading sensor for 3 sec...")
 
     # First, show sensor values for 3 seconds
     start_time = brain.timer.time(SECONDS)
@@ -135,11 +160,9 @@ if __name__ == "__main__":
         display_sensor_info()
         wait(100, MSEC)
 
-    brain.screen.clear_screen()
-    brain.screen.set_cursor(1, 1)
-    brain.screen.print("Threshold:", BRIGHTNESS_THRESHOLD)
-    brain.screen.new_line()
-    brain.screen.print("Adjust if needed!")
+    display.clear()
+    display.set("threshold", "Threshold:", BRIGHTNESS_THRESHOLD)
+    display.set("status", "Adjust if needed!")
 
     wait(2, SECONDS)
 
@@ -147,5 +170,5 @@ if __name__ == "__main__":
     # (You'll need a dark line on the ground for this to work)
     # follow_line(10)
 
-    brain.screen.new_line()
-    brain.screen.print("Demo complete!")
+    display.set("done", "Demo complete!")
+    display.flush()  # Draw right away - the program is about to end
@@ -2,78 +2,174 @@
 # A complete competition program with autonomous and driver control phases
 
 from vex import *
+from robot.units import *
+from robot.config import Devices, CURRICULUM_ROBOT
+from robot.motion import MotionScheduler
+from robot.turning import TurnController
+from robot.odometry import Odometry, Navigator
+from robot.periodic import PeriodicTask
+from robot.mechanism import MechanismWorker
+from robot.positioner import Positioner
+from robot.telemetry import Telemetry
+from robot.replay import InputRecorder, ReplayController, load_events
+from robot.shaping import AxisCurve, SlewLimiter
+from robot.route import Route, RouteFollower
+from robot.pursuit import Path, PurePursuit
+from robot.profiler import Profiler
+from robot.velocity import VelocityDrive
+from robot.competition import CompetitionRuntime, AUTONOMOUS, DRIVER
+from robot.startup import Startup
+from robot.sensors import SensorHub
 
 # ============================================================================
 # ROBOT CONFIGURATION
 # ============================================================================
 
+# Ports, reversed motors and wheel size for the whole robot, in one place
+# (see robot/config.py). Each device is created the first time it is used.
+devices = Devices(CURRICULUM_ROBOT)
+
 # Brain and Controller
-brain = Brain()
-controller = Controller()
+brain = devices.brain
+controller = devices.controller
 competition = Competition(controller, brain)
 
-# Drive Motors (4-motor drive)
-front_left_motor = Motor(Ports.PORT20)
-back_left_motor = Motor(Ports.PORT19)
-front_right_motor = Motor(Ports.PORT11, True)
-back_right_motor = Motor(Ports.PORT12, True)
+# Drive: each side's two motors act as one - one command per side, and
+# repeated commands are skipped (see robot/drivetrain.py)
+left_drive = devices.left_drive
+right_drive = devices.right_drive
+drivetrain = devices.drivetrain
 
 # Mechanism Motors
-grabber_motor = Motor(Ports.PORT1)
+grabber_motor = devices.grabber_motor
 
 # Sensors
-inertial_sensor = Inertial(Ports.PORT10)
-line_sensor = Optical(Ports.PORT2)
+inertial_sensor = devices.inertial
+line_sensor = devices.line_sensor
+
+# Sensor hub: every motor and sensor telemetry records, read ONCE per tick
+# into a snapshot (see robot/sensors.py). Odometry owns the tick: each of its
+# updates samples the hub, and the route follower and telemetry read that
+# snapshot instead of reading the sensors again. The sensed_... devices only
+# ever show the last snapshot, so use them only while odometry is running.
+# (Code that needs its own fresh readings - the grabber's Positioner, the
+# velocity drive - keeps using the real devices.)
+sensors = SensorHub()
+sensed_left = sensors.add_motor("left", left_drive)
+sensed_right = sensors.add_motor("right", right_drive)
+sensed_grabber = sensors.add_motor("grabber", grabber_motor)
+sensed_inertial = sensors.add_inertial("imu", inertial_sensor)
+sensed_line = sensors.add_optical("line", line_sensor)
+# Only telemetry records these, so they are only sampled while it runs
+RECORDED_ONLY = ["left.velocity", "left.current", "right.velocity", "right.current",
+                 "grabber.position", "grabber.velocity", "grabber.current",
+                 "imu.heading", "line.brightness", "line.hue"]
+sensors.pause(RECORDED_ONLY)
 
 # ============================================================================
 # CONSTANTS
 # ============================================================================
 
-# Units
-INCHES = DistanceUnits.IN
-FEET = 12
-DEGREES = RotationUnits.DEG
-SECONDS = TimeUnits.SEC
-MSEC = TimeUnits.MSEC
-FORWARD = DirectionType.FWD
-REVERSE = DirectionType.REV
-PERCENT = VelocityUnits.PCT
+# Units (INCHES, DEGREES, FORWARD, PERCENT, ...) come from robot/units.py
 
-# Robot Specifications
-WHEEL_DIAMETER = 4.0
-WHEEL_CIRCUMFERENCE = WHEEL_DIAMETER * 3.14159
+# Robot Specifications (set in the robot's config)
+WHEEL_DIAMETER = devices.wheel_diameter
+WHEEL_CIRCUMFERENCE = devices.wheel_circumference
+GEAR_RATIO = devices.gear_ratio       # Wheel turns per motor turn
+TRACK_WIDTH = devices.track_width     # Inches between the left and right wheels
+MAX_RPM = 200          # Green motor cartridges
 
 # Drive Settings
 DEAD_ZONE = 5
+DRIVE_CURVE = "expo"   # "linear", "cubic" or "expo" (see robot/shaping.py)
+FORWARD_EXPO = 0.5     # 0 = linear ... 1 = cubic (finer control at low speed)
+TURN_EXPO = 0.6
+SLEW_STEP = 10         # Forward speed may change 10% per tick (full speed in 0.1 s)
 DRIVE_SPEED = 30
-TURN_SPEED = 30
+TURN_SPEED = 100   # Turns slow down by themselves near the end (PID)
+
+# Driver recording (see robot/replay.py)
+RECORD_DRIVER = False          # Save the driver's sticks and buttons to the SD card
+REPLAY_DRIVER = False          # Drive from the saved recording instead of the controller
+DRIVER_RECORDING = "driver.txt"
+
+# Profiling (see robot/profiler.py)
+PROFILE = False                # Time each part of the drive tick; X shows the results
+PROFILE_FILE = "profile.txt"
+
+# Autonomous route limits (see robot/route.py)
+ROUTE_MAX_VELOCITY = 36   # Inches per second (the wheels top out near 42)
+ROUTE_MAX_ACCEL = 72      # Inches per second, per second
+ROUTE_MAX_JERK = 400      # How quickly the acceleration may change
+
+# Curved paths (see robot/pursuit.py)
+PATH_LOOKAHEAD = 12       # Inches ahead to aim at: longer = smoother, cuts corners more
+PATH_TURN_FACTOR = 3.0    # Slow down on bends: higher = faster around them
+
+# Startup (see robot/startup.py)
+STARTUP_TIMEOUT_MS = 5000      # Stop waiting for the sensors after this long
+OPTICAL_LIGHT = 100            # Optical sensor light, percent
+OPTICAL_INTEGRATION_MS = 20    # Optical sensor reading time (shorter = faster, noisier)
 
-# Grabber Settings
+# Grabber Settings (positions are degrees from the fully open end stop,
+# found by homing in pre_autonomous - see robot/positioner.py)
 GRABBER_SPEED = 50
-GRAB_ANGLE = 90
-RELEASE_ANGLE = 90
+GRABBER_OPEN = 5               # Just off the end stop
+GRABBER_CLOSED = 95            # Closed on nothing; on a game object it stops early
+GRABBER_HOME_SPEED = 20        # Percent, while feeling for the end stop
 
 # Directions (English-like!)
 LEFT = "left"
 RIGHT = "right"
 
+# Turn controller: profiled PID turns with the inertial sensor
+# (see robot/turning.py)
+turn_controller = TurnController([left_drive], [right_drive], inertial_sensor)
+
+# Odometry: tracks the robot's x, y and heading in the background, so turns
+# never need to reset the inertial sensor (see robot/odometry.py)
+odometry = Odometry([sensed_left], [sensed_right], sensed_inertial,
+                    WHEEL_CIRCUMFERENCE, gear_ratio=GEAR_RATIO, sensors=sensors)
+navigator = Navigator(odometry, turn_controller, [left_drive], [right_drive])
+
+# Straight drives: measures each side's speed, keeps the sides together and
+# holds the heading with the inertial sensor (see robot/velocity.py)
+velocity_drive = VelocityDrive([left_drive], [right_drive], inertial_sensor,
+                               WHEEL_CIRCUMFERENCE, gear_ratio=GEAR_RATIO, max_rpm=MAX_RPM)
+
+# Pure pursuit: follows smooth curved paths using the odometry pose, so the
+# robot can arc around without stopping to turn (see robot/pursuit.py)
+pursuit = PurePursuit(odometry, [left_drive], [right_drive], WHEEL_CIRCUMFERENCE,
+                      lookahead=PATH_LOOKAHEAD, track_width=TRACK_WIDTH,
+                      gear_ratio=GEAR_RATIO)
+
+# Motion engine: runs drive, turn and grabber commands at the same time
+# on one 10 ms control tick (see robot/motion.py)
+motion = MotionScheduler([left_drive], [right_drive], inertial_sensor,
+                         WHEEL_CIRCUMFERENCE, gear_ratio=GEAR_RATIO)
+
+# Telemetry: records motors and sensors 100 times per second to the SD card
+# during autonomous (see robot/telemetry.py). Copy auton.vxt to a computer
+# and open it with sim/telemetry.py.
+telemetry = Telemetry(brain.sdcard, "auton.vxt")
+telemetry.add_motor("left", sensed_left)     # all from the last snapshot
+telemetry.add_motor("right", sensed_right)
+telemetry.add_motor("grabber", sensed_grabber)
+telemetry.add_inertial("imu", sensed_inertial)
+telemetry.add_optical("line", sensed_line)
+telemetry.add_controller("controller", controller)   # sticks: not a sensor
+
+# Profiler: how long each part of the drive tick and each button callback
+# takes. With PROFILE = False it is switched off and costs nothing.
+profiler = Profiler(enabled=PROFILE)
+
 # ============================================================================
 # HELPER FUNCTIONS
 # ============================================================================
 
-def apply_dead_zone(value, threshold):
-    """Return 0 if value is within threshold, otherwise return value."""
-    if abs(value) < threshold:
-        return 0
-    else:
-        return value
-
 def stop():
     """Stop all drive motors."""
-    front_left_motor.stop()
-    back_left_motor.stop()
-    front_right_motor.stop()
-    back_right_motor.stop()
+    drivetrain.stop()
 
 # ============================================================================
 # DRIVE FUNCTIONS
@@ -81,198 +177,445 @@ def stop():
 
 def move(direction, distance, unit, speed=DRIVE_SPEED):
     """
-    Move the robot forward or backward a certain distance.
+    Move the robot forward or backward a certain distance, in a straight
+    line: both sides are kept together and the heading is held.
+    Returns how far from the end the robot stopped (inches).
 
     Example: move(FORWARD, 24, INCHES)
     """
-    if unit == INCHES:
-        degrees_to_rotate = (distance / WHEEL_CIRCUMFERENCE) * 360
-    elif unit == FEET:
-        degrees_to_rotate = ((distance * FEET) / WHEEL_CIRCUMFERENCE) * 360
-    else:
-        degrees_to_rotate = distance
-
-    front_left_motor.spin_for(direction, degrees_to_rotate, DEGREES, speed, PERCENT, wait=False)
-    back_left_motor.spin_for(direction, degrees_to_rotate, DEGREES, speed, PERCENT, wait=False)
-    front_right_motor.spin_for(direction, degrees_to_rotate, DEGREES, speed, PERCENT, wait=False)
-    back_right_motor.spin_for(direction, degrees_to_rotate, DEGREES, speed, PERCENT, wait=True)
+    inches = to_inches(distance, unit)
+    if direction == REVERSE:
+        inches = -inches
+    return velocity_drive.drive_straight(inches, speed / 100.0 * MAX_RPM)
 
 def turn(direction, angle, speed=TURN_SPEED):
     """
     Turn the robot using the inertial sensor for precise angles.
+    Returns how long the turn took (milliseconds).
 
     Example: turn(RIGHT, 90)
     """
-    inertial_sensor.reset_heading()
-    wait(50, MSEC)
+    if direction == LEFT:
+        angle = -angle
 
-    if direction == RIGHT:
-        front_left_motor.spin(FORWARD, speed, PERCENT)
-        back_left_motor.spin(FORWARD, speed, PERCENT)
-        front_right_motor.spin(REVERSE, speed, PERCENT)
-        back_right_motor.spin(REVERSE, speed, PERCENT)
+    result = turn_controller.turn_by(angle, speed)
+    return result.settle_ms
 
-        while inertial_sensor.heading() < angle:
-            wait(5, MSEC)
+def turn_to(heading, speed=TURN_SPEED):
+    """
+    Turn to face an absolute heading (0 = the way the robot started).
 
-    elif direction == LEFT:
-        front_left_motor.spin(REVERSE, speed, PERCENT)
-        back_left_motor.spin(REVERSE, speed, PERCENT)
-        front_right_motor.spin(FORWARD, speed, PERCENT)
-        back_right_motor.spin(FORWARD, speed, PERCENT)
+    Example: turn_to(180) - face the other way, no matter where we are now
+    """
+    result = navigator.turn_to(heading, speed)
+    return result.settle_ms
 
-        target_heading = 360 - angle
-        while inertial_sensor.heading() < target_heading or inertial_sensor.heading() < 5:
-            wait(5, MSEC)
+def drive_to(x, y, speed=DRIVE_SPEED):
+    """
+    Drive to a spot on the field, in inches from the starting position.
 
-    stop()
+    Example: drive_to(0, 24) - the spot 24 inches in front of the start
+    """
+    return navigator.drive_to(x, y, speed)
 
+def follow_path(waypoints, speed=ROUTE_MAX_VELOCITY, reverse=False):
+    """
+    Drive along a smooth curve through a list of (x, y) spots, in inches from
+    the starting position, without stopping at any of them.
+    Returns how far from the last spot the robot stopped (inches).
+
+    Example: follow_path([(0, 24), (24, 48)]) - ahead, then curve right
+    """
+    x, y, heading = odometry.pose()
+    path = Path([(x, y)] + list(waypoints), max_speed=speed,
+                turn_factor=PATH_TURN_FACTOR, max_accel=ROUTE_MAX_ACCEL)
+    return pursuit.follow(path, reverse)
+
+@profiler.timed("drive")
 def arcade_drive(forward_speed, turn_speed):
     """
     Control robot with arcade drive (one stick).
 
     Example: arcade_drive(50, 20) - move forward while turning right
     """
-    left_speed = forward_speed + turn_speed
-    right_speed = forward_speed - turn_speed
-
-    front_left_motor.spin(FORWARD, left_speed, PERCENT)
-    back_left_motor.spin(FORWARD, left_speed, PERCENT)
-    front_right_motor.spin(FORWARD, right_speed, PERCENT)
-    back_right_motor.spin(FORWARD, right_speed, PERCENT)
+    drivetrain.arcade(forward_speed, turn_speed)
 
 # ============================================================================
 # MECHANISM FUNCTIONS
 # ============================================================================
 
-def grab():
-    """Close the grabber to grab an object."""
-    grabber_motor.spin_for(FORWARD, GRAB_ANGLE, DEGREES, GRABBER_SPEED, PERCENT, wait=True)
+# The grabber goes to named positions, measured from its end stop, so extra
+# or missed presses never push it out of range. A grab ends as soon as the
+# grabber stalls on a game object (see robot/positioner.py).
+grabber_position = Positioner(grabber_motor, {"open": GRABBER_OPEN, "closed": GRABBER_CLOSED},
+                              speed=GRABBER_SPEED)
+
+# The grabber's actions run in their own worker thread, so a button callback
+# never waits for the grabber (see robot/mechanism.py). Pressing R1 again
+# during a grab does nothing extra, and R2 during a grab stops it and opens.
+grabber = MechanismWorker("grabber", on_cancel=grabber_position.stop)
+
+def grab_stroke(worker):
+    """Close the grabber (runs on the grabber worker)."""
+    grabber_position.move_to("closed", worker)
     controller.rumble(".")
 
-def release():
-    """Open the grabber to release an object."""
-    grabber_motor.spin_for(REVERSE, RELEASE_ANGLE, DEGREES, GRABBER_SPEED, PERCENT, wait=True)
+def release_stroke(worker):
+    """Open the grabber (runs on the grabber worker)."""
+    grabber_position.move_to("open", worker)
     controller.rumble("..")
 
+@profiler.timed("grab")
+def grab():
+    """Start closing the grabber. Returns right away."""
+    grabber.submit(grab_stroke)
+
+@profiler.timed("release")
+def release():
+    """Start opening the grabber. Returns right away."""
+    grabber.submit(release_stroke)
+
 # ============================================================================
-# AUTONOMOUS ROUTINE
+# NON-BLOCKING MOTION (for autonomous)
 # ============================================================================
+# These start a command and return right away. Each returns a "future" that
+# other commands can wait for:
+#   after=drive          - start when drive is done
+#   after=drive, at=0.8  - start when drive is 80% done
+# The motion engine's thread is started by autonomous(); motion.wait_all()
+# waits until every started command is done.
+
+def to_inches(distance, unit):
+    """Convert a distance in INCHES, FEET or motor DEGREES to inches."""
+    if unit == INCHES:
+        return distance
+    elif unit == FEET:
+        return distance * FEET
+    else:
+        return distance / 360 * WHEEL_CIRCUMFERENCE * GEAR_RATIO
 
-def autonomous():
+def start_move(direction, distance, unit, speed=DRIVE_SPEED, after=None, at=1.0):
     """
-    Runs during the autonomous period (15 seconds in competition).
+    Start moving forward or backward without waiting.
 
-    This is where you program the robot to score points automatically.
-    Design your strategy based on the game rules!
+    Example: drive = start_move(FORWARD, 24, INCHES)
     """
-    brain.screen.clear_screen()
-    brain.screen.print("AUTONOMOUS MODE")
-    brain.screen.new_line()
-    brain.screen.print("Running...")
+    inches = to_inches(distance, unit)
+    if direction == REVERSE:
+        inches = -inches
+    return motion.drive(inches, speed, after, at)
 
-    # Example autonomous routine:
-    # 1. Move forward to game object
-    move(FORWARD, 24, INCHES)
+def start_turn(direction, angle, speed=TURN_SPEED, after=None, at=1.0):
+    """
+    Start turning without waiting.
+
+    Example: start_turn(RIGHT, 90, after=drive)
+    """
+    if direction == LEFT:
+        angle = -angle
+    return motion.turn(angle, speed, after, at)
+
+def start_turn_to(heading, speed=TURN_SPEED, after=None, at=1.0):
+    """
+    Start turning to an absolute heading without waiting.
 
-    # 2. Grab it
-    grab()
-    wait(0.5, SECONDS)
+    Example: start_turn_to(180, after=drive)
+    """
+    return motion.turn_to(heading, speed, after, at, odometry.heading)
+
+def start_grab(after=None, at=1.0):
+    """Start closing the grabber without waiting."""
+    grabbed = motion.move_mechanism(grabber_position, "closed", after, at)
+    motion.call(controller.rumble, (".",), after=grabbed)
+    return grabbed
+
+def start_release(after=None, at=1.0):
+    """Start opening the grabber without waiting."""
+    released = motion.move_mechanism(grabber_position, "open", after, at)
+    motion.call(controller.rumble, ("..",), after=released)
+    return released
+
+# ============================================================================
+# AUTONOMOUS ROUTE
+# ============================================================================
+# The whole route is planned ahead of time (in pre_autonomous), into a speed
+# plan for each side for every 10 ms tick. During autonomous the robot only
+# plays the plan back - no planning, and no fixed pauses between steps.
 
-    # 3. Turn around
-    turn(RIGHT, 180)
+route_follower = RouteFollower([sensed_left], [sensed_right], sensed_inertial,
+                               WHEEL_CIRCUMFERENCE, gear_ratio=GEAR_RATIO)
+auton_plan = None
 
-    # 4. Move to goal
-    move(FORWARD, 36, INCHES)
+def grabber_idle():
+    """True when the grabber has finished what it was doing."""
+    return not grabber.busy()
 
-    # 5. Release
-    release()
-    wait(0.5, SECONDS)
+def plan_autonomous():
+    """Describe the autonomous route and plan it. Returns the compiled plan."""
+    route = Route(max_velocity=ROUTE_MAX_VELOCITY, max_accel=ROUTE_MAX_ACCEL,
+                  max_jerk=ROUTE_MAX_JERK, track_width=TRACK_WIDTH)
 
-    # 6. Back up
-    move(REVERSE, 12, INCHES)
+    # 1. Move forward to game object
+    route.drive(24)
+    # 2. Grab it - start closing while the robot is still slowing down
+    route.action(grab, at=0.8)
+    route.wait_until(grabber_idle)
+    # 3. Turn around (an absolute heading)
+    route.turn_to(180)
+    # 4. Move to goal, and start releasing just before arriving
+    route.drive(36)
+    route.action(release, at=0.9)
+    route.wait_until(grabber_idle)
+    # 5. Back up
+    route.drive(-12)
+
+    return route.compile()
+
+# ============================================================================
+# AUTONOMOUS ROUTINE
+# ============================================================================
+
+def autonomous():
+    """
+    Runs during the autonomous period (15 seconds in competition).
+
+    This is where you program the robot to score points automatically.
+    Design your strategy based on the game rules!
+
+    Everything slow was done in pre_autonomous(), so the first thing this
+    does is move. (The screen is updated by show_state(), not here.)
+    """
+    global auton_plan
+    if auton_plan is None:
+        auton_plan = plan_autonomous()   # pre_autonomous did not run (or failed)
+    # Odometry samples the sensors for the route follower and telemetry, so
+    # it must run - even if the inertial sensor is somehow still calibrating
+    # (then the heading is off for the route follower too). Does nothing if
+    # pre_autonomous already started it.
+    odometry.start()
+
+    # Start the grabber's worker thread and the motion engine, for the
+    # start_...() commands (neither does anything if already started)
+    grabber.start()
+    motion.start()
+    sensors.resume(RECORDED_ONLY)
+    telemetry.start()
+
+    # Play back the planned route: drive 24", grab, turn around, drive 36",
+    # release, back up 12" (see plan_autonomous)
+    route_follower.run(auton_plan)
+    telemetry.stop()
+    sensors.pause(RECORDED_ONLY)
 
     brain.screen.new_line()
     brain.screen.print("Autonomous complete!")
+    x, y, heading = odometry.pose()
+    brain.screen.new_line()
+    brain.screen.print("Pose:", x, y, heading)
 
 # ============================================================================
 # DRIVER CONTROL
 # ============================================================================
 
+# Stick shaping: the dead zone and curve for every stick value are worked
+# out once into a table, so each tick costs one lookup per stick
+forward_curve = AxisCurve(DEAD_ZONE, DRIVE_CURVE, FORWARD_EXPO)
+turn_curve = AxisCurve(DEAD_ZONE, DRIVE_CURVE, TURN_EXPO)
+forward_slew = SlewLimiter(SLEW_STEP)
+
+# Where driver control reads the sticks and buttons from: the controller,
+# or a ReplayController playing back a recording (see prepare_driver())
+driver_input = controller
+recorder = None
+driver_ready = False
+
+# Profiled parts of the drive tick (made once, used every tick)
+read_section = profiler.section("read")
+shape_section = profiler.section("shape")
+
+def drive_tick():
+    """One tick of driver control: read the sticks and drive."""
+    if driver_input is not controller:
+        driver_input.update()   # Replay: apply the recorded inputs that are due
+
+    # Read controller
+    with read_section:
+        forward_speed = driver_input.axis3.position()  # Left stick up/down
+        turn_speed = driver_input.axis4.position()     # Left stick left/right
+
+    # Shape the sticks: dead zone and curve (one table lookup each), and
+    # limit how fast the forward speed can change
+    with shape_section:
+        forward_speed = forward_slew.step(forward_curve.shape(forward_speed))
+        turn_speed = turn_curve.shape(turn_speed)
+
+    # Drive
+    arcade_drive(forward_speed, turn_speed)
+
+    if recorder is not None:
+        recorder.sample()
+
+# Driver loop: drive_tick() exactly 100 times per second, on a fixed
+# schedule, with timing and overrun counts (see robot/periodic.py)
+DRIVE_PERIOD_MS = 10
+drive_loop = PeriodicTask(drive_tick, DRIVE_PERIOD_MS, "drive")
+
+def show_profile():
+    """Show where the drive tick's time goes, and save it to the SD card."""
+    profiler.show(brain.screen)
+    profiler.save(brain.sdcard, PROFILE_FILE)
+
+def prepare_driver():
+    """
+    Set up driver control ahead of time (pre_autonomous calls this): load
+    the recording to replay, and set up the buttons. The buttons only act
+    during driver control.
+    """
+    global driver_input, recorder, driver_ready
+    if driver_ready:
+        return
+
+    # Record the driver, or play back an earlier recording
+    if REPLAY_DRIVER:
+        driver_input = ReplayController(load_events(brain.sdcard, DRIVER_RECORDING))
+    elif RECORD_DRIVER:
+        recorder = InputRecorder(controller, brain.sdcard, DRIVER_RECORDING)
+
+    # Set up button controls. The callbacks only hand the action to the
+    # grabber worker, so they return at once. watch() would log any callback
+    # that takes longer than one drive tick.
+    driver_input.buttonR1.pressed(runtime.during(DRIVER, drive_loop.watch(grab, "grab")))
+    driver_input.buttonR2.pressed(runtime.during(DRIVER, drive_loop.watch(release, "release")))
+    if PROFILE:
+        driver_input.buttonX.pressed(runtime.during(DRIVER, show_profile))
+    driver_ready = True
+
 def driver_control():
     """
     Runs during the driver control period (1:45 in competition).
 
-    This is where the driver manually controls the robot.
+    This is where the driver manually controls the robot. It runs until
+    the match ends, or until the competition runtime stops it.
     """
-    # Set up button controls
-    controller.buttonR1.pressed(grab)
-    controller.buttonR2.pressed(release)
-
-    brain.screen.clear_screen()
-    brain.screen.print("DRIVER CONTROL")
-    brain.screen.new_line()
-    brain.screen.print("R1=Grab R2=Release")
+    prepare_driver()     # does nothing if pre_autonomous already did it
+    grabber.start()
+    if REPLAY_DRIVER:
+        driver_input.start()
+    elif recorder is not None:
+        recorder.start()
 
     # Main driver control loop
-    while True:
-        # Read controller
-        forward_speed = controller.axis3.position()  # Left stick up/down
-        turn_speed = controller.axis4.position()     # Left stick left/right
-
-        # Apply dead zone
-        forward_speed = apply_dead_zone(forward_speed, DEAD_ZONE)
-        turn_speed = apply_dead_zone(turn_speed, DEAD_ZONE)
-
-        # Drive
-        arcade_drive(forward_speed, turn_speed)
-
-        # Small delay
-        wait(20, MSEC)
+    drive_loop.run()
 
 # ============================================================================
 # COMPETITION CONTROL
 # ============================================================================
 
+def plan_route():
+    """Plan the autonomous route (a startup step, in its own thread)."""
+    global auton_plan
+    auton_plan = plan_autonomous()
+
+def home_grabber():
+    """
+    Find the grabber's open end stop (a startup step, in its own thread),
+    then open to GRABBER_OPEN and start the grabber's worker thread.
+    """
+    grabber_motor.set_stopping(HOLD)
+    if not grabber_position.home(REVERSE, GRABBER_HOME_SPEED):
+        raise RuntimeError("no end stop")
+    grabber_position.move_to("open")
+    grabber.start()
+
 def pre_autonomous():
     """
-    Runs before autonomous starts.
+    Runs before autonomous starts, while the robot is disabled.
 
-    Use this to calibrate sensors, set starting positions, etc.
+    Do everything slow here - calibrate, plan, set up - so autonomous and
+    driver control only have to move. Every step starts at once and runs
+    while the inertial sensor calibrates (see robot/startup.py).
     """
     brain.screen.clear_screen()
     brain.screen.print("PRE-AUTONOMOUS")
     brain.screen.new_line()
     brain.screen.print("Calibrating...")
 
+    startup = Startup(STARTUP_TIMEOUT_MS)
     # Calibrate inertial sensor (robot must be still!)
-    inertial_sensor.calibrate()
-    while inertial_sensor.is_calibrating():
-        wait(50, MSEC)
-
-    # Set initial grabber position
-    grabber_motor.set_stopping(HOLD)
-
+    startup.calibrate("imu", inertial_sensor)
+    startup.optical("optical", line_sensor, OPTICAL_LIGHT, OPTICAL_INTEGRATION_MS)
+    startup.task("grabber", home_grabber)
+    # Plan the autonomous route now, so autonomous only has to play it back
+    startup.task("route", plan_route)
+    # Create the telemetry file now: writing to the SD card is slow
+    startup.add("telemetry", telemetry.open)
+    # Buttons and the driver recording
+    startup.add("driver", prepare_driver)
+    ready = startup.wait()
+
+    # Start tracking position - only once the sensor is calibrated
+    # (otherwise autonomous() starts it, if calibration finishes by then)
+    if startup.is_ready("imu"):
+        odometry.start()
+
+    # How long each step took: the slowest is what holds up "Ready!"
+    startup.show(brain.screen)
     brain.screen.new_line()
-    brain.screen.print("Ready!")
-    brain.play_sound(SoundType.SIREN)
+    if ready:
+        brain.screen.print("Ready!")
+        brain.play_sound(SoundType.SIREN)
+    else:
+        brain.screen.print("NOT READY: " + ", ".join(startup.failed() + startup.late()))
+        brain.play_sound(SoundType.ALARM)
+
+def stop_robot():
+    """
+    Clean up when a phase ends: stop driving, the grabber and the recordings,
+    and forget the stick shaping's last speed (so re-enabling starts from 0).
+    """
+    drivetrain.stop()
+    forward_slew.reset()
+    motion.cancel_all()
+    grabber.cancel()
+    grabber_position.stop()
+    telemetry.stop()
+    sensors.pause(RECORDED_ONLY)
+    if recorder is not None:
+        recorder.stop()
+
+def show_state(state):
+    """
+    Show the competition state on the brain screen. While disabled, the
+    screen keeps what is on it (the startup times, or the last phase's results).
+    """
+    if state == AUTONOMOUS:
+        brain.screen.clear_screen()
+        brain.screen.print("AUTONOMOUS MODE")
+    elif state == DRIVER:
+        brain.screen.clear_screen()
+        brain.screen.print("DRIVER CONTROL")
+        brain.screen.new_line()
+        brain.screen.print("R1=Grab R2=Release")
+
+# The competition runtime: the field (or competition switch) enables each
+# phase, and the runtime starts it in its own thread. When the phase ends,
+# that thread is stopped and stop_robot() cleans up (see robot/competition.py).
+runtime = CompetitionRuntime(competition, autonomous, driver_control, pre_autonomous)
+runtime.on_stop(stop_robot)
+runtime.on_state(show_state)
 
 # ============================================================================
 # MAIN PROGRAM
 # ============================================================================
 
 if __name__ == "__main__":
-    # Register competition callbacks
-    competition.autonomous(autonomous)
-    competition.drivercontrol(driver_control)
-
-    # Run pre-autonomous setup
-    pre_autonomous()
-
-    # In competition, the VEX Competition Switch controls which function runs:
+    # Runs pre_autonomous(), then follows the match:
     # - Autonomous Switch ON → autonomous() runs for 15 seconds
     # - Autonomous Switch OFF → driver_control() runs for 1:45
+    # - Disabled → the running phase is stopped and the robot stops
+    runtime.run()
 
-    # For testing without a competition switch, uncomment ONE of these:
+    # For testing without a competition switch, put ONE of these in place
+    # of runtime.run():
     # autonomous()      # Test autonomous only
     # driver_control()  # Test driver control only
@@ -0,0 +1,7 @@
+# Robot Library
+# Shared building blocks for competition programs (see main-09.py).
+#
+# Each module is plain Python that runs on the V5 brain and in the simulator
+# (sim/vex.py). Import only what your program needs:
+#
+#     from robot.motion import MotionScheduler
@@ -0,0 +1,118 @@
+# Color Table
+# Turn an optical sensor hue into a color name with ONE list lookup.
+#
+# The old get_color() walks an if/elif chain every time it is called:
+#     if hue < 15 or hue > 345: return "red"
+#     elif hue < 45: return "orange"
+#     ...
+# Here the ranges are worked out once into a table of HALF-DEGREE BINS:
+# entry k holds the color of every hue from k/2 up to (not including)
+# k/2 + 0.5, so 345.0 and 345.3 share entry 690. Every range starts and ends
+# on a whole or half degree, so a bin never holds two colors, and finding a
+# color is one lookup in HUE_TABLE.
+#
+# One difference from the old chain: red starts AT 345 (the chain said
+# "hue > 345"), since 345.0 and 345.3 are in the same bin. A hue of exactly
+# 345.0 is red here; every other hue from 0 to 360 gets the chain's color.
+#
+# The same table is used on the computer (sim/colors.py) to classify a whole
+# recorded sensor log at once, so the robot and the tuning tools always agree.
+#
+# Example:
+#     color_of(line_sensor.hue())             # "blue"
+#     is_dark(line_sensor.brightness(), 50)   # True on a dark line
+
+# ============================================================================
+# COLOR TABLE
+# ============================================================================
+
+# Color names, in table-code order (HUE_CODES holds these numbers)
+COLOR_NAMES = ("unknown", "red", "orange", "yellow", "green", "blue", "purple")
+
+# Each color's hue range: (name, first, after) holds the hues with
+# first <= hue < after. Hues not in any range (330 to 345) are "unknown".
+# Ranges must start and end on a whole or half degree (the table's bins).
+HUE_RANGES = (
+    ("red", 0, 15),
+    ("orange", 15, 45),
+    ("yellow", 45, 75),
+    ("green", 75, 155),
+    ("blue", 155, 250),
+    ("purple", 250, 330),
+    ("red", 345, 360),
+)
+
+STEPS = 720     # table entries: one per half degree
+
+
+def build_hue_codes(ranges=HUE_RANGES, names=COLOR_NAMES):
+    """
+    Build the 720-entry table of color codes (index into `names`).
+    Entry k is the color of the hues from k/2 up to k/2 + 0.5.
+    """
+    codes = [0] * STEPS
+    for name, first, after in ranges:
+        if first * 2 != int(first * 2) or after * 2 != int(after * 2):
+            raise ValueError("%s range %s to %s is not on half degrees" % (name, first, after))
+        code = names.index(name)
+        for index in range(STEPS):
+            if first <= index / 2 < after:
+                codes[index] = code
+    return codes
+
+
+HUE_CODES = build_hue_codes()
+HUE_TABLE = [COLOR_NAMES[code] for code in HUE_CODES]
+
+
+def hue_index(hue):
+    """
+    Table entry for a hue in degrees: its half-degree bin, int(hue * 2).
+    Values outside 0-360 wrap around the color wheel (a negative hue is
+    rounded toward 0 first, to a half degree).
+    """
+    return int(hue * 2) % STEPS
+
+
+def color_of(hue):
+    """
+    Color name for a hue in degrees, from HUE_RANGES (fractions count: 14.9
+    is red, 15.0 is orange). Values outside 0-360 wrap around, see hue_index.
+    """
+    return HUE_TABLE[hue_index(hue)]
+
+
+def is_dark(brightness, threshold):
+    """True when the brightness is below the threshold (on a dark line)."""
+    return brightness < threshold
+
+
+# ============================================================================
+# CHECK (on a computer: python robot/color.py)
+# ============================================================================
+
+def _range_color(hue, ranges=HUE_RANGES):
+    """The color HUE_RANGES gives a hue from 0 to 360, one range at a time."""
+    for name, first, after in ranges:
+        if first <= hue < after:
+            return name
+    return "unknown"
+
+
+def check_table():
+    """
+    Compare color_of() with HUE_RANGES on every whole degree and just
+    either side of it. Returns the hues where they disagree.
+    """
+    wrong = []
+    for degree in range(360):
+        for hue in (degree, degree + 0.001, degree + 0.499, degree + 0.5, degree + 0.999):
+            if color_of(hue) != _range_color(hue):
+                wrong.append(hue)
+    return wrong
+
+
+if __name__ == "__main__":
+    mismatches = check_table()
+    print("hue table matches HUE_RANGES" if not mismatches else
+          "hue table differs from HUE_RANGES at: %s" % mismatches)
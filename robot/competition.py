@@ -0,0 +1,150 @@
+# Competition Runtime
+# Run the match as a state machine: DISABLED, PRE_AUTON, AUTONOMOUS, DRIVER.
+#
+# The usual competition template registers autonomous() and driver_control()
+# and then falls off the end of the program. driver_control() is a loop that
+# never ends, so nothing in the program knows when the robot is disabled or
+# the phase changes, and nothing cleans up: a motor that was spinning when
+# autonomous ended keeps its last command, and the grabber keeps working.
+#
+# A CompetitionRuntime owns the phases:
+#   - Each phase runs in a thread of its own. When the phase changes (or the
+#     robot is disabled) that thread is stopped, and the "on stop" functions
+#     run: stop the drive, cancel the grabber, ...
+#   - pre_autonomous() runs once, before anything is enabled. Do ALL the slow
+#     work there: calibrate, plan the route, build tables, set up buttons.
+#     When autonomous is enabled its thread starts right away, on the same
+#     tick, with nothing left to do but move.
+#   - run() keeps the main program alive and watches the field every tick.
+#
+# Example:
+#     runtime = CompetitionRuntime(competition, autonomous, driver_control,
+#                                  pre_autonomous)
+#     runtime.on_stop(drivetrain.stop)
+#     controller.buttonR1.pressed(runtime.during(DRIVER, grab))
+#     runtime.run()              # never returns
+
+from vex import *
+
+DISABLED = "disabled"
+PRE_AUTON = "pre-auton"
+AUTONOMOUS = "autonomous"
+DRIVER = "driver"
+
+# ============================================================================
+# RUNTIME
+# ============================================================================
+
+class CompetitionRuntime:
+    """
+    The competition phases as explicit states, each phase in its own thread.
+
+    state is one of DISABLED, PRE_AUTON, AUTONOMOUS, DRIVER.
+    Counts (for checking): transitions, and enabled_at (Timer ms when the
+    current phase began).
+    """
+
+    def __init__(self, competition, autonomous, driver_control, pre_autonomous=None,
+                 period_ms=10):
+        self.competition = competition
+        self.routines = {AUTONOMOUS: autonomous, DRIVER: driver_control}
+        self.pre_autonomous = pre_autonomous
+        self.period_ms = period_ms
+        self.state = DISABLED
+        self.running = False         # run() has been called
+        self.ready = False           # pre_autonomous() has finished
+        self.timer = Timer()
+        self.enabled_at = 0.0
+        self.transitions = 0
+        self._phase_thread = None
+        self._stop_callbacks = []
+        self._state_callbacks = []
+        # The field (or competition switch) calls these when a phase is enabled
+        competition.autonomous(self._enable_autonomous)
+        competition.drivercontrol(self._enable_driver)
+
+    # ---- setup --------------------------------------------------------------
+
+    def on_stop(self, callback):
+        """Call `callback()` whenever an enabled phase ends (clean-up)."""
+        self._stop_callbacks.append(callback)
+
+    def on_state(self, callback):
+        """
+        Call `callback(state)` after each change of state, from the
+        runtime's own loop - never on the way into a phase.
+        """
+        self._state_callbacks.append(callback)
+
+    def during(self, state, callback):
+        """
+        Wrap a button callback so it only acts in `state`. Buttons can then
+        be set up in pre_autonomous without firing during autonomous:
+            controller.buttonR1.pressed(runtime.during(DRIVER, grab))
+        Until run() is called (testing driver_control() on its own), the
+        callback always acts.
+        """
+        def guarded(*args):
+            if self.state == state or not self.running:
+                return callback(*args)
+        return guarded
+
+    # ---- running ------------------------------------------------------------
+
+    def run(self):
+        """
+        Run pre_autonomous, then follow the field until the program is
+        stopped. Call this at the end of the program (it never returns).
+        """
+        self.running = True
+        if self.pre_autonomous is not None and not self.ready:
+            self.state = PRE_AUTON
+            self.pre_autonomous()
+        self.ready = True
+        if self.state == PRE_AUTON:
+            self.state = DISABLED
+        shown = None
+        while True:
+            self.update()
+            if self.state != shown:
+                shown = self.state
+                for callback in self._state_callbacks:
+                    callback(shown)
+            wait(self.period_ms, MSEC)
+
+    def update(self):
+        """Check the field once and change state if it changed."""
+        competition = self.competition
+        if not competition.is_enabled():
+            if self.state in (AUTONOMOUS, DRIVER):
+                self.enter(DISABLED)
+        elif competition.is_autonomous():
+            self.enter(AUTONOMOUS)
+        elif competition.is_driver_control():
+            self.enter(DRIVER)
+
+    def enter(self, state):
+        """Change to `state`: stop the running phase, then start the new one."""
+        if state == self.state:
+            return
+        if self.state in (AUTONOMOUS, DRIVER):
+            self._stop_phase()
+        self.state = state
+        self.transitions += 1
+        self.enabled_at = self.timer.time(MSEC)
+        routine = self.routines.get(state)
+        if routine is not None:
+            self._phase_thread = Thread(routine)
+
+    def _stop_phase(self):
+        if self._phase_thread is not None:
+            self._phase_thread.stop()
+            self._phase_thread = None
+        for callback in self._stop_callbacks:
+            callback()
+
+    def _enable_autonomous(self):
+        self.enter(AUTONOMOUS)
+
+    def _enable_driver(self):
+        self.enter(DRIVER)
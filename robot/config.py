@@ -0,0 +1,117 @@
+# Robot Configuration
+# Describe the robot ONCE - ports, which motors are reversed, wheel size - and
+# build each device from that description the first time it is used.
+#
+# Every program used to start with the same lines:
+#     brain = Brain()
+#     front_left_motor = Motor(Ports.PORT20)
+#     back_left_motor = Motor(Ports.PORT19)
+#     ...
+# Moving a motor to a new port meant changing every program, and a program
+# that only drives still created the grabber motor and the sensors.
+#
+# A config is a plain dictionary. Devices(config) builds nothing up front: a
+# device is created the first time you ask for it, so a program that only
+# uses devices.drivetrain never creates the grabber, inertial or optical
+# sensor (and never waits for them while starting).
+#
+# Example:
+#     from robot.config import Devices, CURRICULUM_ROBOT
+#
+#     devices = Devices(CURRICULUM_ROBOT)
+#     drivetrain = devices.drivetrain          # builds the four drive motors
+#     inertial_sensor = devices.inertial       # built only if a program asks
+#
+# A different robot only needs a different config:
+#     MY_ROBOT = dict(CURRICULUM_ROBOT, grabber=(8, True), wheel_diameter=3.25)
+
+from vex import *
+
+# The robot used by every lesson. Motors are (port, reversed).
+CURRICULUM_ROBOT = {
+    "left_motors": ((20, False), (19, False)),    # front, back
+    "right_motors": ((11, True), (12, True)),     # front, back
+    "wheel_diameter": 4.0,     # inches
+    "gear_ratio": 1.0,         # wheel turns per motor turn
+    "track_width": 12.0,       # inches between the left and right wheels
+    "grabber": (1, False),
+    "inertial": 10,
+    "optical": 2,
+}
+
+
+def port(number):
+    """Ports.PORT1 ... Ports.PORT21 from a port number."""
+    return getattr(Ports, "PORT%d" % number)
+
+
+class Devices:
+    """
+    The devices described by a config, each created when first used.
+
+    Attributes (all lazy):
+        brain, controller
+        left_motors, right_motors     lists of Motor, front first
+        left_drive, right_drive       MotorGroup of each side
+        drivetrain                    DriveBase of both sides
+        grabber_motor, inertial, line_sensor
+    """
+
+    def __init__(self, config):
+        self.config = config
+        self.wheel_diameter = config["wheel_diameter"]
+        self.gear_ratio = config.get("gear_ratio", 1.0)
+        self.track_width = config.get("track_width", 12.0)
+        self.wheel_circumference = self.wheel_diameter * 3.14159
+        self._built = {}
+
+    def __getattr__(self, name):
+        # Only called for attributes that do not exist yet: build the device
+        build = _BUILDERS.get(name)
+        if build is None:
+            raise AttributeError(name)
+        device = build(self)
+        self._built[name] = device
+        setattr(self, name, device)
+        return device
+
+    def built(self):
+        """Names of the devices created so far."""
+        return list(self._built)
+
+
+# ============================================================================
+# BUILDERS (one per device)
+# ============================================================================
+
+def _motors(config, key):
+    return [Motor(port(number), reversed_) for number, reversed_ in config[key]]
+
+
+def _drive_group(devices, side):
+    from robot.drivetrain import MotorGroup
+    return MotorGroup(*getattr(devices, side + "_motors"))
+
+
+def _drivetrain(devices):
+    from robot.drivetrain import DriveBase
+    return DriveBase(devices.left_drive, devices.right_drive)
+
+
+def _grabber(devices):
+    number, reversed_ = devices.config["grabber"]
+    return Motor(port(number), reversed_)
+
+
+_BUILDERS = {
+    "brain": lambda devices: Brain(),
+    "controller": lambda devices: Controller(),
+    "left_motors": lambda devices: _motors(devices.config, "left_motors"),
+    "right_motors": lambda devices: _motors(devices.config, "right_motors"),
+    "left_drive": lambda devices: _drive_group(devices, "left"),
+    "right_drive": lambda devices: _drive_group(devices, "right"),
+    "drivetrain": _drivetrain,
+    "grabber_motor": _grabber,
+    "inertial": lambda devices: Inertial(port(devices.config["inertial"])),
+    "line_sensor": lambda devices: Optical(port(devices.config["optical"])),
+}
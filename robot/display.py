@@ -0,0 +1,124 @@
+# Brain Display
+# Only redraw the lines of the brain screen that actually changed, and never
+# more often than needed.
+#
+# Drawing on the screen is one of the slowest things the brain does. A loop that
+# clears and reprints the whole screen every 20 ms spends a lot of time drawing
+# the same text again and again, and that time is taken from driving.
+#
+# With a Display, your program just sets named text fields:
+#     display.set("status", "On line!")
+#     display.set("brightness", "Brightness:", line_sensor.brightness())
+# That is fast - it only stores the text. A background thread draws the screen
+# at most 10 times per second, and only redraws the lines whose text changed.
+#
+# Example:
+#     display = Display(brain.screen)
+#     display.start()
+
+from vex import *
+
+# ============================================================================
+# DISPLAY
+# ============================================================================
+
+def format_values(values, precision=2):
+    """Join values with spaces, like brain.screen.print() does."""
+    parts = []
+    for value in values:
+        if isinstance(value, float):
+            parts.append(("%." + str(precision) + "f") % value)
+        else:
+            parts.append(str(value))
+    return " ".join(parts)
+
+
+class Display:
+    """
+    A screen made of named text lines that is redrawn only when it changes.
+
+    Each name gets its own row, in the order the names are first used
+    (or choose the row with place()).
+    """
+
+    def __init__(self, screen, rate_hz=10, rows=12, precision=2):
+        self.screen = screen
+        self.period_ms = 1000 / rate_hz
+        self.rows = rows
+        self.precision = precision
+        self._row_of = {}            # field name -> row number (1 = top)
+        self._wanted = {}            # row -> text the program wants shown
+        self._shown = {}             # row -> text currently on the screen
+        self._clear_all = True       # start from a blank screen
+        self._thread = None
+        self.frames = 0              # how many times something was drawn
+        self.lines_drawn = 0         # how many lines were drawn in total
+
+    # ---- setting text (fast, never draws) ------------------------------------
+
+    def place(self, name, row):
+        """Put the field `name` on a specific row (1 = top)."""
+        self._row_of[name] = row
+
+    def set(self, name, *values):
+        """Set the text of a field. Values are joined with spaces."""
+        row = self._row_of.get(name)
+        if row is None:
+            row = self._next_free_row()
+            self._row_of[name] = row
+        self._wanted[row] = format_values(values, self.precision)
+
+    def remove(self, name):
+        """Blank a field's row and forget the field."""
+        row = self._row_of.pop(name, None)
+        if row is not None:
+            self._wanted[row] = ""
+
+    def clear(self):
+        """Forget every field and blank the whole screen."""
+        self._row_of = {}
+        self._wanted = {}
+        self._clear_all = True
+
+    def _next_free_row(self):
+        used = self._row_of.values()
+        for row in range(1, self.rows + 1):
+            if row not in used:
+                return row
+        return self.rows
+
+    # ---- drawing ------------------------------------------------------------
+
+    def flush(self):
+        """Draw every line that changed since the last flush. Returns the count."""
+        drawn = 0
+        if self._clear_all:
+            self.screen.clear_screen()
+            self._shown = {}
+            self._clear_all = False
+            drawn += 1
+        for row in sorted(self._wanted):
+            text = self._wanted[row]
+            if self._shown.get(row, "") == text:
+                continue
+            self.screen.clear_line(row)
+            if text:
+                self.screen.set_cursor(row, 1)
+                self.screen.print(text)
+            self._shown[row] = text
+            drawn += 1
+        if drawn:
+            self.screen.render()
+            self.frames += 1
+            self.lines_drawn += drawn
+        return drawn
+
+    def start(self):
+        """Start the background thread that draws the screen."""
+        if self._thread is None:
+            self._thread = Thread(self._loop)
+
+    def _loop(self):
+        while True:
+            self.flush()
+            wait(self.period_ms, MSEC)
@@ -0,0 +1,218 @@
+# Drivetrain
+# Treat the two motors on each side as ONE motor, and skip commands that would
+# not change anything.
+#
+# Without this, every drive function repeats four motor calls:
+#     front_left_motor.spin(FORWARD, left_speed, PERCENT)
+#     back_left_motor.spin(FORWARD, left_speed, PERCENT)
+#     front_right_motor.spin(FORWARD, right_speed, PERCENT)
+#     back_right_motor.spin(FORWARD, right_speed, PERCENT)
+# ...and sends all four every 20 ms, even when the joystick has not moved.
+# Each call is a separate message to a motor, so that is a lot of wasted traffic.
+#
+# A MotorGroup sends one command to all of its motors back-to-back and
+# remembers it. If the next command is the same, nothing is sent at all.
+# A MotorGroup works anywhere a single Motor does (spin, spin_for, stop,
+# position, ...), so the turn controller, odometry and motion engine can all
+# drive the groups instead of the individual motors.
+#
+# Example:
+#     left_drive = MotorGroup(front_left_motor, back_left_motor)
+#     right_drive = MotorGroup(front_right_motor, back_right_motor)
+#     drivetrain = DriveBase(left_drive, right_drive)
+#     drivetrain.arcade(forward_speed, turn_speed)
+
+from vex import *
+# spin_for(..., wait=True) takes `wait` like the vex API, which hides the
+# wait() function inside those methods - so it also goes by this name
+from vex import wait as pause
+from robot.shaping import arcade_mix
+
+# ============================================================================
+# MOTOR GROUP
+# ============================================================================
+
+class MotorGroup:
+    """
+    Several motors that always get the same command.
+
+    Works like the VEX MotorGroup, but repeated commands are skipped: calling
+    spin(FORWARD, 50, PERCENT) twice in a row only talks to the motors once.
+    """
+
+    def __init__(self, *motors):
+        self.motors = list(motors)
+        self._last = None   # the last command sent, or None if unknown
+        self.sent = 0       # commands actually sent to the motors
+        self.skipped = 0    # commands skipped because nothing changed
+
+    def _send(self, command):
+        """Returns True if `command` is new and must be sent."""
+        if command == self._last:
+            self.skipped += 1
+            return False
+        self._last = command
+        self.sent += 1
+        return True
+
+    def forget(self):
+        """
+        Forget the last command, so the next one is always sent. Use this if
+        something else commanded the motors directly.
+        """
+        self._last = None
+
+    # ---- commands -----------------------------------------------------------
+
+    def spin(self, direction, velocity=None, units=PERCENT):
+        """Spin all motors forever at a velocity."""
+        if self._send(("spin", direction, velocity, units)):
+            for motor in self.motors:
+                motor.spin(direction, velocity, units)
+
+    def spin_for(self, direction, amount, units=DEGREES, velocity=None,
+                 units_v=PERCENT, wait=True):
+        """
+        Spin all motors a set amount. All motors start together; with
+        wait=True this returns when every motor has finished.
+        """
+        self._last = None
+        self.sent += 1
+        for motor in self.motors:
+            motor.spin_for(direction, amount, units, velocity, units_v, wait=False)
+        if wait:
+            while not self.is_done():
+                pause(10, MSEC)
+        return True
+
+    def spin_to_position(self, rotation, units=DEGREES, velocity=None,
+                         units_v=PERCENT, wait=True):
+        """Spin all motors to an absolute position."""
+        self._last = None
+        self.sent += 1
+        for motor in self.motors:
+            motor.spin_to_position(rotation, units, velocity, units_v, wait=False)
+        if wait:
+            while not self.is_done():
+                pause(10, MSEC)
+        return True
+
+    def stop(self, mode=None):
+        """Stop all motors (skipped if they were already told to stop)."""
+        if self._send(("stop", mode)):
+            for motor in self.motors:
+                if mode is None:
+                    motor.stop()
+                else:
+                    motor.stop(mode)
+
+    def set_stopping(self, mode):
+        self._last = None
+        for motor in self.motors:
+            motor.set_stopping(mode)
+
+    def set_velocity(self, velocity, units=PERCENT):
+        for motor in self.motors:
+            motor.set_velocity(velocity, units)
+
+    def set_position(self, value, units=DEGREES):
+        for motor in self.motors:
+            motor.set_position(value, units)
+
+    def reset_position(self):
+        for motor in self.motors:
+            motor.reset_position()
+
+    def set_timeout(self, value, units=MSEC):
+        for motor in self.motors:
+            motor.set_timeout(value, units)
+
+    # ---- readings (averaged over the motors) ---------------------------------
+
+    def position(self, units=DEGREES):
+        total = 0.0
+        for motor in self.motors:
+            total += motor.position(units)
+        return total / len(self.motors)
+
+    def velocity(self, units=RPM):
+        total = 0.0
+        for motor in self.motors:
+            total += motor.velocity(units)
+        return total / len(self.motors)
+
+    def current(self, units=None):
+        """Total current of all motors."""
+        total = 0.0
+        for motor in self.motors:
+            total += motor.current()
+        return total
+
+    def is_done(self):
+        for motor in self.motors:
+            if not motor.is_done():
+                return False
+        return True
+
+    def is_spinning(self):
+        for motor in self.motors:
+            if motor.is_spinning():
+                return True
+        return False
+
+    def count(self):
+        return len(self.motors)
+
+
+# ============================================================================
+# DRIVE BASE
+# ============================================================================
+
+class DriveBase:
+    """
+    The left and right sides of the drivetrain.
+
+    Example: drivetrain.tank(left_speed, right_speed)
+             drivetrain.arcade(forward_speed, turn_speed)
+             drivetrain.stop()
+    """
+
+    def __init__(self, left, right):
+        self.left = left
+        self.right = right
+
+    def tank(self, left_speed, right_speed):
+        """Each side gets its own speed (percent)."""
+        self.left.spin(FORWARD, left_speed, PERCENT)
+        self.right.spin(FORWARD, right_speed, PERCENT)
+
+    def arcade(self, forward_speed, turn_speed):
+        """
+        One speed forward, one for turning (+ = right). If a side would go
+        past 100%, both sides slow down together so the robot still turns.
+        """
+        left_speed, right_speed = arcade_mix(forward_speed, turn_speed)
+        self.tank(left_speed, right_speed)
+
+    def move_degrees(self, direction, degrees, speed, wait=True):
+        """Turn every wheel the same number of degrees (drive straight)."""
+        self.left.spin_for(direction, degrees, DEGREES, speed, PERCENT, wait=False)
+        self.right.spin_for(direction, degrees, DEGREES, speed, PERCENT, wait=False)
+        if wait:
+            while not self.is_done():
+                pause(10, MSEC)
+
+    def stop(self, mode=None):
+        self.left.stop(mode)
+        self.right.stop(mode)
+
+    def is_done(self):
+        return self.left.is_done() and self.right.is_done()
+
+    def set_stopping(self, mode):
+        self.left.set_stopping(mode)
+        self.right.set_stopping(mode)
+
+    def commands_sent(self):
+        """How many side commands were actually sent (for checking traffic)."""
+        return self.left.sent + self.right.sent
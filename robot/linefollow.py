@@ -0,0 +1,134 @@
+# Proportional Line Following
+# Follow the edge of a line smoothly, instead of zig-zagging.
+#
+# The old follow_line() is "bang-bang": the sensor is either ON the line (turn
+# one way) or OFF it (turn the other way), always by the same amount. The robot
+# zig-zags, and at higher speeds it swings right off the line.
+#
+# This follower steers by HOW FAR the brightness is from the middle value
+# between line and floor:
+#   - exactly on the edge of the line -> brightness is in the middle -> go straight
+#   - a little onto the floor         -> a little brighter -> turn a little
+#   - far onto the floor              -> much brighter     -> turn a lot
+# That is a PID controller on the brightness error (see robot/pid.py).
+#
+# The middle value is measured, not guessed: calibrate() sweeps the sensor
+# over the line and the floor and remembers the darkest and brightest readings.
+#
+# It follows the LEFT edge of the line (like main-08.py): darker = turn left,
+# brighter = turn right. Use side=-1 for the right edge.
+#
+# Example:
+#     follower = LineFollower(left_motors, right_motors, line_sensor)
+#     follower.calibrate()        # robot on the line's edge, sensor over it
+#     follower.follow(10000)      # follow for 10 seconds
+
+from vex import *
+from robot.pid import PID, clamp
+from robot.periodic import PeriodicTask
+
+# ============================================================================
+# LINE FOLLOWER
+# ============================================================================
+
+class LineFollower:
+    """
+    PID line following on the optical sensor's brightness.
+
+    Settings (all can be changed after creating the follower):
+        kp, ki, kd      PID gains, in percent turn per unit of brightness error
+        speed           forward speed on a straight line (percent)
+        max_turn        most turning added to one side (percent)
+        slow_down       0 to 1: how much to slow down when far off the edge
+                        (1 = stop going forward at the largest error)
+        midpoint        brightness on the edge of the line (set by calibrate())
+        side            1 = follow the left edge, -1 = the right edge
+    """
+
+    def __init__(self, left_motors, right_motors, sensor, kp=1.2, ki=0.0, kd=0.08,
+                 speed=70, max_turn=60, slow_down=0.5, midpoint=50, side=1,
+                 period_ms=10):
+        self.left_motors = list(left_motors)
+        self.right_motors = list(right_motors)
+        self.sensor = sensor
+        self.pid = PID(kp, ki, kd, output_limit=max_turn, integral_limit=50.0)
+        self.speed = speed
+        self.max_turn = max_turn
+        self.slow_down = slow_down
+        self.midpoint = midpoint
+        self.half_range = 35.0      # brightness from midpoint to line or floor
+        self.side = side
+        self.period_ms = period_ms
+        # Measured while following
+        self.steps = 0
+        self.total_squared_error = 0.0
+
+    # ---- calibration --------------------------------------------------------
+
+    def calibrate(self, sweep_speed=20, sweep_ms=400, min_range=10):
+        """
+        Sweep the sensor left and right over the line and learn the darkest
+        and brightest readings. Start with the sensor near the line.
+
+        Returns (darkest, brightest, midpoint). If the two are less than
+        `min_range` apart (the sweep missed the line or the floor), the
+        midpoint is not changed.
+        """
+        self.pid.reset()
+        readings = [self.sensor.brightness()]
+        # Left for half the sweep, right for a full sweep, then back to center
+        for turn, duration in ((-1, sweep_ms / 2), (1, sweep_ms), (-1, sweep_ms / 2)):
+            self._drive(0, turn * sweep_speed)
+            waited = 0
+            while waited < duration:
+                wait(self.period_ms, MSEC)
+                waited += self.period_ms
+                readings.append(self.sensor.brightness())
+        self.stop()
+
+        darkest = min(readings)
+        brightest = max(readings)
+        if brightest - darkest >= min_range:
+            self.midpoint = (darkest + brightest) / 2.0
+            self.half_range = (brightest - darkest) / 2.0
+        return darkest, brightest, self.midpoint
+
+    # ---- following ----------------------------------------------------------
+
+    def step(self):
+        """Read the sensor once and set the motor speeds. Returns the error."""
+        error = self.sensor.brightness() - self.midpoint
+        turn = self.side * self.pid.update(error, self.period_ms / 1000.0)
+        # Slow down when far from the edge, so sharp corners can be made
+        off = clamp(abs(error) / self.half_range, 0.0, 1.0)
+        forward = self.speed * (1.0 - self.slow_down * off)
+        self._drive(forward, turn)
+        self.steps += 1
+        self.total_squared_error += error * error
+        return error
+
+    def follow(self, duration_ms):
+        """Follow the line for `duration_ms`, then stop."""
+        self.pid.reset()
+        PeriodicTask(self.step, self.period_ms, "line").run(duration_ms)
+        self.stop()
+
+    def wobble(self):
+        """Average distance from the edge, as brightness (lower = steadier)."""
+        if self.steps == 0:
+            return 0.0
+        return (self.total_squared_error / self.steps) ** 0.5
+
+    # ---- motors -------------------------------------------------------------
+
+    def _drive(self, forward, turn):
+        left = clamp(forward + turn, -100, 100)
+        right = clamp(forward - turn, -100, 100)
+        for motor in self.left_motors:
+            motor.spin(FORWARD, left, PERCENT)
+        for motor in self.right_motors:
+            motor.spin(FORWARD, right, PERCENT)
+
+    def stop(self):
+        for motor in self.left_motors + self.right_motors:
+            motor.stop()
@@ -0,0 +1,164 @@
+# Mechanism Workers
+# Run slow mechanism actions (like a grab) in their own thread, so button
+# callbacks return right away and never hold up driving.
+#
+# The old way:
+#     controller.buttonR1.pressed(grab)
+# grab() waits for the whole grabber stroke. Pressing R1 three times quickly
+# starts three grabs, and R2 cannot stop a grab that is already moving.
+#
+# With a MechanismWorker, each mechanism gets ONE worker thread that runs its
+# actions one at a time:
+#   - A button press only hands the action to the worker (instant).
+#   - Repeated presses are combined: pressing R1 while a grab is running, or
+#     already waiting to run, does nothing extra.
+#   - A new action can cancel the one that is running: R2 during a grab stops
+#     the grab and starts the release right away.
+#
+# An action is a function that takes the worker. It starts the motor without
+# waiting, then uses worker.wait_until() / worker.wait(), which return early
+# (by raising Cancelled) if the action is cancelled.
+#
+# Example:
+#     def grab_stroke(worker):
+#         grabber_motor.spin_for(FORWARD, 90, DEGREES, 50, PERCENT, wait=False)
+#         worker.wait_until(grabber_motor.is_done)
+#
+#     grabber = MechanismWorker("grabber", on_cancel=grabber_motor.stop)
+#     grabber.start()
+#     grabber.bind(controller.buttonR1, grab_stroke)
+#     grabber.bind(controller.buttonR2, release_stroke)
+
+from vex import *
+
+# ============================================================================
+# MECHANISM WORKER
+# ============================================================================
+
+class Cancelled(Exception):
+    """Raised inside an action when it has been cancelled."""
+
+
+class MechanismWorker:
+    """
+    One thread that runs one mechanism's actions, one at a time.
+
+    Counts (for checking): started, finished, cancelled, coalesced
+    (requests dropped because the same action was already running or waiting).
+    """
+
+    def __init__(self, name, on_cancel=None, period_ms=10):
+        self.name = name
+        self.on_cancel = on_cancel   # called when an action is cancelled (e.g. motor.stop)
+        self.period_ms = period_ms
+        self.current = None          # (action, args) running now, or None
+        self.pending = None          # (action, args) to run next, or None
+        self._cancel = False
+        self._thread = None
+        self.started = 0
+        self.finished = 0
+        self.cancelled = 0
+        self.coalesced = 0
+
+    # ---- requests (fast, called from button callbacks) -----------------------
+
+    def submit(self, action, args=(), cancel_current=True):
+        """
+        Ask the worker to run `action(worker, *args)`. Returns right away.
+
+        The same action already running or waiting is not queued again. A
+        different action replaces whatever was waiting and, with
+        cancel_current=True, stops the one that is running.
+        """
+        request = (action, tuple(args))
+        if request == self.current:
+            # The latest press asks for what is already happening
+            self.pending = None
+            self.coalesced += 1
+            return False
+        if request == self.pending:
+            self.coalesced += 1
+            return False
+        if self.pending is not None:
+            self.coalesced += 1
+        self.pending = request
+        if cancel_current and self.current is not None:
+            self._cancel = True
+        return True
+
+    def cancel(self):
+        """Stop the running action and forget the waiting one."""
+        self.pending = None
+        if self.current is not None:
+            self._cancel = True
+
+    def busy(self):
+        """True while an action is running or waiting."""
+        return self.current is not None or self.pending is not None
+
+    def bind(self, button, action, args=(), cancel_current=True):
+        """Run `action` on this worker whenever `button` is pressed."""
+        def pressed():
+            self.submit(action, args, cancel_current)
+        button.pressed(pressed)
+
+    # ---- helpers for actions -------------------------------------------------
+
+    def check(self):
+        """Raise Cancelled if the running action should stop."""
+        if self._cancel:
+            raise Cancelled()
+
+    def wait(self, duration_ms):
+        """Wait, but stop early if the action is cancelled."""
+        waited = 0
+        while waited < duration_ms:
+            self.check()
+            wait(self.period_ms, MSEC)
+            waited += self.period_ms
+        self.check()
+
+    def wait_until(self, condition, timeout_ms=None):
+        """
+        Wait until condition() is True. Returns False on timeout; raises
+        Cancelled if the action is cancelled.
+        """
+        waited = 0
+        while not condition():
+            self.check()
+            if timeout_ms is not None and waited >= timeout_ms:
+                return False
+            wait(self.period_ms, MSEC)
+            waited += self.period_ms
+        return True
+
+    # ---- running ------------------------------------------------------------
+
+    def start(self):
+        """Start the worker thread."""
+        if self._thread is None:
+            self._thread = Thread(self._loop)
+
+    def _loop(self):
+        while True:
+            if self.pending is not None:
+                self.run_next()
+            wait(self.period_ms, MSEC)
+
+    def run_next(self):
+        """Run the waiting action in this thread (the worker thread calls this)."""
+        self.current = self.pending
+        self.pending = None
+        self._cancel = False
+        action, args = self.current
+        self.started += 1
+        try:
+            action(self, *args)
+            self.finished += 1
+        except Cancelled:
+            self.cancelled += 1
+            if self.on_cancel is not None:
+                self.on_cancel()
+        finally:
+            self.current = None
+            self._cancel = False
@@ -0,0 +1,428 @@
+# Motion Engine
+# Run drive, turn and mechanism commands at the same time instead of one after
+# another.
+#
+# The old way: move() waits until the wheels stop, then grab() waits until the
+# grabber stops, then turn() starts. Every step pays a full stop-and-settle.
+#
+# The new way: commands go into a MotionScheduler. One background thread checks
+# every command every 10 ms (one "tick"). Each command says when it may start:
+#   - right away,
+#   - when another command is done, or
+#   - when another command is, say, 80% done.
+# Every command gives back a Future you can wait on or check for progress.
+#
+# Example:
+#     motion = MotionScheduler(left_motors, right_motors, inertial_sensor, WHEEL_CIRCUMFERENCE)
+#     motion.start()
+#     drive = motion.drive(24, 50)                               # 24 inches at 50%
+#     motion.spin_motor(grabber_motor, 90, 50, after=drive, at=0.8)  # grab near the end
+#     motion.turn(180, 40, after=drive)                          # turn when the drive is done
+#     motion.wait_all()
+
+from vex import *
+from robot.turning import TurnController, angle_difference
+
+# ============================================================================
+# FUTURES
+# ============================================================================
+
+class Future:
+    """
+    A handle to a command that was given to the MotionScheduler.
+
+    Example: drive = motion.drive(24, 50)
+             drive.progress()   # 0.0 to 1.0
+             drive.wait()       # block until done
+    """
+
+    def __init__(self, command, conditions):
+        self.command = command
+        self.conditions = conditions  # list of (future, fraction) that must be met
+        self.state = "pending"        # pending -> running -> done / cancelled
+        self._progress = 0.0
+
+    def progress(self):
+        """How much of the command is done, from 0.0 to 1.0."""
+        if self.state == "done":
+            return 1.0
+        return self._progress
+
+    def done(self):
+        """True once the command has finished (or was cancelled)."""
+        return self.state in ("done", "cancelled")
+
+    def cancelled(self):
+        return self.state == "cancelled"
+
+    def running(self):
+        return self.state == "running"
+
+    def reached(self, fraction):
+        """True when the command is at least `fraction` done."""
+        return self.state == "done" or self._progress >= fraction
+
+    def cancel(self):
+        """Stop the command. Commands waiting on this one are cancelled too."""
+        if self.state == "running":
+            self.command.stop()
+        if not self.done():
+            self.state = "cancelled"
+
+    def wait(self, timeout_ms=None, poll_ms=10):
+        """Block until the command is done. Returns False on timeout."""
+        waited = 0
+        while not self.done():
+            if timeout_ms is not None and waited >= timeout_ms:
+                return False
+            wait(poll_ms, MSEC)
+            waited += poll_ms
+        return not self.cancelled()
+
+
+# ============================================================================
+# COMMANDS
+# ============================================================================
+
+class Command:
+    """
+    Base class for something the scheduler runs.
+
+    resource: commands that share a resource (like "drive") never run at the
+              same time. A new one takes over from the old one.
+    """
+
+    resource = None
+
+    def start(self):
+        """Called once, on the tick the command starts."""
+
+    def update(self):
+        """Called every tick. Return progress from 0.0 to 1.0 (1.0 = finished)."""
+        return 1.0
+
+    def stop(self):
+        """Called if the command is cancelled while running."""
+
+
+class DriveCommand(Command):
+    """Drive straight a distance (inches, negative = backward)."""
+
+    resource = "drive"
+
+    def __init__(self, motors, distance, speed, wheel_circumference, gear_ratio=1.0):
+        self.motors = motors
+        self.degrees = abs(distance) / (wheel_circumference * gear_ratio) * 360
+        self.direction = FORWARD if distance >= 0 else REVERSE
+        self.speed = speed
+        self.start_positions = []
+
+    def start(self):
+        self.start_positions = [motor.position(DEGREES) for motor in self.motors]
+        for motor in self.motors:
+            motor.spin_for(self.direction, self.degrees, DEGREES, self.speed, PERCENT, wait=False)
+
+    def update(self):
+        if self.degrees == 0:
+            return 1.0
+        if all(motor.is_done() for motor in self.motors):
+            return 1.0
+        travelled = 0.0
+        for motor, start in zip(self.motors, self.start_positions):
+            travelled += abs(motor.position(DEGREES) - start)
+        return min(0.99, travelled / len(self.motors) / self.degrees)
+
+    def stop(self):
+        for motor in self.motors:
+            motor.stop()
+
+
+class TurnCommand(Command):
+    """
+    Turn in place by an angle (degrees, positive = right).
+
+    Runs the profiled PID TurnController one step per tick. It uses
+    inertial_sensor.rotation(), which never wraps around, so there is no
+    need to reset the heading (and no 50 ms settle wait) before each turn.
+    """
+
+    resource = "drive"
+
+    def __init__(self, turner, angle, speed, heading_source=None):
+        self.turner = turner
+        self.angle = angle
+        self.speed = speed
+        # With a heading source (like odometry.heading), `angle` is an absolute
+        # heading to face instead of an amount to turn
+        self.heading_source = heading_source
+
+    def start(self):
+        angle = self.angle
+        if self.heading_source is not None:
+            angle = angle_difference(self.angle, self.heading_source())
+        self.turner.start(angle, self.speed)
+
+    def update(self):
+        if self.turner.step():
+            return 1.0
+        return self.turner.progress()
+
+    def stop(self):
+        self.turner.stop()
+
+
+class MotorCommand(Command):
+    """Spin one mechanism motor (like the grabber) by an angle in degrees."""
+
+    def __init__(self, motor, angle, speed):
+        self.motor = motor
+        self.resource = motor
+        self.angle = angle
+        self.speed = speed
+        self.start_position = 0.0
+
+    def start(self):
+        self.start_position = self.motor.position(DEGREES)
+        direction = FORWARD if self.angle >= 0 else REVERSE
+        self.motor.spin_for(direction, abs(self.angle), DEGREES, self.speed, PERCENT, wait=False)
+
+    def update(self):
+        if self.angle == 0 or self.motor.is_done():
+            return 1.0
+        moved = abs(self.motor.position(DEGREES) - self.start_position)
+        return min(0.99, moved / abs(self.angle))
+
+    def stop(self):
+        self.motor.stop()
+
+
+class PositionCommand(Command):
+    """
+    Move a mechanism to a named position with a Positioner
+    (robot/positioner.py). Done when it arrives or stalls on something.
+    """
+
+    def __init__(self, positioner, setpoint):
+        self.positioner = positioner
+        self.resource = positioner.motor
+        self.setpoint = setpoint
+
+    def start(self):
+        self.positioner.start(self.setpoint)
+
+    def update(self):
+        if self.positioner.step():
+            return 1.0
+        return self.positioner.progress()
+
+    def stop(self):
+        self.positioner.stop()
+
+
+class PauseCommand(Command):
+    """Do nothing for a while (useful as a step in a chain)."""
+
+    def __init__(self, timer, duration_ms):
+        self.timer = timer
+        self.duration_ms = duration_ms
+        self.start_ms = 0.0
+
+    def start(self):
+        self.start_ms = self.timer.time(MSEC)
+
+    def update(self):
+        if self.duration_ms <= 0:
+            return 1.0
+        return min(1.0, (self.timer.time(MSEC) - self.start_ms) / self.duration_ms)
+
+
+class CallbackCommand(Command):
+    """Run a function once (for example controller.rumble)."""
+
+    def __init__(self, callback, args=()):
+        self.callback = callback
+        self.args = args
+
+    def start(self):
+        self.callback(*self.args)
+
+
+# ============================================================================
+# SCHEDULER
+# ============================================================================
+
+class MotionScheduler:
+    """
+    Runs queued commands together on one 10 ms control tick.
+
+    Commands on the same resource (the drivetrain, or one mechanism motor)
+    run one after another unless you chain them differently with `after`/`at`.
+    Commands on different resources run at the same time.
+    """
+
+    def __init__(self, left_motors, right_motors, inertial=None,
+                 wheel_circumference=4.0 * 3.14159, gear_ratio=1.0, period_ms=10):
+        self.left_motors = list(left_motors)
+        self.right_motors = list(right_motors)
+        self.inertial = inertial
+        self.turner = None
+        if inertial is not None:
+            self.turner = TurnController(left_motors, right_motors, inertial,
+                                         period_ms=period_ms)
+        self.wheel_circumference = wheel_circumference
+        self.gear_ratio = gear_ratio      # wheel turns per motor turn
+        self.period_ms = period_ms
+        self.timer = Timer()
+        self._pending = []
+        self._running = []
+        self._last = {}          # resource -> most recent Future on it
+        self._owner = {}         # resource -> running Future
+        self._thread = None
+        self.ticks = 0
+
+    # ---- submitting commands ------------------------------------------------
+
+    def add(self, command, after=None, at=1.0):
+        """
+        Queue a command and return its Future.
+
+        after: a Future (or list of Futures) to wait for
+        at:    how far along `after` must be before starting (0.8 = 80% done)
+
+        With no `after`, the command waits for the last command on the same
+        resource to finish, so drive commands still happen in order.
+        """
+        conditions = []
+        if after is None:
+            previous = self._last.get(command.resource)
+            if command.resource is not None and previous is not None and not previous.done():
+                conditions.append((previous, 1.0))
+        elif isinstance(after, (list, tuple)):
+            for future in after:
+                conditions.append((future, at))
+        else:
+            conditions.append((after, at))
+        future = Future(command, conditions)
+        if command.resource is not None:
+            self._last[command.resource] = future
+        self._pending.append(future)
+        return future
+
+    def drive(self, distance, speed, after=None, at=1.0):
+        """Drive straight `distance` inches (negative = backward)."""
+        command = DriveCommand(self.left_motors + self.right_motors, distance, speed,
+                               self.wheel_circumference, self.gear_ratio)
+        return self.add(command, after, at)
+
+    def turn(self, angle, speed, after=None, at=1.0):
+        """Turn `angle` degrees in place (positive = right, negative = left)."""
+        command = TurnCommand(self.turner, angle, speed)
+        return self.add(command, after, at)
+
+    def turn_to(self, heading, speed, after=None, at=1.0, heading_source=None):
+        """
+        Turn to face an absolute heading. The turn angle is worked out when
+        the command starts, from heading_source() (default: the inertial
+        sensor's rotation).
+        """
+        if heading_source is None:
+            heading_source = self.inertial.rotation
+        command = TurnCommand(self.turner, heading, speed, heading_source)
+        return self.add(command, after, at)
+
+    def spin_motor(self, motor, angle, speed, after=None, at=1.0):
+        """Spin a mechanism motor `angle` degrees (negative = reverse)."""
+        return self.add(MotorCommand(motor, angle, speed), after, at)
+
+    def move_mechanism(self, positioner, setpoint, after=None, at=1.0):
+        """Move a mechanism's Positioner to `setpoint` (a name, or degrees)."""
+        return self.add(PositionCommand(positioner, setpoint), after, at)
+
+    def pause(self, duration_ms, after=None, at=1.0):
+        """A step that just takes time."""
+        return self.add(PauseCommand(self.timer, duration_ms), after, at)
+
+    def call(self, callback, args=(), after=None, at=1.0):
+        """Run a function once the conditions are met."""
+        return self.add(CallbackCommand(callback, args), after, at)
+
+    # ---- running ------------------------------------------------------------
+
+    def start(self):
+        """Start the background control thread."""
+        if self._thread is None:
+            self._thread = Thread(self._loop)
+
+    def _loop(self):
+        while True:
+            self.tick()
+            wait(self.period_ms, MSEC)
+
+    def tick(self):
+        """Start every command that is ready, then update every running one."""
+        self.ticks += 1
+        for future in list(self._pending):
+            if future.state == "cancelled":
+                self._pending.remove(future)
+            elif self._ready(future):
+                self._pending.remove(future)
+                self._begin(future)
+
+        for future in list(self._running):
+            if future.state != "running":
+                self._finish(future)
+                continue
+            future._progress = future.command.update()
+            if future._progress >= 1.0:
+                future.state = "done"
+                self._finish(future)
+
+    def _ready(self, future):
+        for condition, fraction in future.conditions:
+            if condition.cancelled():
+                future.state = "cancelled"
+                return False
+            if not condition.reached(fraction):
+                return False
+        return True
+
+    def _begin(self, future):
+        resource = future.command.resource
+        if resource is not None:
+            previous = self._owner.get(resource)
+            if previous is not None and previous.state == "running":
+                # Blend: the new command takes over the resource, and the old
+                # one counts as finished.
+                previous.state = "done"
+            self._owner[resource] = future
+        future.state = "running"
+        future.command.start()
+        self._running.append(future)
+
+    def _finish(self, future):
+        self._running.remove(future)
+        resource = future.command.resource
+        if resource is not None and self._owner.get(resource) is future:
+            del self._owner[resource]
+
+    def idle(self):
+        """True when nothing is queued or running."""
+        return not self._pending and not self._running
+
+    def wait_all(self, timeout_ms=None):
+        """Block until every queued command is done. Returns False on timeout."""
+        waited = 0
+        while not self.idle():
+            if timeout_ms is not None and waited >= timeout_ms:
+                return False
+            wait(self.period_ms, MSEC)
+            waited += self.period_ms
+        return True
+
+    def cancel_all(self):
+        """Stop everything (for example when autonomous ends or the robot is disabled)."""
+        for future in self._pending + self._running:
+            future.cancel()
+        self._pending = []
+        self._running = []
+        self._owner = {}
@@ -0,0 +1,216 @@
+# Odometry
+# Keep track of where the robot is on the field: x, y and heading.
+#
+# A background thread runs every 10 ms. Each time it:
+#   1. Reads how far the left and right wheels have turned (motor encoders)
+#   2. Reads the total rotation from the inertial sensor
+#   3. Moves the estimated position forward along the heading
+#
+# The wheels are good at measuring DISTANCE, and the inertial sensor is good at
+# measuring DIRECTION (wheels slip when turning). Using each for what it does
+# best keeps the position accurate for a whole autonomous, without ever
+# resetting the heading.
+#
+# Field coordinates: x = inches to the right, y = inches forward (from where
+# the robot started), heading = degrees clockwise (0 = facing forward).
+#
+# Example:
+#     odometry = Odometry(left_motors, right_motors, inertial_sensor, WHEEL_CIRCUMFERENCE)
+#     odometry.start()
+#     navigator = Navigator(odometry, turn_controller, left_motors, right_motors)
+#     navigator.drive_to(24, 24)     # drive to a point
+#     navigator.turn_to(90)          # face right
+
+import math
+
+from vex import *
+from robot.periodic import PeriodicTask
+from robot.pid import clamp
+from robot.turning import angle_difference
+
+# ============================================================================
+# ODOMETRY
+# ============================================================================
+
+class Odometry:
+    """
+    Tracks the robot's pose (x, y, heading) in the background.
+
+    Start it once, after the inertial sensor has finished calibrating.
+    """
+
+    def __init__(self, left_motors, right_motors, inertial, wheel_circumference,
+                 gear_ratio=1.0, period_ms=10, sensors=None):
+        self.left_motors = list(left_motors)
+        self.right_motors = list(right_motors)
+        self.inertial = inertial
+        # Inches of travel per degree of motor rotation
+        self.inches_per_degree = wheel_circumference * gear_ratio / 360.0
+        self.period_ms = period_ms
+        # A SensorHub (robot/sensors.py) whose cached devices were given above:
+        # each update samples it once, and the other readers share that tick
+        self.sensors = sensors
+        self.x = 0.0
+        self.y = 0.0
+        self._heading_offset = 0.0
+        self._last_left = None
+        self._last_right = None
+        self._last_rotation = None
+        self._thread = None
+        self._task = PeriodicTask(self.update, period_ms, "odometry")
+        self.updates = 0
+
+    def _side_position(self, motors):
+        total = 0.0
+        for motor in motors:
+            total += motor.position(DEGREES)
+        return total / len(motors)
+
+    def start(self):
+        """Start tracking in a background thread (does nothing if already started)."""
+        if self._thread is None:
+            self.update()
+            self._thread = Thread(self._loop)
+
+    def _loop(self):
+        # A fixed schedule, so every tick is exactly period_ms long: the
+        # route follower and telemetry read what each update samples
+        wait(self.period_ms, MSEC)     # start() did the first update
+        self._task.run()
+
+    def update(self):
+        """Read the sensors once and move the pose estimate."""
+        if self.sensors is not None:
+            self.sensors.sample()
+        left = self._side_position(self.left_motors)
+        right = self._side_position(self.right_motors)
+        rotation = self.inertial.rotation()
+        if self._last_left is None:
+            self._last_left = left
+            self._last_right = right
+            self._last_rotation = rotation
+            return
+
+        distance = ((left - self._last_left) + (right - self._last_right)) / 2 * self.inches_per_degree
+        # Move along the average heading during this step
+        middle = math.radians((rotation + self._last_rotation) / 2 + self._heading_offset)
+        self.x += distance * math.sin(middle)
+        self.y += distance * math.cos(middle)
+
+        self._last_left = left
+        self._last_right = right
+        self._last_rotation = rotation
+        self.updates += 1
+
+    def heading(self):
+        """Heading in degrees, 0 to 360, clockwise from the starting direction."""
+        return self.rotation() % 360
+
+    def rotation(self):
+        """Heading that keeps counting past 360 (like inertial.rotation())."""
+        if self._last_rotation is None:
+            return self._heading_offset
+        return self._last_rotation + self._heading_offset
+
+    def pose(self):
+        """Current (x, y, heading)."""
+        return (self.x, self.y, self.heading())
+
+    def set_pose(self, x, y, heading):
+        """Tell the robot where it is (for example its starting spot on the field)."""
+        self.update()
+        self.x = x
+        self.y = y
+        self._heading_offset = heading - (self._last_rotation or 0.0)
+
+    def distance_to(self, x, y):
+        return math.hypot(x - self.x, y - self.y)
+
+    def bearing_to(self, x, y):
+        """Heading (degrees) that points from the robot toward (x, y)."""
+        return math.degrees(math.atan2(x - self.x, y - self.y)) % 360
+
+
+# ============================================================================
+# NAVIGATOR (turn_to / drive_to)
+# ============================================================================
+
+class Navigator:
+    """
+    Moves the robot to field positions using the odometry pose.
+
+    Example: navigator.turn_to(180)          # face backward
+             navigator.drive_to(0, 24)       # drive to x=0, y=24 inches
+    """
+
+    def __init__(self, odometry, turner, left_motors, right_motors, drive_kp=6.0,
+                 heading_kp=1.5, max_speed=80, max_accel=250.0, tolerance=0.5,
+                 timeout_ms=5000, period_ms=10):
+        self.odometry = odometry
+        self.turner = turner
+        self.left_motors = list(left_motors)
+        self.right_motors = list(right_motors)
+        self.drive_kp = drive_kp          # percent per inch left to go
+        self.heading_kp = heading_kp      # percent per degree off course
+        self.max_speed = max_speed        # percent
+        self.max_accel = max_accel        # percent per second (ramp up)
+        self.tolerance = tolerance        # inches
+        self.timeout_ms = timeout_ms
+        self.period_ms = period_ms
+        self.timer = Timer()
+
+    def turn_to(self, heading, max_speed=None):
+        """Turn the shortest way to face an absolute heading. Returns a TurnResult."""
+        angle = angle_difference(heading, self.odometry.heading())
+        return self.turner.turn_by(angle, max_speed)
+
+    def turn_toward(self, x, y, max_speed=None):
+        """Turn to face the point (x, y)."""
+        return self.turn_to(self.odometry.bearing_to(x, y), max_speed)
+
+    def drive_to(self, x, y, max_speed=None, reverse=False):
+        """
+        Drive to the point (x, y), steering along the way.
+        Turns toward the point first. Returns the distance left at the end.
+        """
+        odometry = self.odometry
+        if max_speed is None:
+            max_speed = self.max_speed
+        bearing = odometry.bearing_to(x, y)
+        if reverse:
+            bearing = (bearing + 180) % 360
+        if odometry.distance_to(x, y) > self.tolerance:
+            self.turn_to(bearing)
+
+        self.timer.clear()
+        speed_limit = 0.0
+        while True:
+            odometry.update()
+            remaining = odometry.distance_to(x, y)
+            bearing = odometry.bearing_to(x, y)
+            if reverse:
+                bearing = (bearing + 180) % 360
+            off_course = angle_difference(bearing, odometry.heading())
+            # Distance left in the direction we are facing; negative = passed it
+            along = remaining * math.cos(math.radians(off_course))
+            if along <= self.tolerance or self.timer.time(MSEC) >= self.timeout_ms:
+                break
+
+            speed_limit = min(max_speed, speed_limit + self.max_accel * self.period_ms / 1000.0)
+            forward = clamp(self.drive_kp * along, -speed_limit, speed_limit)
+            if reverse:
+                forward = -forward
+            # Steering only matters while we are not right on top of the point
+            steer = self.heading_kp * off_course if remaining > 3 * self.tolerance else 0.0
+            self._drive(forward + steer, forward - steer)
+            wait(self.period_ms, MSEC)
+
+        for motor in self.left_motors + self.right_motors:
+            motor.stop()
+        return odometry.distance_to(x, y)
+
+    def _drive(self, left, right):
+        for motor in self.left_motors:
+            motor.spin(FORWARD, left, PERCENT)
+        for motor in self.right_motors:
+            motor.spin(FORWARD, right, PERCENT)
@@ -0,0 +1,161 @@
+# Periodic Tasks
+# Run a function at a steady rate, like exactly 100 times per second.
+#
+# The usual driver loop is:
+#     while True:
+#         ...read the controller and drive...
+#         wait(20, MSEC)
+# The real period is 20 ms PLUS however long the work took. If the work takes
+# 3 ms, the loop runs every 23 ms; if the screen is slow one time, that tick is
+# late, and every tick after it is late too.
+#
+# A PeriodicTask plans every tick against a fixed schedule (deadlines at 0 ms,
+# 10 ms, 20 ms, ...). After each tick it only waits for the time that is LEFT
+# until the next deadline, so slow ticks do not push the schedule back.
+# It also measures how long each tick took, and counts "overruns": ticks that
+# took so long that the next deadline was missed.
+#
+# Example:
+#     def drive_tick():
+#         arcade_drive(controller.axis3.position(), controller.axis4.position())
+#
+#     drive_loop = PeriodicTask(drive_tick, period_ms=10, name="drive")
+#     drive_loop.run()              # runs forever, 100 times per second
+#
+#     controller.buttonR1.pressed(drive_loop.watch(grab, "grab"))
+#     # -> logs "grab took 180 ms" because it would miss 17 deadlines if it
+#     #    ran inside the drive loop
+
+from vex import *
+
+# ============================================================================
+# PERIODIC TASK
+# ============================================================================
+
+class PeriodicTask:
+    """
+    Calls `callback()` every `period_ms`, on a fixed schedule.
+
+    Timing numbers (all in milliseconds) are kept as the task runs:
+        ticks, overruns, missed (deadlines skipped), last_ms, max_ms,
+        mean_ms(), max_late_ms (how late a tick started, worst case)
+    """
+
+    def __init__(self, callback, period_ms=10, name="task", log_size=8,
+                 on_overrun=None):
+        self.callback = callback
+        self.period_ms = period_ms
+        self.name = name
+        self.on_overrun = on_overrun  # function(name, took_ms), or None
+        self.timer = Timer()
+        self.running = False
+        self._thread = None
+        # Timing
+        self.ticks = 0
+        self.overruns = 0
+        self.missed = 0
+        self.last_ms = 0.0
+        self.max_ms = 0.0
+        self.total_ms = 0.0
+        self.max_late_ms = 0.0
+        # The most recent overruns, oldest first: (time_ms, name, took_ms)
+        self.log_size = log_size
+        self.log = []
+
+    # ---- running ------------------------------------------------------------
+
+    def run(self, duration_ms=None):
+        """
+        Run the schedule in this thread. Returns after `duration_ms`,
+        when stop() is called, or never (duration_ms=None).
+        """
+        self.running = True
+        start = self.timer.time(MSEC)
+        deadline = start
+        while self.running:
+            if duration_ms is not None and deadline - start >= duration_ms:
+                break
+            now = self.timer.time(MSEC)
+            late = now - deadline
+            if late > self.max_late_ms:
+                self.max_late_ms = late
+
+            self.callback()
+
+            finished = self.timer.time(MSEC)
+            took = finished - now
+            self._record(took)
+
+            deadline += self.period_ms
+            if finished > deadline:
+                # Missed at least one deadline: skip to the next one that is
+                # still ahead instead of running several ticks back-to-back.
+                behind = int((finished - deadline) // self.period_ms) + 1
+                self.missed += behind
+                deadline += behind * self.period_ms
+                self.report(self.name, took)
+            wait(deadline - finished, MSEC)
+        self.running = False
+
+    def start(self, duration_ms=None):
+        """Run the schedule in a background thread."""
+        if self._thread is None:
+            self._thread = Thread(self.run, (duration_ms,))
+
+    def stop(self):
+        """Stop after the current tick."""
+        self.running = False
+        if self._thread is not None:
+            self._thread.stop()
+            self._thread = None
+
+    # ---- timing -------------------------------------------------------------
+
+    def _record(self, took):
+        self.ticks += 1
+        self.last_ms = took
+        self.total_ms += took
+        if took > self.max_ms:
+            self.max_ms = took
+
+    def mean_ms(self):
+        """Average time one tick took."""
+        if self.ticks == 0:
+            return 0.0
+        return self.total_ms / self.ticks
+
+    def report(self, name, took_ms):
+        """Record an overrun: something took longer than one period."""
+        self.overruns += 1
+        self.log.append((self.timer.time(MSEC), name, took_ms))
+        if len(self.log) > self.log_size:
+            self.log.pop(0)
+        if self.on_overrun is not None:
+            self.on_overrun(name, took_ms)
+
+    def watch(self, callback, name=None):
+        """
+        Wrap a function (like a button callback) so that it is timed.
+
+        If it takes longer than one period, it is logged as an overrun: run
+        inside this loop, it would have made the loop miss a deadline.
+        Use the result in place of the function:
+            controller.buttonR1.pressed(drive_loop.watch(grab, "grab"))
+        """
+        if name is None:
+            name = getattr(callback, "__name__", "callback")
+
+        def timed(*args):
+            start = self.timer.time(MSEC)
+            result = callback(*args)
+            took = self.timer.time(MSEC) - start
+            if took > self.period_ms:
+                self.report(name, took)
+            return result
+
+        return timed
+
+    def summary(self):
+        """One line of timing numbers, short enough for the brain screen."""
+        return "%s %dms: mean %.1f max %.1f over %d" % (
+            self.name, self.period_ms, self.mean_ms(), self.max_ms, self.overruns)
@@ -0,0 +1,124 @@
+# PID Control
+# The classic feedback controller, plus a trapezoidal motion profile.
+#
+# A PID controller turns an ERROR (how far we are from where we want to be)
+# into a motor power:
+#   P (proportional) - push harder the further away we are
+#   I (integral)     - push harder the longer we have been off
+#   D (derivative)   - ease off when we are closing in fast (stops overshoot)
+#
+# A trapezoidal profile plans a smooth move: speed up, cruise, slow down.
+# Following the plan instead of jumping straight to full power lets the robot
+# move fast without overshooting the end.
+
+# ============================================================================
+# PID CONTROLLER
+# ============================================================================
+
+class PID:
+    """
+    Proportional-integral-derivative controller.
+
+    Example: pid = PID(2.0, 0.0, 0.1, output_limit=100)
+             power = pid.update(error, dt)
+    """
+
+    def __init__(self, kp, ki=0.0, kd=0.0, output_limit=None, integral_limit=None):
+        self.kp = kp
+        self.ki = ki
+        self.kd = kd
+        self.output_limit = output_limit
+        self.integral_limit = integral_limit
+        self.reset()
+
+    def reset(self):
+        """Forget the past (call before starting a new move)."""
+        self.integral = 0.0
+        self.last_error = None
+
+    def update(self, error, dt, feed_forward=0.0):
+        """
+        Return the output for this error. dt is the time since the last
+        update, in seconds. feed_forward is added to the output as-is.
+        """
+        if dt <= 0:
+            dt = 0.001
+        self.integral += error * dt
+        if self.integral_limit is not None:
+            self.integral = clamp(self.integral, -self.integral_limit, self.integral_limit)
+        if self.last_error is None:
+            derivative = 0.0
+        else:
+            derivative = (error - self.last_error) / dt
+        self.last_error = error
+
+        output = feed_forward + self.kp * error + self.ki * self.integral + self.kd * derivative
+        if self.output_limit is not None:
+            output = clamp(output, -self.output_limit, self.output_limit)
+        return output
+
+
+def clamp(value, low, high):
+    """Keep value between low and high."""
+    if value < low:
+        return low
+    if value > high:
+        return high
+    return value
+
+
+# ============================================================================
+# TRAPEZOIDAL MOTION PROFILE
+# ============================================================================
+
+class TrapezoidProfile:
+    """
+    Plan a move of `distance` that speeds up at `max_accel`, cruises at
+    `max_velocity`, then slows down at `max_accel` to stop exactly at the end.
+    Short moves never reach cruise speed, so the plan becomes a triangle.
+
+    Units are up to you (degrees and deg/s for turns, inches and in/s for drives).
+
+    Example: profile = TrapezoidProfile(90, 300, 1200)
+             position, velocity = profile.sample(0.25)
+    """
+
+    def __init__(self, distance, max_velocity, max_accel):
+        self.distance = distance
+        self.sign = 1 if distance >= 0 else -1
+        length = abs(distance)
+        max_velocity = abs(max_velocity)
+        max_accel = abs(max_accel)
+
+        accel_time = max_velocity / max_accel
+        accel_distance = 0.5 * max_accel * accel_time * accel_time
+        if 2 * accel_distance > length:
+            # Triangle: never reaches max_velocity
+            accel_time = (length / max_accel) ** 0.5
+            accel_distance = length / 2
+            max_velocity = max_accel * accel_time
+        self.peak_velocity = max_velocity
+        self.max_accel = max_accel
+        self.accel_time = accel_time
+        self.accel_distance = accel_distance
+        cruise_distance = length - 2 * accel_distance
+        self.cruise_time = cruise_distance / max_velocity if max_velocity > 0 else 0.0
+        self.duration = 2 * accel_time + self.cruise_time
+
+    def sample(self, t):
+        """Where the plan says we should be at time t: (position, velocity)."""
+        if t <= 0:
+            return 0.0, 0.0
+        if t >= self.duration:
+            return self.distance, 0.0
+        if t < self.accel_time:
+            velocity = self.max_accel * t
+            position = 0.5 * self.max_accel * t * t
+        elif t < self.accel_time + self.cruise_time:
+            velocity = self.peak_velocity
+            position = self.accel_distance + self.peak_velocity * (t - self.accel_time)
+        else:
+            left = self.duration - t
+            velocity = self.max_accel * left
+            position = abs(self.distance) - 0.5 * self.max_accel * left * left
+        return self.sign * position, self.sign * velocity
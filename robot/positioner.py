@@ -0,0 +1,199 @@
+# Mechanism Positions
+# Move a mechanism (like the grabber) to NAMED positions, measured from a
+# fixed point, and stop early when it is squeezing something.
+#
+# The old way:
+#     grabber_motor.spin_for(FORWARD, 90, DEGREES, 50, PERCENT)
+# turns 90 degrees from WHEREVER the grabber is. Press "grab" twice and it
+# tries to close 180 degrees; miss a "release" and every grab after that
+# starts in the wrong place. And it always waits for the whole 90 degrees,
+# even when it has already closed on a game object and is just pushing.
+#
+# A Positioner knows where the mechanism is:
+#   - home() drives slowly into the mechanism's end stop (the fully open
+#     position) and calls that 0 degrees. Do it once, in pre_autonomous.
+#   - move_to("closed") goes to the closed position, measured from there.
+#     Going to "closed" twice is the same as going once.
+#   - A STALL (the motor is barely turning but pulls a lot of current) means
+#     the mechanism is pushing on something. The move ends right there and
+#     the motor holds: the grab is done, no need to finish the stroke.
+#
+# Example:
+#     grabber_position = Positioner(grabber_motor, {"open": 5, "closed": 95})
+#     grabber_position.home(REVERSE)          # in pre_autonomous
+#     grabber_position.move_to("closed")      # -> "arrived" or "stalled"
+
+from vex import *
+from robot.pid import clamp
+
+# ============================================================================
+# POSITIONER
+# ============================================================================
+
+class Positioner:
+    """
+    Moves one mechanism motor to absolute positions (degrees from home).
+
+    Settings:
+        setpoints      {name: degrees}, e.g. {"open": 5, "closed": 95}
+        speed          top speed (percent)
+        kp             percent of speed per degree still to go
+        min_speed      slowest it moves before arriving (percent)
+        tolerance      close enough to a position (degrees)
+        stall_current  amps that count as pushing on something
+        stall_rpm      slower than this counts as not turning
+        stall_ms       how long it must be stalled before the move ends
+        spin_up_ms     stalls are ignored while the motor gets going
+
+    Results of the last move: result ("arrived", "stalled", "timeout" or
+    "cancelled") and took_ms.
+    """
+
+    def __init__(self, motor, setpoints, speed=50.0, kp=2.0, min_speed=10.0, tolerance=3.0,
+                 stall_current=1.5, stall_rpm=5.0, stall_ms=60, spin_up_ms=100,
+                 timeout_ms=1500, period_ms=10):
+        self.motor = motor
+        self.setpoints = dict(setpoints)
+        self.speed = speed
+        self.kp = kp
+        self.min_speed = min_speed
+        self.tolerance = tolerance
+        self.stall_current = stall_current
+        self.stall_rpm = stall_rpm
+        self.stall_ms = stall_ms
+        self.spin_up_ms = spin_up_ms
+        self.timeout_ms = timeout_ms
+        self.period_ms = period_ms
+        self.timer = Timer()
+        self.homed = False
+        self.target = None            # degrees we are moving to, or None
+        self.start_position = 0.0
+        self.result = None
+        self.took_ms = 0.0
+        self._stalled_since = None
+        self._sent = None             # last (direction, speed) sent to the motor
+
+    def position(self):
+        """Where the mechanism is (degrees from home)."""
+        return self.motor.position(DEGREES)
+
+    def degrees_of(self, setpoint):
+        """A setpoint name's position in degrees (numbers are used as they are)."""
+        if setpoint in self.setpoints:
+            return self.setpoints[setpoint]
+        return float(setpoint)
+
+    def at(self, setpoint):
+        """True if the mechanism is at `setpoint` now."""
+        return abs(self.degrees_of(setpoint) - self.position()) <= self.tolerance
+
+    # ---- one move, a tick at a time -------------------------------------------
+
+    def start(self, setpoint):
+        """Begin moving to `setpoint` (a name, or degrees). Call step() every tick."""
+        self.target = self.degrees_of(setpoint)
+        self.start_position = self.position()
+        self.result = None
+        self._stalled_since = None
+        self.timer.clear()
+
+    def step(self):
+        """One tick of the move. Returns True once it has finished."""
+        if self.target is None:
+            return True
+        elapsed = self.timer.time(MSEC)
+        error = self.target - self.position()
+        if abs(error) <= self.tolerance:
+            return self._finish("arrived", elapsed)
+        if self._stall(elapsed):
+            return self._finish("stalled", elapsed)
+        if elapsed >= self.timeout_ms:
+            return self._finish("timeout", elapsed)
+        # Whole percents, and only when it changes: one command per change
+        command = (FORWARD if error > 0 else REVERSE,
+                   int(clamp(self.kp * abs(error), self.min_speed, self.speed)))
+        if command != self._sent:
+            self.motor.spin(command[0], command[1], PERCENT)
+            self._sent = command
+        return False
+
+    def progress(self):
+        """How much of the move is done, from 0.0 to 1.0."""
+        if self.target is None:
+            return 1.0
+        distance = abs(self.target - self.start_position)
+        if distance == 0:
+            return 1.0
+        return clamp(abs(self.position() - self.start_position) / distance, 0.0, 0.99)
+
+    def stop(self, result="cancelled"):
+        """Stop where it is and hold."""
+        if self.target is not None:
+            self._finish(result, self.timer.time(MSEC))
+        else:
+            self.motor.stop(HOLD)
+            self._sent = None
+
+    def _stall(self, elapsed):
+        """True once the motor has been stalled for stall_ms."""
+        if elapsed < self.spin_up_ms:
+            return False
+        if abs(self.motor.velocity(RPM)) >= self.stall_rpm or \
+                self.motor.current() < self.stall_current:
+            self._stalled_since = None
+            return False
+        if self._stalled_since is None:
+            self._stalled_since = elapsed
+        return elapsed - self._stalled_since >= self.stall_ms
+
+    def _finish(self, result, elapsed):
+        self.motor.stop(HOLD)
+        self._sent = None
+        self.target = None
+        self.result = result
+        self.took_ms = elapsed
+        return True
+
+    # ---- whole moves ----------------------------------------------------------
+
+    def move_to(self, setpoint, worker=None):
+        """
+        Move to `setpoint` and wait. With a MechanismWorker (robot/mechanism.py)
+        the move stops early if the worker's action is cancelled.
+        Returns the result: "arrived", "stalled" or "timeout".
+        """
+        self.start(setpoint)
+        try:
+            while not self.step():
+                if worker is not None:
+                    worker.wait(self.period_ms)
+                else:
+                    wait(self.period_ms, MSEC)
+        except Exception:
+            self.stop()        # cancelled (or something broke): do not keep pushing
+            raise
+        return self.result
+
+    def home(self, direction=REVERSE, speed=20.0, position=0.0, timeout_ms=3000):
+        """
+        Drive slowly in `direction` until the mechanism stalls against its
+        end stop, and call that spot `position` degrees.
+        Returns False if no end stop was found before the timeout.
+        """
+        self.target = None
+        self._stalled_since = None
+        self.timer.clear()
+        self.motor.spin(direction, speed, PERCENT)
+        while True:
+            elapsed = self.timer.time(MSEC)
+            if self._stall(elapsed):
+                break
+            if elapsed >= timeout_ms:
+                self.stop()
+                return False
+            wait(self.period_ms, MSEC)
+        self.stop()
+        self.motor.set_position(position, DEGREES)
+        self.homed = True
+        self.took_ms = self.timer.time(MSEC)
+        return True
@@ -0,0 +1,178 @@
+# Profiler
+# Find out where the time goes inside one tick of the control loop.
+#
+# A PeriodicTask (robot/periodic.py) tells you THAT a tick was slow. The
+# profiler tells you WHICH PART was slow: reading the controller, shaping the
+# sticks, the spin() calls, the screen, or a button callback.
+#
+# Each timed part gets a slot in a fixed-size table: how many times it ran,
+# and the shortest, average and longest time it took (in microseconds). The
+# table is made once; timing a call only adds to numbers already in it.
+#
+# Two ways to time something:
+#     @profiler.timed("grab")            # a whole function
+#     def grab():
+#         ...
+#
+#     read_section = profiler.section("read")    # part of a function
+#     ...
+#     with read_section:
+#         forward = controller.axis3.position()
+#
+# Turned off (enabled=False), timed() hands back the function unchanged and
+# section() a "with" block that does nothing, so profiling costs nothing.
+#
+# Example:
+#     profiler = Profiler(enabled=True)
+#     ...
+#     profiler.show(brain.screen)                     # slowest parts first
+#     profiler.save(brain.sdcard, "profile.txt")
+
+from vex import *
+
+# ============================================================================
+# SECTIONS
+# ============================================================================
+
+class _Section:
+    """A `with` block that times itself into one slot of the profiler."""
+
+    def __init__(self, profiler, slot):
+        self._profiler = profiler
+        self._slot = slot
+        self._clock = profiler.timer.system_high_res
+        self._start = 0
+
+    def __enter__(self):
+        self._start = self._clock()
+        return self
+
+    def __exit__(self, exc_type, exc, traceback):
+        self._profiler.record(self._slot, self._clock() - self._start)
+        return False
+
+
+class _NoSection:
+    """A `with` block that does nothing (profiling turned off)."""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, traceback):
+        return False
+
+
+_NO_SECTION = _NoSection()
+
+# ============================================================================
+# PROFILER
+# ============================================================================
+
+class Profiler:
+    """
+    Call counts and min / mean / max time for up to `slots` named parts.
+    Times are in microseconds.
+    """
+
+    def __init__(self, slots=16, enabled=True):
+        self.enabled = enabled
+        self.slots = slots
+        self.timer = Timer()
+        self.names = []
+        self._sections = {}
+        self.counts = [0] * slots
+        self.total_us = [0] * slots
+        self.min_us = [0] * slots
+        self.max_us = [0] * slots
+
+    def _slot(self, name):
+        """The slot for a name (new names take the next free one)."""
+        if name in self.names:
+            return self.names.index(name)
+        if len(self.names) >= self.slots:
+            raise ValueError("profiler is full (%d slots): %s" % (self.slots, name))
+        self.names.append(name)
+        return len(self.names) - 1
+
+    # ---- timing ---------------------------------------------------------------
+
+    def record(self, slot, took_us):
+        """Add one call that took `took_us` microseconds."""
+        count = self.counts[slot]
+        if count == 0 or took_us < self.min_us[slot]:
+            self.min_us[slot] = took_us
+        if took_us > self.max_us[slot]:
+            self.max_us[slot] = took_us
+        self.counts[slot] = count + 1
+        self.total_us[slot] += took_us
+
+    def timed(self, name):
+        """Decorator: time every call of a function."""
+        def decorate(function):
+            if not self.enabled:
+                return function
+            slot = self._slot(name)
+            clock = self.timer.system_high_res
+            record = self.record
+
+            def timed_function(*args):
+                start = clock()
+                try:
+                    return function(*args)
+                finally:
+                    record(slot, clock() - start)
+            return timed_function
+        return decorate
+
+    def section(self, name):
+        """
+        A `with` block that times its contents. Get it once, outside the
+        loop, and reuse it. (Do not nest a section inside itself.)
+        """
+        if not self.enabled:
+            return _NO_SECTION
+        if name not in self._sections:
+            self._sections[name] = _Section(self, self._slot(name))
+        return self._sections[name]
+
+    def reset(self):
+        """Clear the numbers (the names keep their slots)."""
+        for slot in range(self.slots):
+            self.counts[slot] = 0
+            self.total_us[slot] = 0
+            self.min_us[slot] = 0
+            self.max_us[slot] = 0
+
+    # ---- results --------------------------------------------------------------
+
+    def mean_us(self, slot):
+        count = self.counts[slot]
+        return self.total_us[slot] / count if count else 0.0
+
+    def summary(self):
+        """One line per timed part, the most total time first (times in ms)."""
+        order = sorted(range(len(self.names)), key=lambda slot: -self.total_us[slot])
+        lines = []
+        for slot in order:
+            lines.append("%s x%d: %.2f/%.2f/%.2f ms" % (
+                self.names[slot], self.counts[slot], self.min_us[slot] / 1000.0,
+                self.mean_us(slot) / 1000.0, self.max_us[slot] / 1000.0))
+        return lines
+
+    def show(self, screen, rows=12):
+        """Print the summary (min/mean/max) on the brain screen."""
+        screen.clear_screen()
+        screen.set_cursor(1, 1)
+        screen.print("profile min/mean/max")
+        for line in self.summary()[:rows - 1]:
+            screen.new_line()
+            screen.print(line)
+
+    def save(self, sdcard, filename):
+        """Write the summary to the SD card."""
+        text = "name calls min_ms mean_ms max_ms\n"
+        for slot in range(len(self.names)):
+            text += "%s %d %.3f %.3f %.3f\n" % (
+                self.names[slot], self.counts[slot], self.min_us[slot] / 1000.0,
+                self.mean_us(slot) / 1000.0, self.max_us[slot] / 1000.0)
+        sdcard.savefile(filename, bytearray(text.encode()))
@@ -0,0 +1,248 @@
+# Pure Pursuit
+# Follow a smooth, curved path without stopping to turn.
+#
+# With only drive-straight and turn-in-place, every route is a zig-zag: drive,
+# stop, turn, drive, stop, turn... Each stop costs time.
+#
+# Pure pursuit works like following a car ahead of you. The path is a line of
+# points on the field. Every 10 ms the robot:
+#   1. Finds the point on the path closest to where it is (from odometry)
+#   2. Looks a set distance further along the path - the LOOKAHEAD point
+#   3. Drives along the circular arc that reaches the lookahead point. Turning
+#      is done by making one side faster than the other, so it never stops.
+# A longer lookahead is smoother but cuts corners more; a shorter one follows
+# the path more tightly but can wobble.
+#
+# Speed is planned along the path ahead of time: slower on tight bends, and
+# slowing down smoothly to stop at the end.
+#
+# Field coordinates are the same as robot/odometry.py: x = inches right,
+# y = inches forward, heading = degrees clockwise.
+#
+# Example:
+#     path = Path([(0, 0), (0, 24), (24, 48)])        # a smooth curve through these
+#     pursuit = PurePursuit(odometry, left_motors, right_motors, WHEEL_CIRCUMFERENCE)
+#     pursuit.follow(path)
+
+import math
+
+from vex import *
+from robot.pid import clamp
+
+# ============================================================================
+# PATH
+# ============================================================================
+
+def catmull_rom(p0, p1, p2, p3, t):
+    """A point on the smooth curve between p1 and p2 (t from 0 to 1)."""
+    t2 = t * t
+    t3 = t2 * t
+    return tuple(
+        0.5 * (2 * b + (c - a) * t + (2 * a - 5 * b + 4 * c - d) * t2
+               + (3 * b - a - 3 * c + d) * t3)
+        for a, b, c, d in zip(p0, p1, p2, p3))
+
+
+class Path:
+    """
+    A smooth curve through waypoints, stored as points about `spacing`
+    inches apart, each with a planned speed (inches per second).
+
+    max_speed     fastest speed on a straight stretch
+    turn_factor   how much to slow down on bends: speed <= turn_factor / curvature
+                  (curvature = 1 / radius of the bend, in 1/inches)
+    max_accel     how quickly to slow down toward the end (inches/s/s)
+    """
+
+    def __init__(self, waypoints, spacing=1.0, max_speed=36.0, turn_factor=3.0,
+                 max_accel=60.0, end_speed=4.0):
+        self.waypoints = [tuple(point) for point in waypoints]
+        self.points = self._smooth(self.waypoints, spacing)
+        self.curvature = [self._curvature(i) for i in range(len(self.points))]
+        self.speeds = self._plan_speeds(max_speed, turn_factor, max_accel, end_speed)
+
+    @staticmethod
+    def _smooth(waypoints, spacing):
+        if len(waypoints) < 2:
+            return list(waypoints)
+        # Repeat the ends so the curve goes through the first and last waypoints
+        padded = [waypoints[0]] + waypoints + [waypoints[-1]]
+        points = []
+        for i in range(1, len(padded) - 2):
+            p0, p1, p2, p3 = padded[i - 1], padded[i], padded[i + 1], padded[i + 2]
+            steps = max(1, int(math.ceil(math.hypot(p2[0] - p1[0], p2[1] - p1[1]) / spacing)))
+            for step in range(steps):
+                points.append(catmull_rom(p0, p1, p2, p3, step / steps))
+        points.append(waypoints[-1])
+        return points
+
+    def _curvature(self, i):
+        """1 / radius of the circle through this point and its neighbors."""
+        if i == 0 or i == len(self.points) - 1:
+            return 0.0
+        (x1, y1), (x2, y2), (x3, y3) = self.points[i - 1], self.points[i], self.points[i + 1]
+        a = math.hypot(x2 - x1, y2 - y1)
+        b = math.hypot(x3 - x2, y3 - y2)
+        c = math.hypot(x3 - x1, y3 - y1)
+        area2 = abs((x2 - x1) * (y3 - y1) - (y2 - y1) * (x3 - x1))
+        if a * b * c == 0:
+            return 0.0
+        return 2 * area2 / (a * b * c)
+
+    def _plan_speeds(self, max_speed, turn_factor, max_accel, end_speed):
+        speeds = []
+        for curvature in self.curvature:
+            if curvature > 0:
+                speeds.append(min(max_speed, turn_factor / curvature))
+            else:
+                speeds.append(max_speed)
+        if not speeds:
+            return speeds
+        # Working back from the end, never ask to slow down faster than max_accel
+        speeds[-1] = end_speed
+        for i in range(len(speeds) - 2, -1, -1):
+            gap = self.distance(i, i + 1)
+            reachable = math.sqrt(speeds[i + 1] ** 2 + 2 * max_accel * gap)
+            speeds[i] = min(speeds[i], reachable)
+        return speeds
+
+    def distance(self, i, j):
+        (x1, y1), (x2, y2) = self.points[i], self.points[j]
+        return math.hypot(x2 - x1, y2 - y1)
+
+    def length(self):
+        total = 0.0
+        for i in range(len(self.points) - 1):
+            total += self.distance(i, i + 1)
+        return total
+
+
+# ============================================================================
+# FOLLOWER
+# ============================================================================
+
+class PurePursuit:
+    """
+    Follows a Path using the odometry pose.
+
+    Settings:
+        lookahead     inches ahead along the path to aim at
+        track_width   inches between the left and right wheels
+        max_accel     how quickly to speed up (inches/s/s)
+        tolerance     finished within this many inches of the end
+        timeout_ms    give up after this long
+    """
+
+    def __init__(self, odometry, left_motors, right_motors, wheel_circumference,
+                 lookahead=12.0, track_width=12.0, gear_ratio=1.0, max_accel=60.0,
+                 tolerance=1.0, timeout_ms=10000, max_rpm=200.0, period_ms=10):
+        self.odometry = odometry
+        self.left_motors = list(left_motors)
+        self.right_motors = list(right_motors)
+        self.rpm_per_ips = 60.0 / (wheel_circumference * gear_ratio)
+        self.lookahead = lookahead
+        self.track_width = track_width
+        self.max_accel = max_accel
+        self.tolerance = tolerance
+        self.timeout_ms = timeout_ms
+        self.max_rpm = max_rpm
+        self.period_ms = period_ms
+        self.timer = Timer()
+
+    def follow(self, path, reverse=False):
+        """
+        Drive along the path (blocks until the end). With reverse=True the
+        robot backs along it. Returns the distance from the end, in inches.
+        """
+        odometry = self.odometry
+        points = path.points
+        last = len(points) - 1
+        closest = 0
+        speed = 0.0
+        self.timer.clear()
+        while True:
+            odometry.update()
+            x, y, heading = odometry.pose()
+            if reverse:
+                heading = (heading + 180) % 360
+
+            closest = self._closest(points, closest, x, y)
+            end_distance = math.hypot(points[last][0] - x, points[last][1] - y)
+            if (closest >= last - 1 and end_distance <= self.tolerance) \
+                    or self.timer.time(MSEC) >= self.timeout_ms:
+                break
+            # Past the end of the path: stop instead of circling back
+            if closest == last and self._behind(points[last], x, y, heading):
+                break
+
+            target = self._lookahead_point(points, closest, x, y)
+            curvature = self._curvature_to(target, x, y, heading)
+
+            wanted = path.speeds[closest]
+            speed = min(wanted, speed + self.max_accel * self.period_ms / 1000.0)
+            left = speed * (1 + curvature * self.track_width / 2)
+            right = speed * (1 - curvature * self.track_width / 2)
+            if reverse:
+                left, right = -right, -left
+            self._drive(left, right)
+            wait(self.period_ms, MSEC)
+
+        self.stop()
+        return math.hypot(points[last][0] - odometry.x, points[last][1] - odometry.y)
+
+    @staticmethod
+    def _closest(points, start, x, y):
+        """The closest path point, searching forward only (never go back)."""
+        best = start
+        best_distance = math.hypot(points[start][0] - x, points[start][1] - y)
+        for i in range(start + 1, min(len(points), start + 50)):
+            distance = math.hypot(points[i][0] - x, points[i][1] - y)
+            if distance < best_distance:
+                best = i
+                best_distance = distance
+        return best
+
+    def _lookahead_point(self, points, closest, x, y):
+        """The first point at least `lookahead` away, past the closest point."""
+        for i in range(closest, len(points)):
+            if math.hypot(points[i][0] - x, points[i][1] - y) >= self.lookahead:
+                return points[i]
+        # Near the end: aim past the last point along the path's final direction
+        x2, y2 = points[-1]
+        if len(points) < 2:
+            return (x2, y2)
+        x1, y1 = points[-2]
+        length = math.hypot(x2 - x1, y2 - y1) or 1.0
+        return (x2 + (x2 - x1) / length * self.lookahead,
+                y2 + (y2 - y1) / length * self.lookahead)
+
+    @staticmethod
+    def _curvature_to(target, x, y, heading):
+        """Curvature (1/inches, + = right) of the arc from the robot to target."""
+        radians = math.radians(heading)
+        dx = target[0] - x
+        dy = target[1] - y
+        # Sideways distance to the target, seen from the robot (+ = right)
+        side = dx * math.cos(radians) - dy * math.sin(radians)
+        distance_squared = dx * dx + dy * dy
+        if distance_squared == 0:
+            return 0.0
+        return 2 * side / distance_squared
+
+    @staticmethod
+    def _behind(point, x, y, heading):
+        radians = math.radians(heading)
+        ahead = (point[0] - x) * math.sin(radians) + (point[1] - y) * math.cos(radians)
+        return ahead < 0
+
+    def _drive(self, left_ips, right_ips):
+        left_rpm = clamp(left_ips * self.rpm_per_ips, -self.max_rpm, self.max_rpm)
+        right_rpm = clamp(right_ips * self.rpm_per_ips, -self.max_rpm, self.max_rpm)
+        for motor in self.left_motors:
+            motor.spin(FORWARD, left_rpm, RPM)
+        for motor in self.right_motors:
+            motor.spin(FORWARD, right_rpm, RPM)
+
+    def stop(self):
+        for motor in self.left_motors + self.right_motors:
+            motor.stop(BRAKE)
@@ -0,0 +1,205 @@
+# Record and Replay Driver Control
+# Save exactly what the driver did with the controller, then play it back.
+#
+# A driver-control run can never be repeated by hand: the sticks are never in
+# exactly the same place at exactly the same time. To compare two versions of
+# the drive code fairly, record the controller once, then feed the SAME inputs
+# through the drive code again - on the robot, or in the simulator.
+#
+# InputRecorder checks the controller every tick and writes down only what
+# CHANGED, as lines of "time_ms name value" text:
+#     0 axis3 0
+#     1250 axis3 64
+#     1260 axis4 -12
+#     3400 buttonR1 1
+#
+# ReplayController plays a recording back. It looks like a Controller
+# (axis3.position(), buttonR1.pressed(...)), so the drive code does not know
+# the difference. The simulator reads the same files:
+#     python sim/run.py main-09.py --call driver_control --input driver.txt
+#
+# Example:
+#     recorder = InputRecorder(controller, brain.sdcard, "driver.txt")
+#     recorder.start()
+#     ... every tick: recorder.sample()
+#
+#     replay = ReplayController(load_events(brain.sdcard, "driver.txt"))
+#     replay.start()
+#     ... every tick: replay.update(), then read replay.axis3.position()
+
+from vex import *
+
+# Inputs used by the drive code (record more by passing names=...)
+DEFAULT_NAMES = ("axis3", "axis4", "buttonR1", "buttonR2")
+
+# ============================================================================
+# RECORDING
+# ============================================================================
+
+def format_events(events):
+    """Turn (time_ms, name, value) events into lines of text."""
+    lines = []
+    for time_ms, name, value in events:
+        lines.append("%d %s %d\n" % (time_ms, name, value))
+    return "".join(lines)
+
+
+def parse_events(text):
+    """Turn lines of "time_ms name value" back into (time_ms, name, value)."""
+    events = []
+    for line in text.split("\n"):
+        parts = line.split()
+        if len(parts) == 3:
+            events.append((int(parts[0]), parts[1], int(parts[2])))
+    return events
+
+
+def load_events(sdcard, filename):
+    """Read a recording from the SD card."""
+    return parse_events(bytes(sdcard.loadfile(filename)).decode())
+
+
+class InputRecorder:
+    """
+    Writes down every change of the controller's sticks and buttons, and
+    saves them to the SD card in the background.
+    """
+
+    def __init__(self, controller, sdcard, filename, names=DEFAULT_NAMES,
+                 save_ms=1000):
+        self.controller = controller
+        self.sdcard = sdcard
+        self.filename = filename
+        self.save_ms = save_ms
+        self.inputs = []
+        for name in names:
+            item = getattr(controller, name)
+            if name.startswith("axis"):
+                self.inputs.append((name, item.position))
+            else:
+                self.inputs.append((name, item.pressing))
+        self.timer = Timer()
+        self.events = []              # everything recorded so far
+        self._last = {}
+        self._saved = 0               # events already on the card
+        self._thread = None
+
+    def start(self):
+        """Start a new recording (clears the file)."""
+        self.events = []
+        self._last = {}
+        self._saved = 0
+        self.timer.clear()
+        self.sdcard.savefile(self.filename, bytearray())
+        if self._thread is None:
+            self._thread = Thread(self._save_loop)
+
+    def sample(self):
+        """Read the inputs once and write down the ones that changed."""
+        now = int(self.timer.time(MSEC))
+        for name, read in self.inputs:
+            value = int(read())
+            if self._last.get(name) != value:
+                self._last[name] = value
+                self.events.append((now, name, value))
+
+    def save(self):
+        """Append events that are not on the card yet."""
+        if self._saved < len(self.events):
+            text = format_events(self.events[self._saved:])
+            self.sdcard.appendfile(self.filename, bytearray(text.encode()))
+            self._saved = len(self.events)
+
+    def _save_loop(self):
+        while True:
+            wait(self.save_ms, MSEC)
+            self.save()
+
+    def stop(self):
+        if self._thread is not None:
+            self._thread.stop()
+            self._thread = None
+        self.save()
+
+
+# ============================================================================
+# REPLAY
+# ============================================================================
+
+class _ReplayAxis:
+    def __init__(self):
+        self._value = 0
+
+    def position(self):
+        return self._value
+
+    def value(self):
+        return self._value
+
+
+class _ReplayButton:
+    def __init__(self):
+        self._down = False
+        self._pressed = []
+        self._released = []
+
+    def pressing(self):
+        return self._down
+
+    def pressed(self, callback, args=()):
+        self._pressed.append((callback, tuple(args)))
+
+    def released(self, callback, args=()):
+        self._released.append((callback, tuple(args)))
+
+
+class ReplayController:
+    """
+    Plays back a recording, looking like a Controller.
+
+    Call update() at the start of every tick: it applies every event whose
+    time has come. Button callbacks run in a new thread, like on the brain.
+    """
+
+    AXES = ("axis1", "axis2", "axis3", "axis4")
+    BUTTONS = ("buttonL1", "buttonL2", "buttonR1", "buttonR2", "buttonUp",
+               "buttonDown", "buttonLeft", "buttonRight", "buttonX", "buttonB",
+               "buttonY", "buttonA")
+
+    def __init__(self, events):
+        for name in self.AXES:
+            setattr(self, name, _ReplayAxis())
+        for name in self.BUTTONS:
+            setattr(self, name, _ReplayButton())
+        self.events = sorted(events, key=lambda event: event[0])
+        self.timer = Timer()
+        self._next = 0
+
+    def start(self):
+        """Start playing from the beginning."""
+        self._next = 0
+        self.timer.clear()
+
+    def update(self):
+        """Apply every event that is due."""
+        now = self.timer.time(MSEC)
+        while self._next < len(self.events) and self.events[self._next][0] <= now:
+            _, name, value = self.events[self._next]
+            self._next += 1
+            self._apply(name, value)
+
+    def _apply(self, name, value):
+        item = getattr(self, name)
+        if isinstance(item, _ReplayAxis):
+            item._value = value
+            return
+        down = bool(value)
+        if down == item._down:
+            return
+        item._down = down
+        for callback, args in (item._pressed if down else item._released):
+            Thread(callback, args)
+
+    def done(self):
+        """True when every event has been played."""
+        return self._next >= len(self.events)
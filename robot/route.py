@@ -0,0 +1,348 @@
+# Compiled Routes
+# Plan a whole autonomous route BEFORE the match, then just play it back.
+#
+# A route is a list of steps: drive, turn, and actions (like "start the grab
+# when this drive is 80% done"). compile() turns it into a table with one row
+# per 10 ms tick: where each side of the drive should be and how fast it
+# should be going, and which heading the robot should face. All the planning
+# (trig, speed limits) happens here, once - in pre_autonomous() for example.
+#
+# The speed plan for each move respects three limits:
+#   max_velocity  top wheel speed (inches per second)
+#   max_accel     how quickly the speed may change (inches per second per second)
+#   max_jerk      how quickly the ACCELERATION may change. Limiting jerk rounds
+#                 off the corners of the speed plan, so the robot does not
+#                 lurch at the start and end of a move (an "S-curve").
+# Steps follow each other with no pause: the next move starts on the tick
+# after the last one ends.
+#
+# A RouteFollower plays the table back. Each tick it sets each side's speed
+# from the table ("feed-forward") and adds small corrections for the distance
+# and heading errors it measures.
+#
+# Example:
+#     route = Route(max_velocity=40, max_accel=80, max_jerk=400, track_width=12)
+#     route.drive(24)
+#     route.action(start_grab, at=0.8)        # start grabbing at 80% of the drive
+#     route.wait_until(grab_done)             # hold still until it has closed
+#     route.turn_to(180)
+#     route.drive(36)
+#     plan = route.compile()                  # before the match
+#
+#     follower = RouteFollower(left_motors, right_motors, inertial_sensor, WHEEL_CIRCUMFERENCE)
+#     follower.run(plan)                      # during autonomous
+
+import math
+
+from vex import *
+from robot.pid import TrapezoidProfile, clamp
+from robot.periodic import PeriodicTask
+from robot.turning import angle_difference
+
+# ============================================================================
+# SPEED PLANS
+# ============================================================================
+
+def s_curve(distance, max_velocity, max_accel, max_jerk, period_ms=10):
+    """
+    Plan a move of `distance` as a list of speeds, one per tick, that starts
+    and ends at rest.
+
+    The trapezoid plan (speed up, cruise, slow down) is smoothed with a moving
+    average as long as it takes to reach full acceleration at max_jerk. That
+    keeps the jerk within the limit and the distance the same; the move gets
+    max_accel / max_jerk seconds longer.
+    """
+    if distance == 0:
+        return []
+    dt = period_ms / 1000.0
+    profile = TrapezoidProfile(distance, max_velocity, max_accel)
+    ticks = int(math.ceil(profile.duration / dt))
+    speeds = [profile.sample((i + 1) * dt)[1] for i in range(ticks)]
+
+    window = max(1, int(round(max_accel / max_jerk / dt))) if max_jerk else 1
+    if window > 1:
+        speeds = speeds + [0.0] * (window - 1)
+        smoothed = []
+        total = 0.0
+        for i, speed in enumerate(speeds):
+            total += speed
+            if i >= window:
+                total -= speeds[i - window]
+            smoothed.append(total / window)
+        speeds = smoothed
+
+    # Sampling the plan tick by tick is slightly off; scale so it adds up
+    travelled = sum(speeds) * dt
+    if travelled != 0:
+        scale = distance / travelled
+        speeds = [speed * scale for speed in speeds]
+    return speeds
+
+
+# ============================================================================
+# ROUTE
+# ============================================================================
+
+class Route:
+    """
+    A list of steps, planned from a starting pose (x, y in inches, heading in
+    degrees clockwise, like robot/odometry.py).
+    """
+
+    def __init__(self, start=(0.0, 0.0, 0.0), max_velocity=40.0, max_accel=80.0,
+                 max_jerk=400.0, track_width=12.0, turn_velocity=None):
+        self.x, self.y, self.heading = start
+        self.start_heading = self.heading
+        self.max_velocity = max_velocity
+        self.max_accel = max_accel
+        self.max_jerk = max_jerk
+        self.track_width = track_width
+        # Wheel speed during turns (a turn is short, so it rarely matters)
+        self.turn_velocity = max_velocity if turn_velocity is None else turn_velocity
+        self.steps = []
+
+    # ---- moves --------------------------------------------------------------
+
+    def drive(self, inches, max_velocity=None):
+        """Drive straight (negative = backward)."""
+        speed = self.max_velocity if max_velocity is None else max_velocity
+        self.steps.append(("drive", inches, speed))
+        radians = math.radians(self.heading)
+        self.x += inches * math.sin(radians)
+        self.y += inches * math.cos(radians)
+
+    def turn(self, angle, max_velocity=None):
+        """Turn in place (degrees, positive = right)."""
+        speed = self.turn_velocity if max_velocity is None else max_velocity
+        self.steps.append(("turn", angle, speed))
+        self.heading = (self.heading + angle) % 360
+
+    def turn_to(self, heading, max_velocity=None):
+        """Turn the shortest way to face an absolute heading."""
+        self.turn(angle_difference(heading, self.heading), max_velocity)
+
+    def drive_to(self, x, y, max_velocity=None):
+        """Turn toward (x, y), then drive to it."""
+        distance = math.hypot(x - self.x, y - self.y)
+        if distance == 0:
+            return
+        bearing = math.degrees(math.atan2(x - self.x, y - self.y)) % 360
+        if abs(angle_difference(bearing, self.heading)) > 0.5:
+            self.turn_to(bearing)
+        self.drive(distance, max_velocity)
+
+    # ---- actions ------------------------------------------------------------
+
+    def action(self, callback, args=(), at=1.0):
+        """
+        Run callback(*args) when the previous move is `at` done (0.8 = 80%).
+        It must return right away (start the motor with wait=False).
+        """
+        self.steps.append(("action", (callback, tuple(args)), at))
+
+    def wait_until(self, condition, timeout_ms=2000):
+        """Hold still until condition() is True (or the timeout runs out)."""
+        self.steps.append(("wait", condition, timeout_ms))
+
+    def pause(self, duration_ms):
+        """Hold still for a while."""
+        self.steps.append(("pause", duration_ms, None))
+
+    # ---- compiling ----------------------------------------------------------
+
+    def compile(self, period_ms=10):
+        """Plan every step. Returns a CompiledRoute."""
+        plan = CompiledRoute(period_ms, self.start_heading)
+        heading = self.start_heading
+        left = 0.0
+        right = 0.0
+        last_move = None            # (first tick, tick count) of the last move
+        per_degree = math.pi * self.track_width / 360.0
+
+        for kind, value, option in self.steps:
+            if kind in ("drive", "turn"):
+                if kind == "drive":
+                    speeds = s_curve(value, option, self.max_accel, self.max_jerk, period_ms)
+                    signs = (1.0, 1.0)
+                else:
+                    speeds = s_curve(value * per_degree, option, self.max_accel,
+                                     self.max_jerk, period_ms)
+                    signs = (1.0, -1.0)
+                first = len(plan.left_position)
+                dt = period_ms / 1000.0
+                for speed in speeds:
+                    left += signs[0] * speed * dt
+                    right += signs[1] * speed * dt
+                    if kind == "turn":
+                        heading += speed * dt / per_degree
+                    plan.add_tick(left, right, signs[0] * speed, signs[1] * speed, heading)
+                last_move = (first, len(speeds))
+            elif kind == "action":
+                if last_move is None:
+                    # Right after a wait or pause (or at the very start)
+                    tick = len(plan.left_position)
+                else:
+                    first, count = last_move
+                    tick = first + max(0, int(math.ceil(option * count)) - 1)
+                plan.add_event(tick, "call", value)
+            elif kind == "wait":
+                plan.add_event(len(plan.left_position), "wait", (value, option))
+                last_move = None
+            elif kind == "pause":
+                for _ in range(int(value // period_ms)):
+                    plan.add_tick(left, right, 0.0, 0.0, heading)
+                last_move = None
+        return plan
+
+
+class CompiledRoute:
+    """
+    The planned route: one entry per tick in each list (inches, inches per
+    second, degrees), plus events (tick -> list of (kind, payload)).
+    """
+
+    def __init__(self, period_ms, start_heading=0.0):
+        self.period_ms = period_ms
+        self.start_heading = start_heading
+        self.left_position = []
+        self.right_position = []
+        self.left_velocity = []
+        self.right_velocity = []
+        self.heading = []
+        self.events = {}
+
+    def add_tick(self, left, right, left_velocity, right_velocity, heading):
+        self.left_position.append(left)
+        self.right_position.append(right)
+        self.left_velocity.append(left_velocity)
+        self.right_velocity.append(right_velocity)
+        self.heading.append(heading)
+
+    def add_event(self, tick, kind, payload):
+        self.events.setdefault(tick, []).append((kind, payload))
+
+    def ticks(self):
+        return len(self.left_position)
+
+    def duration_ms(self):
+        """Planned time, not counting waits."""
+        return self.ticks() * self.period_ms
+
+
+# ============================================================================
+# FOLLOWER
+# ============================================================================
+
+class RouteFollower:
+    """
+    Plays back a CompiledRoute.
+
+    Settings:
+        kp            extra inches per second per inch behind the plan (each side)
+        heading_kp    extra inches per second per degree off the planned heading
+    """
+
+    def __init__(self, left_motors, right_motors, inertial, wheel_circumference,
+                 gear_ratio=1.0, kp=10.0, heading_kp=0.6, max_rpm=200.0):
+        self.left_motors = list(left_motors)
+        self.right_motors = list(right_motors)
+        self.inertial = inertial
+        self.inches_per_degree = wheel_circumference * gear_ratio / 360.0
+        # Motor RPM for one inch per second of wheel speed
+        self.rpm_per_ips = 60.0 / (wheel_circumference * gear_ratio)
+        self.kp = kp
+        self.heading_kp = heading_kp
+        self.max_rpm = max_rpm
+        self.timer = Timer()
+        self.plan = None
+        self.waits_ms = 0.0
+
+    def _side_position(self, motors):
+        total = 0.0
+        for motor in motors:
+            total += motor.position(DEGREES)
+        return total / len(motors) * self.inches_per_degree
+
+    def run(self, plan):
+        """Follow the plan from start to end (blocks). Returns the run time in ms."""
+        self.plan = plan
+        self._tick = 0
+        self._fired = -1              # last tick whose events have all run
+        self._event = 0               # next event to run on this tick
+        self._waiting = None
+        self._left_start = self._side_position(self.left_motors)
+        self._right_start = self._side_position(self.right_motors)
+        self._rotation_start = self.inertial.rotation() - plan.start_heading
+        self.waits_ms = 0.0
+        self.timer.clear()
+        self._task = PeriodicTask(self.step, plan.period_ms, "route")
+        self._task.run()
+        self.stop()
+        return self.timer.time(MSEC)
+
+    def step(self):
+        """One tick: fire due events, then steer both sides toward the plan."""
+        plan = self.plan
+        if self._tick >= plan.ticks() and self._fired >= self._tick:
+            self._task.running = False
+            return
+        if self._fired < self._tick:
+            if not self._run_events(self._tick):
+                self._hold()
+                return
+            self._fired = self._tick
+            self._event = 0
+        if self._tick >= plan.ticks():
+            self._task.running = False
+            return
+
+        i = self._tick
+        left = self._side_position(self.left_motors) - self._left_start
+        right = self._side_position(self.right_motors) - self._right_start
+        heading_error = plan.heading[i] - (self.inertial.rotation() - self._rotation_start)
+
+        left_speed = plan.left_velocity[i] + self.kp * (plan.left_position[i] - left) \
+            + self.heading_kp * heading_error
+        right_speed = plan.right_velocity[i] + self.kp * (plan.right_position[i] - right) \
+            - self.heading_kp * heading_error
+        self._spin(left_speed, right_speed)
+        self._tick += 1
+
+    def _run_events(self, tick):
+        """Run the events for a tick. Returns False while a wait is holding."""
+        if self._waiting is not None:
+            condition, end_ms = self._waiting
+            if not condition() and self.timer.time(MSEC) < end_ms:
+                self.waits_ms += self.plan.period_ms
+                return False
+            self._waiting = None
+        events = self.plan.events.get(tick, ())
+        while self._event < len(events):
+            kind, payload = events[self._event]
+            self._event += 1
+            if kind == "call":
+                callback, args = payload
+                callback(*args)
+            elif kind == "wait":
+                condition, timeout_ms = payload
+                if not condition():
+                    self._waiting = (condition, self.timer.time(MSEC) + timeout_ms)
+                    return False
+        return True
+
+    def _hold(self):
+        """Stay at the last planned position while waiting."""
+        self._spin(0.0, 0.0)
+
+    def _spin(self, left_ips, right_ips):
+        left_rpm = clamp(left_ips * self.rpm_per_ips, -self.max_rpm, self.max_rpm)
+        right_rpm = clamp(right_ips * self.rpm_per_ips, -self.max_rpm, self.max_rpm)
+        for motor in self.left_motors:
+            motor.spin(FORWARD, left_rpm, RPM)
+        for motor in self.right_motors:
+            motor.spin(FORWARD, right_rpm, RPM)
+
+    def stop(self):
+        for motor in self.left_motors + self.right_motors:
+            motor.stop(BRAKE)
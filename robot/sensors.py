@@ -0,0 +1,306 @@
+# Sensor Hub
+# Read each sensor ONCE per tick, and let everything in that tick share it.
+#
+# In one 10 ms tick of autonomous, the route follower reads the drive motors'
+# positions and the inertial sensor. So does the telemetry recorder, and so
+# does odometry. That is the same numbers read three times - and because they
+# are read at slightly different moments, each part of the program decides on
+# slightly different values.
+#
+# A SensorHub reads every sensor registered with it in one go, into a
+# SNAPSHOT. Everything in the same tick reads the snapshot instead of the
+# sensor, so they all see the same values, and each sensor is read once.
+#
+# The loop that OWNS the tick calls sample() once, at the start of the tick.
+# Everything else reads what it sampled:
+#   - Read the snapshot yourself:
+#         snapshot = sensors.sample()
+#         brightness = snapshot["line"].brightness
+#         hue = snapshot["line"].hue
+#   - Or give other code a CACHED DEVICE. It looks like the real sensor or
+#     motor (position(), rotation(), spin(), ...), but its readings are the
+#     last snapshot's. Commands (spin, stop, ...) go straight to the real
+#     device. A cached device never samples by itself (only if nothing has
+#     been sampled yet), so code that reads one must run inside a loop that
+#     samples - otherwise it keeps seeing the same old values.
+#
+# Readings only needed some of the time (say, only while telemetry records)
+# can be PAUSED: they are left out of each sample, and a cached device reads
+# a paused field straight from the device instead.
+#     sensors.pause(["line.brightness", "line.hue"])
+#     ...
+#     sensors.resume(["line.brightness", "line.hue"])
+#
+# Example:
+#     sensors = SensorHub()
+#     sensed_left = sensors.add_motor("left", left_motors, ["position"])
+#     sensed_imu = sensors.add_inertial("imu", imu, ["rotation"])
+#     # Odometry samples the hub at the start of every update
+#     odometry = Odometry([sensed_left], [sensed_right], sensed_imu, ...,
+#                         sensors=sensors)
+
+from vex import *
+
+MOTOR_FIELDS = ("position", "velocity", "current")
+INERTIAL_FIELDS = ("rotation", "heading")
+OPTICAL_FIELDS = ("brightness", "hue")
+
+# ============================================================================
+# SNAPSHOTS
+# ============================================================================
+# One small object per device, made once and filled in again on every sample.
+# A field that is not sampled stays None.
+
+class MotorSample:
+    """A motor's readings: position (deg), velocity (rpm), current (A)."""
+    __slots__ = MOTOR_FIELDS
+
+    def __init__(self):
+        self.position = None
+        self.velocity = None
+        self.current = None
+
+
+class InertialSample:
+    """An inertial sensor's readings: rotation and heading (deg)."""
+    __slots__ = INERTIAL_FIELDS
+
+    def __init__(self):
+        self.rotation = None
+        self.heading = None
+
+
+class OpticalSample:
+    """An optical sensor's readings: brightness and hue."""
+    __slots__ = OPTICAL_FIELDS
+
+    def __init__(self):
+        self.brightness = None
+        self.hue = None
+
+
+class Snapshot:
+    """
+    Every registered device's readings from one tick.
+    snapshot["left"] is that device's sample; tick counts the samples taken
+    and time_ms is when this one was taken.
+    """
+    __slots__ = ("tick", "time_ms", "samples")
+
+    def __init__(self):
+        self.tick = 0
+        self.time_ms = 0.0
+        self.samples = {}
+
+    def __getitem__(self, name):
+        return self.samples[name]
+
+
+# ============================================================================
+# CACHED DEVICES
+# ============================================================================
+
+class _CachedDevice:
+    """Readings from the hub's snapshot; everything else goes to the device."""
+    __slots__ = ("device", "fields", "_hub", "_sample")
+
+    def __init__(self, device, fields, hub, sample):
+        self.device = device
+        self.fields = fields          # the fields sampled (and not paused)
+        self._hub = hub
+        self._sample = sample
+
+    def _value(self, field):
+        """The last snapshot's `field`, or None if the hub does not sample it."""
+        if field not in self.fields:
+            return None
+        self._hub.snapshot()
+        return getattr(self._sample, field)
+
+    def __getattr__(self, name):
+        attribute = getattr(self.device, name)
+        if not (name.startswith("set_") or name.startswith("reset_")):
+            return attribute
+        # set_position(), reset_rotation(), ... change what the device reads,
+        # so the last snapshot is out of date
+        hub = self._hub
+
+        def changed(*args, **kwargs):
+            hub.forget()
+            return attribute(*args, **kwargs)
+        return changed
+
+
+class CachedMotor(_CachedDevice):
+    """A motor (or motor group) whose readings come from the hub."""
+    __slots__ = ()
+
+    def position(self, units=DEGREES):
+        value = self._value("position")
+        if value is None or units != DEGREES:
+            return self.device.position(units)
+        return value
+
+    def velocity(self, units=RPM):
+        value = self._value("velocity")
+        if value is None or units != RPM:
+            return self.device.velocity(units)
+        return value
+
+    def current(self, units=None):
+        value = self._value("current")
+        if value is None:
+            return self.device.current()
+        return value
+
+
+class CachedInertial(_CachedDevice):
+    """An inertial sensor whose readings come from the hub."""
+    __slots__ = ()
+
+    def rotation(self, units=DEGREES):
+        value = self._value("rotation")
+        if value is None:
+            return self.device.rotation(units)
+        return value
+
+    def heading(self, units=DEGREES):
+        value = self._value("heading")
+        if value is None:
+            return self.device.heading(units)
+        return value
+
+
+class CachedOptical(_CachedDevice):
+    """An optical sensor whose readings come from the hub."""
+    __slots__ = ()
+
+    def brightness(self, read_raw=False):
+        value = self._value("brightness")
+        if value is None or read_raw:
+            return self.device.brightness(read_raw)
+        return value
+
+    def hue(self):
+        value = self._value("hue")
+        if value is None:
+            return self.device.hue()
+        return value
+
+
+# ============================================================================
+# SENSOR HUB
+# ============================================================================
+
+class SensorHub:
+    """
+    Samples every registered device into one Snapshot when sample() is
+    called - once per tick, by the loop that owns the tick.
+    Counts (for checking): samples, reads (device readings taken).
+    """
+
+    def __init__(self):
+        self.timer = Timer()
+        self.last = Snapshot()
+        self.samples = 0
+        self.reads = 0
+        self._channels = {}           # "name.field" -> (sample, field, read, args)
+        self._sampled = []            # the channels not paused, in order
+        self._devices = {}            # name -> cached device
+        self._paused = set()
+        self._stale = True
+
+    # ---- devices (set up before sampling) -----------------------------------
+
+    def _add(self, name, cached, fields, allowed, readers):
+        if name in self.last.samples:
+            raise ValueError("two devices named " + name)
+        for field in fields:
+            if field not in allowed:
+                raise ValueError("cannot sample %s of %s" % (field, name))
+        self.last.samples[name] = cached._sample
+        self._devices[name] = cached
+        for field in fields:
+            self._channels[name + "." + field] = (cached._sample, field) + readers[field]
+        self._update()
+        return cached
+
+    def add_motor(self, name, motor, fields=MOTOR_FIELDS):
+        """Sample a motor (or motor group). Returns a CachedMotor."""
+        readers = {"position": (motor.position, (DEGREES,)),
+                   "velocity": (motor.velocity, (RPM,)),
+                   "current": (motor.current, ())}
+        cached = CachedMotor(motor, tuple(fields), self, MotorSample())
+        return self._add(name, cached, fields, MOTOR_FIELDS, readers)
+
+    def add_inertial(self, name, inertial, fields=INERTIAL_FIELDS):
+        """Sample an inertial sensor. Returns a CachedInertial."""
+        readers = {"rotation": (inertial.rotation, (DEGREES,)),
+                   "heading": (inertial.heading, (DEGREES,))}
+        cached = CachedInertial(inertial, tuple(fields), self, InertialSample())
+        return self._add(name, cached, fields, INERTIAL_FIELDS, readers)
+
+    def add_optical(self, name, optical, fields=OPTICAL_FIELDS):
+        """Sample an optical sensor. Returns a CachedOptical."""
+        readers = {"brightness": (optical.brightness, ()),
+                   "hue": (optical.hue, ())}
+        cached = CachedOptical(optical, tuple(fields), self, OpticalSample())
+        return self._add(name, cached, fields, OPTICAL_FIELDS, readers)
+
+    # ---- pausing ------------------------------------------------------------
+
+    def pause(self, channels):
+        """Stop sampling these channels ("name.field", like "line.hue")."""
+        for channel in channels:
+            if channel not in self._channels:
+                raise ValueError("no channel " + channel)
+            self._paused.add(channel)
+        self._update()
+
+    def resume(self, channels):
+        """Sample these paused channels again, from the next sample on."""
+        for channel in channels:
+            self._paused.discard(channel)
+        self._update()
+
+    def _update(self):
+        """Work out which channels sample() reads, and what each device caches."""
+        self._sampled = [self._channels[channel] for channel in self._channels
+                         if channel not in self._paused]
+        for name, cached in self._devices.items():
+            fields = []
+            for field in cached._sample.__slots__:
+                channel = name + "." + field
+                if channel in self._channels and channel not in self._paused:
+                    fields.append(field)
+                elif channel in self._paused:
+                    setattr(cached._sample, field, None)
+            cached.fields = tuple(fields)
+        self._stale = True
+
+    # ---- sampling -----------------------------------------------------------
+
+    def sample(self):
+        """Read every registered device now. Returns the Snapshot."""
+        snapshot = self.last
+        snapshot.time_ms = self.timer.time(MSEC)
+        for sample, field, read, args in self._sampled:
+            setattr(sample, field, read(*args))
+        self.reads += len(self._sampled)
+        self.samples += 1
+        snapshot.tick = self.samples
+        self._stale = False
+        return snapshot
+
+    def snapshot(self):
+        """
+        The last Snapshot. The devices are only sampled here if nothing has
+        been sampled yet, or after forget().
+        """
+        if self._stale:
+            return self.sample()
+        return self.last
+
+    def forget(self):
+        """Throw the snapshot away: the next reading samples again."""
+        self._stale = True
@@ -0,0 +1,137 @@
+# Input Shaping
+# Turn raw joystick values into motor speeds that are easy to drive with.
+#
+# The plain way:
+#     forward = apply_dead_zone(controller.axis3.position(), 5)
+#     left = forward + turn            # can be 180% -> the motor just does 100%
+# has three problems:
+#   1. Just past the dead zone the speed JUMPS from 0 to 5%.
+#   2. The stick is linear, so half of its travel is spent above 50% speed and
+#      fine, slow moves are hard.
+#   3. At full throttle, left = 100 + turn is cut off at 100%, so turning does
+#      nothing until you let off the throttle.
+#
+# An AxisCurve fixes 1 and 2. It works out, ONCE, the output for every stick
+# value from -100 to 100 into a 201-entry table:
+#   - dead zone with rescaling: values below the dead zone give 0 (just like
+#     apply_dead_zone), the output starts one small step above 0 at the dead
+#     zone's edge, and still reaches 100 at full stick
+#   - a curve: "linear", "cubic" (gentle near the center) or "expo" (a mix,
+#     set by `expo` from 0 = linear to 1 = cubic)
+# After that, shaping a value is one lookup: table[value + 100].
+#
+# arcade_mix() fixes 3: when a side would go past 100%, BOTH sides are scaled
+# down together, so the robot still turns at full throttle.
+#
+# SlewLimiter limits how fast a speed may change each tick, so the robot does
+# not lurch or tip when the stick is slammed.
+#
+# Example:
+#     forward_curve = AxisCurve(dead_zone=5, curve="expo", expo=0.5)
+#     forward = forward_curve.shape(controller.axis3.position())
+#     left, right = arcade_mix(forward, turn)
+
+from robot.pid import clamp
+
+# ============================================================================
+# CURVES
+# ============================================================================
+
+def curve_value(value, dead_zone=5, curve="linear", expo=0.5, max_output=100):
+    """
+    The shaped output for one stick value (-100 to 100). AxisCurve stores
+    this for every value, so this is only called while building the table.
+    """
+    magnitude = abs(value)
+    if magnitude < dead_zone:
+        return 0.0
+    # Like apply_dead_zone(): only values BELOW dead_zone give 0. The
+    # dead_zone value itself is the first step out, and full stick is 1.0
+    x = min(1.0, (magnitude - dead_zone + 1.0) / (101.0 - dead_zone))
+    if curve == "cubic":
+        y = x * x * x
+    elif curve == "expo":
+        y = (1.0 - expo) * x + expo * x * x * x
+    elif curve == "linear":
+        y = x
+    else:
+        raise ValueError("unknown curve: " + str(curve))
+    output = y * max_output
+    return output if value > 0 else -output
+
+
+class AxisCurve:
+    """
+    A joystick axis shaped through a 201-entry lookup table.
+
+    Settings (change them with build()):
+        dead_zone    stick values closer than this to 0 give 0
+        curve        "linear", "cubic" or "expo"
+        expo         for "expo": 0 = linear ... 1 = cubic
+        max_output   output at full stick (percent)
+    """
+
+    def __init__(self, dead_zone=5, curve="linear", expo=0.5, max_output=100):
+        self.build(dead_zone, curve, expo, max_output)
+
+    def build(self, dead_zone=5, curve="linear", expo=0.5, max_output=100):
+        """Work out the table (slow - do this before the match, not every tick)."""
+        self.dead_zone = dead_zone
+        self.curve = curve
+        self.expo = expo
+        self.max_output = max_output
+        self.table = [curve_value(value, dead_zone, curve, expo, max_output)
+                      for value in range(-100, 101)]
+
+    def shape(self, value):
+        """The shaped output for a stick value: one table lookup."""
+        if value >= 100:
+            return self.table[200]
+        if value <= -100:
+            return self.table[0]
+        return self.table[int(value) + 100]
+
+
+# ============================================================================
+# MIXING AND SLEW
+# ============================================================================
+
+def arcade_mix(forward, turn, limit=100):
+    """
+    Left and right speeds for arcade drive, scaled down together when one
+    side would go past `limit`, so turning still works at full throttle.
+    """
+    left = forward + turn
+    right = forward - turn
+    biggest = max(abs(left), abs(right))
+    if biggest > limit:
+        scale = limit / biggest
+        left *= scale
+        right *= scale
+    return left, right
+
+
+def tank_mix(left, right, limit=100):
+    """Tank drive speeds, kept within `limit` (percent)."""
+    return clamp(left, -limit, limit), clamp(right, -limit, limit)
+
+
+class SlewLimiter:
+    """
+    Lets a value change by at most `max_step` per call (per tick).
+    max_step=None turns the limit off.
+    """
+
+    def __init__(self, max_step=None):
+        self.max_step = max_step
+        self.value = 0.0
+
+    def step(self, target):
+        if self.max_step is None:
+            self.value = target
+        else:
+            self.value += clamp(target - self.value, -self.max_step, self.max_step)
+        return self.value
+
+    def reset(self, value=0.0):
+        self.value = value
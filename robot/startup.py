@@ -0,0 +1,187 @@
+# Startup
+# Get every device ready AT THE SAME TIME, then wait once for all of them.
+#
+# The usual start of a program:
+#     inertial_sensor.calibrate()
+#     while inertial_sensor.is_calibrating():
+#         wait(50, MSEC)
+#     ...then everything else, one thing after another...
+# The inertial sensor takes about 2 seconds to calibrate, and the program
+# does nothing else while it waits. Planning the route, setting up the
+# optical sensor and the motors could all happen during those 2 seconds.
+#
+# A Startup begins each step as soon as it is added, and wait() is the one
+# place where the program waits: until every step is ready, or until the
+# timeout. It also measures how long each step took, so you can see what is
+# holding up "Ready!".
+#
+# Three kinds of steps:
+#     startup.calibrate("imu", inertial_sensor)      # the sensor works on its own
+#     startup.add("grabber", set_up_grabber)         # quick: done when it returns
+#     startup.task("route", plan_route)              # slow: runs in its own thread
+#
+# Example:
+#     startup = Startup(timeout_ms=5000)
+#     startup.calibrate("imu", inertial_sensor)
+#     startup.optical("line", line_sensor)
+#     startup.task("route", plan_route)
+#     if not startup.wait():
+#         print(startup.failed(), startup.late())   # what went wrong
+#     startup.show(brain.screen)           # how long each step took
+
+from vex import *
+
+# ============================================================================
+# STEPS
+# ============================================================================
+
+class _Step:
+    """One thing being made ready: when it began, and when it was ready."""
+
+    def __init__(self, name, ready, started_ms):
+        self.name = name
+        self.ready = ready            # function() -> True once ready
+        self.started_ms = started_ms
+        self.ready_ms = None          # how long it took, once ready
+        self.error = None             # what went wrong, if it failed
+
+
+# ============================================================================
+# STARTUP
+# ============================================================================
+
+class Startup:
+    """
+    Begins setup steps together and waits for all of them (with a timeout).
+    Times are in milliseconds, from when each step was added.
+    """
+
+    def __init__(self, timeout_ms=5000, period_ms=10):
+        self.timeout_ms = timeout_ms
+        self.period_ms = period_ms
+        self.timer = Timer()
+        self.steps = []
+        self.took_ms = 0.0            # from creating the Startup until wait() returned
+
+    # ---- adding steps -------------------------------------------------------
+
+    def add(self, name, begin=None, ready=None):
+        """
+        Begin a step now. begin() starts it and returns right away;
+        ready() says when it has finished (None: finished when begin returns).
+        """
+        step = _Step(name, ready, self.timer.time(MSEC))
+        self.steps.append(step)
+        if begin is not None:
+            try:
+                begin()
+            except Exception as error:
+                step.error = error
+                return step
+        if ready is None:
+            step.ready_ms = self.timer.time(MSEC) - step.started_ms
+        return step
+
+    def calibrate(self, name, inertial):
+        """Start calibrating an inertial sensor (keep the robot still)."""
+        return self.add(name, inertial.calibrate, lambda: not inertial.is_calibrating())
+
+    def optical(self, name, sensor, light=100, integration_ms=20):
+        """
+        Turn on an optical sensor's light and set its integration time.
+        Ready once two readings' worth of time has passed with the light on.
+        """
+        def begin():
+            sensor.set_light_power(light, PERCENT)
+            sensor.integration_time(integration_ms)
+
+        started = self.timer.time(MSEC)
+        return self.add(name, begin,
+                        lambda: self.timer.time(MSEC) - started >= 2 * integration_ms)
+
+    def task(self, name, function, args=()):
+        """Run a slow function (like planning a route) in its own thread."""
+        def run():
+            try:
+                function(*args)
+                step.ready_ms = self.timer.time(MSEC) - step.started_ms
+            except Exception as error:
+                step.error = error
+
+        # The thread marks the step ready itself, to the exact millisecond
+        step = self.add(name, None, lambda: False)
+        Thread(run)
+        return step
+
+    # ---- waiting ------------------------------------------------------------
+
+    def wait(self, timeout_ms=None):
+        """
+        The readiness barrier: wait until every step is ready or has failed,
+        or until the timeout (default: the one given when created). A failed
+        step does not cut the wait short for the others.
+        Returns True if everything is ready.
+        """
+        if timeout_ms is None:
+            timeout_ms = self.timeout_ms
+        start = self.timer.time(MSEC)
+        while not self.check():
+            if not self.late() or self.timer.time(MSEC) - start >= timeout_ms:
+                break
+            wait(self.period_ms, MSEC)
+        self.took_ms = self.timer.time(MSEC)
+        return self.check()
+
+    def check(self):
+        """Look at every step once. True if all of them are ready."""
+        now = self.timer.time(MSEC)
+        all_ready = True
+        for step in self.steps:
+            if step.ready_ms is not None:
+                continue
+            if step.error is None and step.ready():
+                step.ready_ms = now - step.started_ms
+            else:
+                all_ready = False
+        return all_ready
+
+    def late(self):
+        """Names of the steps that are not ready yet (and have not failed)."""
+        return [step.name for step in self.steps
+                if step.ready_ms is None and step.error is None]
+
+    def failed(self):
+        """Names of the steps that raised an error."""
+        return [step.name for step in self.steps if step.error is not None]
+
+    def is_ready(self, name):
+        """True if the step called `name` is ready."""
+        for step in self.steps:
+            if step.name == name:
+                return step.ready_ms is not None
+        return False
+
+    # ---- results ------------------------------------------------------------
+
+    def summary(self):
+        """One line per step, the slowest first."""
+        order = sorted(self.steps, key=lambda step: -1e9 if step.ready_ms is None
+                       else -step.ready_ms)
+        lines = []
+        for step in order:
+            if step.error is not None:
+                lines.append("%s FAILED: %s" % (step.name, step.error))
+            elif step.ready_ms is None:
+                lines.append("%s NOT READY" % step.name)
+            else:
+                lines.append("%s %d ms" % (step.name, step.ready_ms))
+        return lines
+
+    def show(self, screen, rows=12):
+        """Print how long each step took on the brain screen."""
+        screen.clear_screen()
+        screen.set_cursor(1, 1)
+        screen.print("startup %d ms" % self.took_ms)
+        for line in self.summary()[:rows - 1]:
+            screen.new_line()
+            screen.print(line)
@@ -0,0 +1,188 @@
+# Telemetry
+# Record what the robot's motors and sensors were doing, 100 times per second,
+# to a file on the SD card - so a bad autonomous run can be studied afterward.
+#
+# Recording has to be cheap, or it slows down the control loop it is watching:
+#   - Every sample is a FIXED-SIZE record of numbers: a time stamp and one
+#     4-byte float per channel. No text, no formatting.
+#   - Records go into a RING BUFFER made once at the start, so taking a sample
+#     never creates new lists or strings.
+#   - The SD card is slow, so a separate background thread writes the buffer
+#     in big blocks (128 records at a time), not one record at a time.
+# If the SD card cannot keep up, the oldest unsaved records are dropped and
+# counted - the control loop never waits for the card.
+#
+# On a computer, sim/telemetry.py loads the file straight into NumPy arrays.
+#
+# Example:
+#     telemetry = Telemetry(brain.sdcard, "auton.vxt")
+#     telemetry.add_motor("fl", front_left_motor)
+#     telemetry.add_inertial("imu", inertial_sensor)
+#     telemetry.add_optical("line", line_sensor)
+#     telemetry.add_controller("ctl", controller)
+#     telemetry.start()         # sample at 100 Hz and save in the background
+#     ...
+#     telemetry.stop()          # save what is left
+
+import struct
+
+from vex import *
+from robot.periodic import PeriodicTask
+
+# File layout:
+#   header:  MAGIC, then header length (uint16), then the channel names as
+#            text separated by commas
+#   records: time in ms (uint32), then one float32 per channel
+MAGIC = b"VXT1"
+HEADER_FORMAT = "<4sH"
+TIME_FORMAT = "<I"
+
+# ============================================================================
+# TELEMETRY RECORDER
+# ============================================================================
+
+class Telemetry:
+    """
+    Samples channels into a ring buffer and saves it to the SD card in blocks.
+
+    Counts (for checking): samples, saved, dropped
+    """
+
+    def __init__(self, sdcard, filename, capacity=1024, block=128, period_ms=10,
+                 flush_ms=250):
+        self.sdcard = sdcard
+        self.filename = filename
+        self.capacity = capacity      # records the ring buffer holds
+        self.block = block            # records written to the card at a time
+        self.period_ms = period_ms
+        self.flush_ms = flush_ms
+        self.names = []
+        self.readers = []
+        self.timer = Timer()
+        self.buffer = None
+        self.sampler = None
+        self._flusher = None
+        self.samples = 0              # records sampled so far
+        self._saved = 0               # records written or dropped so far
+        self.saved = 0                # records written to the card
+        self.dropped = 0              # records lost because the card fell behind
+
+    # ---- channels (set up before start) -------------------------------------
+
+    def add(self, name, reader):
+        """Record reader() (a function returning a number) as channel `name`."""
+        if self.buffer is not None:
+            raise RuntimeError("add channels before starting telemetry")
+        self.names.append(name)
+        self.readers.append(reader)
+
+    def add_motor(self, name, motor):
+        """Position (deg), velocity (rpm) and current (A) of a motor."""
+        self.add(name + ".position", motor.position)
+        self.add(name + ".velocity", motor.velocity)
+        self.add(name + ".current", motor.current)
+
+    def add_inertial(self, name, inertial):
+        """Heading and rotation (deg) of the inertial sensor."""
+        self.add(name + ".heading", inertial.heading)
+        self.add(name + ".rotation", inertial.rotation)
+
+    def add_optical(self, name, optical):
+        """Brightness and hue of the optical sensor."""
+        self.add(name + ".brightness", optical.brightness)
+        self.add(name + ".hue", optical.hue)
+
+    def add_controller(self, name, controller):
+        """The four joystick axes."""
+        self.add(name + ".axis1", controller.axis1.position)
+        self.add(name + ".axis2", controller.axis2.position)
+        self.add(name + ".axis3", controller.axis3.position)
+        self.add(name + ".axis4", controller.axis4.position)
+
+    # ---- recording ----------------------------------------------------------
+
+    def open(self):
+        """Make the ring buffer and write the file header."""
+        self.record_format = TIME_FORMAT + "f" * len(self.names)
+        self.record_size = struct.calcsize(self.record_format)
+        self.buffer = bytearray(self.record_size * self.capacity)
+        self._view = memoryview(self.buffer)
+        names = ",".join(self.names).encode()
+        header = struct.pack(HEADER_FORMAT, MAGIC, len(names)) + names
+        self.sdcard.savefile(self.filename, bytearray(header))
+        self.samples = 0
+        self._saved = 0
+        self.saved = 0
+        self.dropped = 0
+        self.timer.clear()
+
+    def sample(self):
+        """Read every channel once into the next slot of the ring buffer."""
+        if self.buffer is None:
+            self.open()
+        offset = (self.samples % self.capacity) * self.record_size
+        struct.pack_into(TIME_FORMAT, self.buffer, offset, int(self.timer.time(MSEC)))
+        offset += 4
+        for reader in self.readers:
+            struct.pack_into("<f", self.buffer, offset, reader())
+            offset += 4
+        self.samples += 1
+        if self.samples - self._saved > self.capacity:
+            # The card fell behind: the oldest unsaved record was overwritten
+            self._saved += 1
+            self.dropped += 1
+
+    def flush(self, all_records=False):
+        """
+        Write unsaved records to the card, a block at a time. Only full
+        blocks are written unless all_records=True. Returns records written.
+        """
+        written = 0
+        while True:
+            waiting = self.samples - self._saved
+            if waiting == 0 or (waiting < self.block and not all_records):
+                return written
+            count = min(waiting, self.block)
+            start = self._saved % self.capacity
+            # A block may wrap around the end of the ring buffer
+            first = min(count, self.capacity - start)
+            self._write(start, first)
+            if count > first:
+                self._write(0, count - first)
+            self._saved += count
+            self.saved += count
+            written += count
+
+    def _write(self, start, count):
+        begin = start * self.record_size
+        end = begin + count * self.record_size
+        self.sdcard.appendfile(self.filename, bytearray(self._view[begin:end]))
+
+    def start(self):
+        """
+        Sample at the set rate and save in the background. Times count from
+        here, even if the file was made earlier with open().
+        """
+        if self.buffer is None:
+            self.open()
+        if self.sampler is None:
+            self.timer.clear()
+            self.sampler = PeriodicTask(self.sample, self.period_ms, "telemetry")
+            self.sampler.start()
+            self._flusher = Thread(self._flush_loop)
+
+    def _flush_loop(self):
+        while True:
+            wait(self.flush_ms, MSEC)
+            self.flush()
+
+    def stop(self):
+        """Stop sampling and save everything that is left."""
+        if self.sampler is not None:
+            self.sampler.stop()
+            self.sampler = None
+        if self._flusher is not None:
+            self._flusher.stop()
+            self._flusher = None
+        if self.buffer is not None:
+            self.flush(all_records=True)
@@ -0,0 +1,187 @@
+# Closed-Loop Turning
+# Turn fast AND land on the angle, using the inertial sensor and a PID controller.
+#
+# The old turn() spun at one constant speed and stopped when the heading passed
+# the target. At high speed the robot coasts past the angle, so TURN_SPEED had
+# to stay low. The TurnController instead:
+#   1. Plans the turn with a trapezoidal profile (speed up, cruise, slow down)
+#   2. Every 10 ms, compares where the robot IS with where the plan says it
+#      SHOULD be, and corrects with PID
+#   3. Finishes when the robot has stayed within the tolerance for a moment
+#      (it has "settled"), or gives up after a timeout
+#
+# It uses inertial_sensor.rotation(), which keeps counting past 360 instead of
+# wrapping to 0, so left and right turns work the same way and no heading reset
+# is needed.
+
+from vex import *
+from robot.pid import PID, TrapezoidProfile, clamp
+
+def angle_difference(target, current):
+    """
+    The shortest turn from `current` to `target`, from -180 to 180 degrees.
+
+    Example: angle_difference(10, 350) returns 20 (not -340)
+    """
+    return (target - current + 180) % 360 - 180
+
+
+# ============================================================================
+# TURN RESULT
+# ============================================================================
+
+class TurnResult:
+    """What happened during one turn."""
+
+    def __init__(self, angle, error, settle_ms, timed_out):
+        self.angle = angle            # requested angle (degrees, + = right)
+        self.error = error            # degrees left over at the end
+        self.settle_ms = settle_ms    # how long the turn took
+        self.timed_out = timed_out    # True if it gave up before settling
+
+    def __repr__(self):
+        return "TurnResult(angle=%.1f, error=%.2f, settle_ms=%d, timed_out=%s)" % (
+            self.angle, self.error, self.settle_ms, self.timed_out)
+
+
+# ============================================================================
+# TURN CONTROLLER
+# ============================================================================
+
+class TurnController:
+    """
+    Profiled PID turns with the inertial sensor.
+
+    Example: turner = TurnController(left_motors, right_motors, inertial_sensor)
+             result = turner.turn_by(90)    # right 90 degrees
+             result = turner.turn_by(-45)   # left 45 degrees
+             brain.screen.print("Settled in", result.settle_ms, "ms")
+
+    Settings (all can be changed after creating the controller):
+        kp, ki, kd        PID gains, in percent power per degree of error
+        max_speed         fastest motor power during the turn (percent)
+        max_turn_rate     how fast the robot turns at 100% power (deg/s).
+                          Measure this on your robot for best results.
+        max_accel         how quickly the turn speeds up and slows down (deg/s/s)
+        tolerance         the turn is finished within this many degrees
+        settle_rate       ...and when turning slower than this (deg/s)
+        settle_time_ms    ...for this long
+        timeout_ms        give up after this long
+    """
+
+    def __init__(self, left_motors, right_motors, inertial, kp=3.0, ki=0.0, kd=0.15,
+                 max_speed=100, max_turn_rate=400.0, max_accel=1500.0, tolerance=1.0,
+                 settle_rate=10.0, settle_time_ms=30, timeout_ms=3000, period_ms=10):
+        self.left_motors = list(left_motors)
+        self.right_motors = list(right_motors)
+        self.inertial = inertial
+        self.pid = PID(kp, ki, kd, integral_limit=20.0)
+        self.max_speed = max_speed
+        self.max_turn_rate = max_turn_rate
+        self.max_accel = max_accel
+        self.tolerance = tolerance
+        self.settle_rate = settle_rate
+        self.settle_time_ms = settle_time_ms
+        self.timeout_ms = timeout_ms
+        self.period_ms = period_ms
+        self.timer = Timer()
+        self.result = None
+        self._angle = 0.0
+
+    # ---- one turn, step by step (used by the motion engine) ------------------
+
+    def start(self, angle, max_speed=None):
+        """Begin turning `angle` degrees (+ = right, - = left)."""
+        speed = self.max_speed if max_speed is None else max_speed
+        self._angle = angle
+        self._speed = abs(speed)
+        # Leave 20% of the power for corrections on top of the plan
+        cruise_rate = self.max_turn_rate * self._speed / 100.0 * 0.8
+        self.profile = TrapezoidProfile(angle, cruise_rate, self.max_accel)
+        self.pid.reset()
+        self.timer.clear()
+        self._start_rotation = self.inertial.rotation()
+        self._last_time = 0.0
+        self._last_turned = 0.0
+        self._settled_since = None
+        self.result = None
+
+    def turned(self):
+        """Degrees turned so far in this turn."""
+        return self._last_turned
+
+    def progress(self):
+        """How much of the turn is done, from 0.0 to 1.0."""
+        if self.result is not None or self._angle == 0:
+            return 1.0
+        return clamp(self._last_turned / self._angle, 0.0, 0.99)
+
+    def step(self):
+        """Run one control update. Returns True when the turn is finished."""
+        if self.result is not None:
+            return True
+        now_ms = self.timer.time(MSEC)
+        now = now_ms / 1000.0
+        dt = now - self._last_time
+        turned = self.inertial.rotation() - self._start_rotation
+        rate = (turned - self._last_turned) / dt if dt > 0 else 0.0
+        self._last_time = now
+        self._last_turned = turned
+
+        error = self._angle - turned
+        if abs(error) <= self.tolerance and abs(rate) <= self.settle_rate:
+            if self._settled_since is None:
+                self._settled_since = now_ms
+            if now_ms - self._settled_since >= self.settle_time_ms:
+                return self._finish(error, now_ms, False)
+        else:
+            self._settled_since = None
+        if now_ms >= self.timeout_ms:
+            return self._finish(error, now_ms, True)
+
+        # Follow the plan: feed-forward for the planned speed, PID for the
+        # difference between the planned and the real position
+        planned_position, planned_rate = self.profile.sample(now)
+        feed_forward = planned_rate / self.max_turn_rate * 100.0
+        power = self.pid.update(planned_position - turned, dt, feed_forward)
+        power = clamp(power, -self._speed, self._speed)
+        self._drive(power)
+        return False
+
+    def _drive(self, power):
+        for motor in self.left_motors:
+            motor.spin(FORWARD, power, PERCENT)
+        for motor in self.right_motors:
+            motor.spin(FORWARD, -power, PERCENT)
+
+    def stop(self):
+        for motor in self.left_motors + self.right_motors:
+            motor.stop()
+
+    def _finish(self, error, now_ms, timed_out):
+        self.stop()
+        self.result = TurnResult(self._angle, error, int(now_ms), timed_out)
+        return True
+
+    # ---- a whole turn (blocks until done) ------------------------------------
+
+    def turn_by(self, angle, max_speed=None):
+        """
+        Turn `angle` degrees (+ = right, - = left) and wait until settled.
+        Returns a TurnResult.
+        """
+        self.start(angle, max_speed)
+        while not self.step():
+            wait(self.period_ms, MSEC)
+        return self.result
+
+    def turn_to(self, heading, max_speed=None):
+        """
+        Turn the shortest way to an absolute heading (degrees from where the
+        robot faced when the inertial sensor calibrated). Returns a TurnResult.
+
+        Aiming at absolute headings keeps small errors from adding up turn
+        after turn.
+        """
+        angle = angle_difference(heading, self.inertial.rotation() % 360)
+        return self.turn_by(angle, max_speed)
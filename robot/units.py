@@ -0,0 +1,16 @@
+# Units
+# Short names for the units and directions every program uses.
+#
+#     from robot.units import *
+#     move(FORWARD, 24, INCHES)
+
+from vex import *
+
+INCHES = DistanceUnits.IN
+FEET = 12                 # inches per foot
+DEGREES = RotationUnits.DEG
+SECONDS = TimeUnits.SEC
+MSEC = TimeUnits.MSEC
+FORWARD = DirectionType.FWD
+REVERSE = DirectionType.REV
+PERCENT = VelocityUnits.PCT
@@ -0,0 +1,200 @@
+# Velocity-Controlled Drive
+# Drive straight at high speed by MEASURING the wheels, not just commanding them.
+#
+# spin(FORWARD, 50, PERCENT) asks for a speed, but the speed you get depends
+# on the battery and on how much each side has to push. If the left side is a
+# little weaker, it falls behind and the robot curves. move() with spin_for
+# gives each motor its own target, so each side gets there - but at different
+# times, and the robot turns on the way.
+#
+# A VelocityDrive closes the loop every 10 ms:
+#   1. A motion profile (robot/pid.py) says how far the robot should have gone
+#      and how fast it should be going right now.
+#   2. SYNC: if one side has gone further than the other, slow it down and
+#      speed the other up, so both sides travel together.
+#   3. HEADING: the inertial sensor holds the heading the move started with.
+#   4. Each side has its own velocity loop: it reads the motors' measured
+#      speed and pushes harder when a side is slower than asked for.
+#
+# Example:
+#     velocity_drive = VelocityDrive([left_drive], [right_drive], inertial_sensor,
+#                                    WHEEL_CIRCUMFERENCE)
+#     velocity_drive.drive_straight(48, max_rpm=180)     # 48 inches, straight
+
+from vex import *
+from robot.pid import TrapezoidProfile, clamp
+from robot.turning import angle_difference
+
+# ============================================================================
+# ONE SIDE
+# ============================================================================
+
+class SideVelocity:
+    """
+    Velocity loop for one side: feed-forward from the wanted speed, plus
+    PI on the measured speed. Output is a motor percent.
+    """
+
+    def __init__(self, motors, max_rpm=200.0, kp=0.3, ki=0.02, max_boost=25.0):
+        self.motors = list(motors)
+        self.max_rpm = max_rpm
+        self.kp = kp
+        self.ki = ki
+        self.max_boost = max_boost    # the most the integral may add (percent)
+        self.integral = 0.0
+        self.output = 0.0
+
+    def position(self):
+        """Average motor position (degrees)."""
+        total = 0.0
+        for motor in self.motors:
+            total += motor.position(DEGREES)
+        return total / len(self.motors)
+
+    def velocity(self):
+        """Average measured motor speed (RPM)."""
+        total = 0.0
+        for motor in self.motors:
+            total += motor.velocity(RPM)
+        return total / len(self.motors)
+
+    def update(self, target_rpm):
+        """Drive toward target_rpm for one tick. Returns the percent sent."""
+        error = target_rpm - self.velocity()
+        self.integral = clamp(self.integral + self.ki * error, -self.max_boost, self.max_boost)
+        self.output = clamp(target_rpm / self.max_rpm * 100.0 + self.kp * error
+                            + self.integral, -100.0, 100.0)
+        for motor in self.motors:
+            motor.spin(FORWARD, self.output, PERCENT)
+        return self.output
+
+    def lacking(self, target_rpm, direction=1):
+        """
+        RPM this side is short of target_rpm while already at full power in
+        `direction` (1 = forward, -1 = backward); 0 if it is not maxed out.
+        """
+        if self.output * direction < 100.0:
+            return 0.0
+        return max(0.0, (target_rpm - self.velocity()) * direction)
+
+    def reset(self):
+        self.integral = 0.0
+        self.output = 0.0
+
+
+# ============================================================================
+# DRIVE
+# ============================================================================
+
+class VelocityDrive:
+    """
+    Straight moves with per-side velocity loops, left/right sync and heading
+    hold.
+
+    Settings:
+        position_kp   extra RPM per degree of motor travel behind the plan
+        sync_kp       RPM per degree that one side is ahead of the other
+        heading_kp    RPM per degree off the held heading
+        max_accel     how quickly the speed may change (RPM per second)
+        tolerance     close enough to the end (inches)
+    """
+
+    def __init__(self, left_motors, right_motors, inertial, wheel_circumference,
+                 gear_ratio=1.0, max_rpm=200.0, kp=0.3, ki=0.02, position_kp=1.0,
+                 sync_kp=0.5, heading_kp=3.0, max_accel=600.0, tolerance=0.3,
+                 timeout_ms=5000, period_ms=10):
+        self.left = SideVelocity(left_motors, max_rpm, kp, ki)
+        self.right = SideVelocity(right_motors, max_rpm, kp, ki)
+        self.inertial = inertial
+        self.degrees_per_inch = 360.0 / (wheel_circumference * gear_ratio)
+        self.max_rpm = max_rpm
+        self.position_kp = position_kp
+        self.sync_kp = sync_kp
+        self.heading_kp = heading_kp
+        self.max_accel = max_accel
+        self.tolerance = tolerance
+        self.timeout_ms = timeout_ms
+        self.period_ms = period_ms
+        self.timer = Timer()
+        # Results of the last move
+        self.max_sync_error = 0.0      # degrees one side got ahead, worst case
+        self.max_heading_error = 0.0   # degrees off the held heading, worst case
+
+    def drive_straight(self, inches, max_rpm=180.0, heading=None):
+        """
+        Drive `inches` (negative = backward) holding `heading` (an
+        inertial.rotation() value; None = the heading right now).
+        Blocks until done. Returns how far from the end it stopped (inches).
+        """
+        target = inches * self.degrees_per_inch
+        # Plan in motor degrees: RPM * 6 = degrees per second
+        profile = TrapezoidProfile(target, min(max_rpm, self.max_rpm) * 6.0,
+                                   self.max_accel * 6.0)
+        hold = self.inertial.rotation() if heading is None else heading
+        left_start = self.left.position()
+        right_start = self.right.position()
+        self.left.reset()
+        self.right.reset()
+        self.max_sync_error = 0.0
+        self.max_heading_error = 0.0
+        tolerance = self.tolerance * self.degrees_per_inch
+        self.timer.clear()
+        plan_ms = 0.0       # time along the plan (slows while a side is maxed out)
+        last_ms = 0.0
+        plan_rpm = 0.0
+
+        while True:
+            elapsed = self.timer.time(MSEC)
+            plan_ms += (elapsed - last_ms) * self._plan_rate(plan_rpm)
+            last_ms = elapsed
+            left = self.left.position() - left_start
+            right = self.right.position() - right_start
+            travelled = (left + right) / 2.0
+            if plan_ms >= profile.duration * 1000.0 and abs(target - travelled) <= tolerance:
+                break
+            if elapsed >= self.timeout_ms:
+                break
+
+            plan_position, plan_velocity = profile.sample(plan_ms / 1000.0)
+            plan_rpm = plan_velocity / 6.0
+            base = plan_velocity / 6.0 + self.position_kp * (plan_position - travelled)
+
+            sync_error = left - right
+            heading_error = angle_difference(hold, self.inertial.rotation())
+            if abs(sync_error) > self.max_sync_error:
+                self.max_sync_error = abs(sync_error)
+            if abs(heading_error) > self.max_heading_error:
+                self.max_heading_error = abs(heading_error)
+            steer = self.heading_kp * heading_error - self.sync_kp * sync_error
+
+            left_rpm = base + steer
+            right_rpm = base - steer
+            # A side at full power cannot speed up to correct, so the other
+            # side slows down instead: both targets drop by what it lacks
+            lacking = max(self.left.lacking(left_rpm), self.right.lacking(right_rpm))
+            if base < 0:
+                lacking = -max(self.left.lacking(left_rpm, -1), self.right.lacking(right_rpm, -1))
+            self.left.update(left_rpm - lacking)
+            self.right.update(right_rpm - lacking)
+            wait(self.period_ms, MSEC)
+
+        self.stop()
+        travelled = (self.left.position() - left_start + self.right.position() - right_start) / 2.0
+        return (target - travelled) / self.degrees_per_inch
+
+    def _plan_rate(self, plan_rpm):
+        """
+        How fast to move along the plan: full speed, unless a side is already
+        at full power and still slower than planned (a weak side or a low
+        battery). Then the plan waits for the robot instead of running ahead.
+        """
+        if abs(self.left.output) < 100.0 and abs(self.right.output) < 100.0:
+            return 1.0
+        if plan_rpm == 0:
+            return 1.0
+        slowest = min(abs(self.left.velocity()), abs(self.right.velocity()))
+        return clamp(slowest / abs(plan_rpm), 0.0, 1.0)
+
+    def stop(self):
+        for motor in self.left.motors + self.right.motors:
+            motor.stop(BRAKE)
@@ -0,0 +1,255 @@
+"""
+Benchmark every lesson program in the simulator and save the results as JSON.
+
+Each scenario runs one main-0N.py (or one of its functions) headlessly and
+records:
+    wall_time        real seconds the simulation took
+    sim_time         simulated seconds until the program finished
+    loop             control-loop period: mean, p99, max and overruns (ms)
+    motor_commands   how many motor commands the program sent
+    pose, pose_error final pose, and how far it is from where it should be
+
+The control loop is the thread that sends the most motor commands. Between
+its first and last command, each time one of its wait() calls ends is a
+tick, and the gap between ticks is the loop period. Gaps longer than 250 ms are pauses, not loop ticks. A tick more than
+1.5 times the usual (median) period is an overrun.
+
+Examples:
+    python sim/bench.py                              # all, saved to bench.json
+    python sim/bench.py main-06 main-09-auton        # just these
+    python sim/bench.py --out after.json --compare before.json
+
+With --compare it prints what changed and exits with 1 if anything got
+worse by more than the allowed margin (a regression).
+"""
+
+import argparse
+import json
+import math
+import os
+import platform
+import sys
+import time
+
+SIM_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_DIR = os.path.dirname(SIM_DIR)
+for _path in (SIM_DIR, REPO_DIR):
+    if _path not in sys.path:
+        sys.path.insert(0, _path)
+
+import vex  # noqa: E402
+from run import run_program  # noqa: E402
+
+PAUSE_MS = 250.0        # a longer gap between ticks is a pause, not a loop tick
+OVERRUN_FACTOR = 1.5    # a tick this many times the median period is an overrun
+
+# Sticks and buttons for the driver-control programs: forward, arc, spin, stop
+DRIVE_INPUTS = [(500, "axis3", 60), (500, "axis2", 60), (2000, "axis4", 40),
+                (2000, "axis1", -40), (3500, "axis3", 0), (3500, "axis2", 0),
+                (3500, "axis4", 80), (3500, "axis1", 80), (4500, "axis4", 0),
+                (4500, "axis1", 0)]
+BUTTON_INPUTS = [(5000, "buttonA", True), (5100, "buttonA", False),
+                 (5500, "buttonR1", True), (5600, "buttonR1", False),
+                 (7000, "buttonR2", True), (7100, "buttonR2", False)]
+
+LINE = vex.Field(lines=[(0, -20, 0, 60, 0.75), (0, 60, 30, 120, 0.75),
+                        (30, 120, 30, 400, 0.75)], edge=0.5)
+
+# name: how to run it. target = (x, y, heading) where the robot should finish
+SCENARIOS = {
+    "main-01": {"program": "main-01.py"},
+    "main-02": {"program": "main-02.py", "target": (0.0, 0.0, 0.0)},
+    "main-03": {"program": "main-03.py", "inputs": DRIVE_INPUTS, "limit": 8.0},
+    "main-04": {"program": "main-04.py", "inputs": DRIVE_INPUTS, "limit": 8.0},
+    "main-05": {"program": "main-05.py", "inputs": DRIVE_INPUTS + BUTTON_INPUTS,
+                "limit": 8.0},
+    "main-06": {"program": "main-06.py", "target": (0.0, 0.0, 0.0)},
+    "main-07": {"program": "main-07.py", "inputs": DRIVE_INPUTS + BUTTON_INPUTS,
+                "limit": 8.0},
+    "main-08": {"program": "main-08.py"},
+    "main-08-follow": {"program": "main-08.py", "call": "follow_line", "args": (8,),
+                       "field": LINE, "start": (-0.4, 0.0, 0.0)},
+    "main-09-auton": {"program": "main-09.py", "call": "autonomous",
+                      "target": (0.0, 0.0, 180.0)},
+    "main-09-driver": {"program": "main-09.py", "call": "driver_control",
+                       "inputs": DRIVE_INPUTS + BUTTON_INPUTS, "limit": 8.0},
+}
+
+# How much worse a result may get before --compare calls it a regression:
+# a fraction of the old value for times and counts, or an absolute amount
+RELATIVE_MARGINS = {"sim_time": 0.05, "motor_commands": 0.10}
+ABSOLUTE_MARGINS = {"pose_error": 0.5, "loop_p99_ms": 1.0, "loop_overruns": 0}
+
+
+# ============================================================================
+# MEASURING
+# ============================================================================
+
+def loop_stats(world):
+    """Period statistics of the thread that sends the most motor commands."""
+    loop = max(world.threads(), key=lambda thread: thread.commands)
+    ticks = []
+    if loop.commands:
+        ticks = [when for when in loop.wake_times
+                 if loop.first_command <= when <= loop.last_command]
+    periods = sorted(b - a for a, b in zip(ticks, ticks[1:]) if b - a <= PAUSE_MS)
+    if not periods:
+        return {"ticks": len(ticks), "mean_ms": None, "p99_ms": None, "max_ms": None,
+                "overruns": 0}
+    median = periods[len(periods) // 2]
+    p99 = periods[min(len(periods) - 1, int(math.ceil(0.99 * len(periods))) - 1)]
+    return {
+        "ticks": len(ticks),
+        "mean_ms": round(sum(periods) / len(periods), 3),
+        "p99_ms": round(p99, 3),
+        "max_ms": round(periods[-1], 3),
+        "overruns": sum(1 for period in periods if period > OVERRUN_FACTOR * median),
+    }
+
+
+def run_scenario(name, repeat=1):
+    """Run one scenario (the fastest of `repeat` runs, for wall time)."""
+    scenario = SCENARIOS[name]
+    call = scenario.get("call")
+    model = None
+    if "start" in scenario:
+        model = vex.RobotModel(start_pose=scenario["start"])
+
+    def setup(namespace):
+        if call:
+            namespace[call](*scenario.get("args", ()))
+
+    best = None
+    for _ in range(repeat):
+        result = run_program(os.path.join(REPO_DIR, scenario["program"]),
+                             time_limit=scenario.get("limit", 60.0), model=model,
+                             field=scenario.get("field"), inputs=scenario.get("inputs"),
+                             as_main=not call, setup=setup)
+        if best is None or result.wall_time < best.wall_time:
+            best = result
+
+    x, y, heading = best.pose
+    report = {
+        "program": scenario["program"],
+        "call": call,
+        "wall_time": round(best.wall_time, 4),
+        "sim_time": round(best.sim_time, 3),
+        "timed_out": best.timed_out,
+        "loop": loop_stats(best.world),
+        "motor_commands": best.stats["motor_commands"],
+        "sensor_reads": best.stats["sensor_reads"],
+        "screen_calls": best.stats["screen_calls"],
+        "pose": [round(x, 3), round(y, 3), round(heading, 2)],
+        "pose_error": None,
+        "heading_error": None,
+        "errors": [repr(error) for error in best.errors],
+    }
+    if "target" in scenario:
+        tx, ty, theading = scenario["target"]
+        report["pose_error"] = round(math.hypot(x - tx, y - ty), 3)
+        report["heading_error"] = round(abs((heading - theading + 180) % 360 - 180), 2)
+    return report
+
+
+def run_all(names, repeat=1):
+    return {
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "scenarios": {name: run_scenario(name, repeat) for name in names},
+    }
+
+
+# ============================================================================
+# REPORTING
+# ============================================================================
+
+def _metrics(report):
+    """The numbers --compare checks, by name."""
+    loop = report["loop"]
+    return {"sim_time": report["sim_time"], "pose_error": report["pose_error"],
+            "loop_p99_ms": loop["p99_ms"], "loop_overruns": loop["overruns"],
+            "motor_commands": report["motor_commands"]}
+
+
+def compare(old, new):
+    """Lines describing what changed, and the list of regressions."""
+    lines = []
+    regressions = []
+    for name, report in new["scenarios"].items():
+        if name not in old["scenarios"]:
+            continue
+        before = _metrics(old["scenarios"][name])
+        after = _metrics(report)
+        for metric, value in after.items():
+            was = before.get(metric)
+            if value is None or was is None or value == was:
+                continue
+            if metric in RELATIVE_MARGINS:
+                allowed = was * RELATIVE_MARGINS[metric]
+            else:
+                allowed = ABSOLUTE_MARGINS[metric]
+            worse = value - was > allowed
+            lines.append("%-16s %-15s %10s -> %-10s%s" % (
+                name, metric, was, value, "  REGRESSION" if worse else ""))
+            if worse:
+                regressions.append((name, metric))
+    return lines, regressions
+
+
+def format_table(results):
+    columns = ("scenario", "sim s", "wall s", "loop mean", "p99", "overruns",
+               "commands", "pose error")
+    lines = ["%-16s %7s %7s %9s %7s %8s %8s %10s" % columns]
+    for name, report in results["scenarios"].items():
+        loop = report["loop"]
+        lines.append("%-16s %7.2f %7.3f %9s %7s %8d %8d %10s%s" % (
+            name, report["sim_time"], report["wall_time"],
+            "-" if loop["mean_ms"] is None else "%.2f" % loop["mean_ms"],
+            "-" if loop["p99_ms"] is None else "%.2f" % loop["p99_ms"],
+            loop["overruns"], report["motor_commands"],
+            "-" if report["pose_error"] is None else "%.2f" % report["pose_error"],
+            "  ERROR" if report["errors"] else ""))
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("scenarios", nargs="*", help="scenarios to run (default: all)")
+    parser.add_argument("--out", default="bench.json", help="results file (default bench.json)")
+    parser.add_argument("--compare", help="earlier results file to compare against")
+    parser.add_argument("--repeat", type=int, default=1,
+                        help="runs per scenario; the fastest wall time is kept")
+    parser.add_argument("--list", action="store_true", help="list the scenarios and exit")
+    args = parser.parse_args(argv)
+
+    if args.list:
+        for name, scenario in SCENARIOS.items():
+            print("%-16s %s %s" % (name, scenario["program"], scenario.get("call") or ""))
+        return 0
+    names = args.scenarios or list(SCENARIOS)
+    unknown = [name for name in names if name not in SCENARIOS]
+    if unknown:
+        parser.error("unknown scenario: " + ", ".join(unknown))
+
+    results = run_all(names, args.repeat)
+    print(format_table(results))
+    with open(args.out, "w") as handle:
+        json.dump(results, handle, indent=2)
+        handle.write("\n")
+    print("results saved to", args.out)
+
+    failed = any(report["errors"] for report in results["scenarios"].values())
+    if args.compare:
+        with open(args.compare) as handle:
+            old = json.load(handle)
+        lines, regressions = compare(old, results)
+        print("\n".join(lines) if lines else "no changes from " + args.compare)
+        if regressions:
+            print("%d regression(s)" % len(regressions))
+            failed = True
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,69 @@
+"""
+Classify recorded optical sensor samples in one pass, with NumPy.
+
+The robot's get_color() uses the hue table in robot/color.py. This
+module uses the SAME table on whole arrays of samples, so thresholds can be
+tuned against a recorded log on a computer and the result matches what the
+robot would have decided, sample for sample.
+
+Example:
+    import numpy as np
+    from colors import classify
+
+    labels, on_line = classify(hues, brightness, threshold=50)
+    np.unique(labels, return_counts=True)     # how often each color was seen
+    on_line.mean()                            # fraction of samples on the line
+
+Needs NumPy (pip install numpy). The robot itself never imports this file.
+"""
+
+import os
+import sys
+
+import numpy as np
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if REPO_DIR not in sys.path:
+    sys.path.insert(0, REPO_DIR)
+
+from robot.color import COLOR_NAMES, HUE_CODES, build_hue_codes  # noqa: E402
+
+CODE_TABLE = np.array(HUE_CODES, dtype=np.uint8)
+NAME_ARRAY = np.array(COLOR_NAMES)
+
+
+def hue_codes(hues, table=CODE_TABLE):
+    """Color code (index into COLOR_NAMES) for every hue, as a uint8 array."""
+    # The same entries as robot/color.py's hue_index(): half-degree bins,
+    # int(hue * 2) wrapped around the table
+    index = np.trunc(np.asarray(hues, dtype=np.float64) * 2).astype(np.int64) % len(table)
+    return table[index]
+
+
+def color_labels(hues, table=CODE_TABLE):
+    """Color name for every hue, as an array of strings."""
+    return NAME_ARRAY[hue_codes(hues, table)]
+
+
+def on_line_flags(brightness, threshold):
+    """True for every sample darker than the threshold."""
+    return np.asarray(brightness) < threshold
+
+
+def classify(hues, brightness, threshold, ranges=None):
+    """
+    Classify a whole log at once.
+
+    hues, brightness: arrays (or lists) of samples, the same length
+    threshold:        brightness below this counts as on the line
+    ranges:           optional hue ranges to try instead of robot/color.py's
+                      HUE_RANGES, as (name, first, after) tuples holding the
+                      hues with first <= hue < after; first and after must be
+                      whole or half degrees (ValueError otherwise)
+
+    Returns (labels, on_line): an array of color names and a boolean array.
+    """
+    table = CODE_TABLE
+    if ranges is not None:
+        table = np.array(build_hue_codes(ranges), dtype=np.uint8)
+    return color_labels(hues, table), on_line_flags(brightness, threshold)
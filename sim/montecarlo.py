@@ -0,0 +1,318 @@
+"""
+Check how reliable an autonomous route is: run it thousands of times on a
+slightly different robot each time, and count how often it ends where it
+should.
+
+A route that works on the practice field can miss at an event because the
+robot was placed a little off, one motor is weaker, the battery is low, the
+wheels slip or the inertial sensor drifts. Each run picks its own random
+robot (vex.RobotModel):
+
+    start pose      x and y off by --start-xy inches, heading by --start-heading
+    motor gains     each drive motor's speed times 1 +/- --motor-gain
+    IMU drift       --imu-drift degrees per second, either way
+    wheel size      the real wheels --wheel-size (a fraction) bigger or smaller
+                    than the program's WHEEL_CIRCUMFERENCE thinks
+    wheel slip      0 to --slip of the wheel travel lost
+    battery         between --battery and full voltage
+
+(x, y, motor gains, drift and wheel size are normal: the option is one
+standard deviation. Slip and battery are uniform.)
+
+A run succeeds when it ends within --tolerance inches and
+--heading-tolerance degrees of --target, without an error or the time limit.
+
+Examples:
+    python sim/montecarlo.py main-09.py --call autonomous --target 0,0,180
+    python sim/montecarlo.py main-09.py --call autonomous --target 0,0,180 \\
+        --runs 10000 --out study.json
+    python sim/montecarlo.py main-09.py --call autonomous --target 0,0,180 \\
+        --replay 1234           # run number 1234 again, on its own
+
+Run i always gets the same robot (from --seed + i), so a failing run can be
+replayed and watched.
+
+Each worker process does about 15 runs of main-09.py's autonomous per second
+(55 to 70 ms a run, measured on one core), so 10000 runs take about 10
+minutes on one core and a minute and a quarter or more on eight. Much of a
+run is the simulator switching between the program's threads (see
+sim/README.md).
+"""
+
+import argparse
+import json
+import math
+import os
+import random
+import statistics
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+SIM_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_DIR = os.path.dirname(SIM_DIR)
+for _path in (SIM_DIR, REPO_DIR):
+    if _path not in sys.path:
+        sys.path.insert(0, _path)
+
+import vex  # noqa: E402
+from run import run_program  # noqa: E402
+
+# One standard deviation (or the limit, for slip and battery) of each noise
+NOISE = {
+    "start_xy": 0.5,        # inches
+    "start_heading": 1.0,   # degrees
+    "motor_gain": 0.03,     # fraction of speed, per motor
+    "imu_drift": 0.02,      # degrees per second
+    "wheel_size": 0.01,     # fraction of the wheel diameter
+    "slip": 0.03,           # most wheel travel lost (fraction)
+    "battery": 0.85,        # lowest battery (fraction of full voltage)
+}
+
+# The random numbers of each run that are reported and compared with the error
+FACTORS = ("start_dx", "start_dy", "start_dheading", "left_gain", "right_gain",
+           "imu_drift", "wheel_size", "slip", "battery")
+
+CHUNKS_PER_WORKER = 8   # more, smaller batches keep every worker busy to the end
+
+
+# ============================================================================
+# RANDOM ROBOTS
+# ============================================================================
+
+def sample_robot(index, seed=0, noise=NOISE, start=(0.0, 0.0, 0.0)):
+    """
+    The robot for run `index`: a vex.RobotModel, and the random numbers
+    that made it ({factor: value}).
+    """
+    rng = random.Random(seed * 1000003 + index)
+    base = vex.RobotModel()
+    x, y, heading = start
+    factors = {
+        "start_dx": rng.gauss(0.0, noise["start_xy"]),
+        "start_dy": rng.gauss(0.0, noise["start_xy"]),
+        "start_dheading": rng.gauss(0.0, noise["start_heading"]),
+        "imu_drift": rng.gauss(0.0, noise["imu_drift"]),
+        "wheel_size": rng.gauss(0.0, noise["wheel_size"]),
+        "slip": rng.uniform(0.0, noise["slip"]),
+        "battery": rng.uniform(noise["battery"], 1.0),
+    }
+    gains = {}
+    for port in base.left_ports + base.right_ports:
+        gains[port] = 1.0 + rng.gauss(0.0, noise["motor_gain"])
+    factors["left_gain"] = sum(gains[port] for port in base.left_ports) / len(base.left_ports)
+    factors["right_gain"] = sum(gains[port] for port in base.right_ports) / len(base.right_ports)
+    model = vex.RobotModel(
+        start_pose=(x + factors["start_dx"], y + factors["start_dy"],
+                    heading + factors["start_dheading"]),
+        motor_gain=gains,
+        imu_drift=factors["imu_drift"],
+        wheel_diameter=base.wheel_diameter * (1.0 + factors["wheel_size"]),
+        wheel_slip=factors["slip"],
+        battery=factors["battery"],
+        seed=seed * 1000003 + index)
+    return model, factors
+
+
+# ============================================================================
+# RUNS
+# ============================================================================
+
+def run_once(job, index):
+    """One run on robot number `index`. Returns a dict of what happened."""
+    model, factors = sample_robot(index, job["seed"], job["noise"], job["start"])
+    result = run_program(job["program"], call=job["call"], time_limit=job["limit"],
+                         model=model, as_main=not job["call"], constants=job["constants"])
+    x, y, heading = result.pose
+    tx, ty, theading = job["target"]
+    run = {
+        "run": index,
+        "x": x,
+        "y": y,
+        "heading": heading,
+        "pose_error": math.hypot(x - tx, y - ty),
+        "heading_error": abs((heading - theading + 180.0) % 360.0 - 180.0),
+        "time": result.sim_time,
+        "status": "ok",
+    }
+    if result.errors:
+        run["status"] = "error: %r" % result.errors[0]
+    elif result.timed_out:
+        run["status"] = "time limit"
+    run["success"] = (run["status"] == "ok" and run["pose_error"] <= job["tolerance"]
+                      and run["heading_error"] <= job["heading_tolerance"])
+    run.update(factors)
+    return run
+
+
+def run_chunk(job):
+    """Runs job["first"] .. job["first"] + job["count"] - 1 (in a worker process)."""
+    return [run_once(job, index) for index in range(job["first"], job["first"] + job["count"])]
+
+
+def study(program, target, runs=1000, call=None, tolerance=2.0, heading_tolerance=5.0,
+          noise=None, start=(0.0, 0.0, 0.0), seed=0, limit=15.0, constants=None,
+          workers=None):
+    """Run the program `runs` times, in parallel. Returns the runs, in order."""
+    base = {"program": program, "call": call, "target": tuple(target),
+            "tolerance": tolerance, "heading_tolerance": heading_tolerance,
+            "noise": dict(NOISE, **(noise or {})), "start": tuple(start), "seed": seed,
+            "limit": limit, "constants": constants or {}}
+    workers = workers or os.cpu_count() or 1
+    size = max(1, int(math.ceil(runs / float(workers * CHUNKS_PER_WORKER))))
+    jobs = [dict(base, first=first, count=min(size, runs - first))
+            for first in range(0, runs, size)]
+    if workers == 1:
+        chunks = [run_chunk(job) for job in jobs]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            chunks = list(pool.map(run_chunk, jobs))
+    return [run for chunk in chunks for run in chunk]
+
+
+# ============================================================================
+# RESULTS
+# ============================================================================
+
+def distribution(values):
+    """mean, standard deviation and percentiles of a list of numbers."""
+    values = sorted(values)
+    count = len(values)
+
+    def percentile(fraction):
+        return values[min(count - 1, int(math.ceil(fraction * count)) - 1)] if count else math.nan
+
+    return {
+        "mean": statistics.fmean(values) if values else math.nan,
+        "std": statistics.pstdev(values) if count > 1 else 0.0,
+        "min": values[0] if values else math.nan,
+        "p5": percentile(0.05),
+        "p50": percentile(0.50),
+        "p95": percentile(0.95),
+        "max": values[-1] if values else math.nan,
+    }
+
+
+def summarize(runs):
+    """Success rate, end-pose distributions, and which noise hurts the most."""
+    count = len(runs)
+    successes = sum(1 for run in runs if run["success"])
+    rate = successes / float(count) if count else 0.0
+    # 95% confidence interval of the success rate
+    margin = 1.96 * math.sqrt(rate * (1.0 - rate) / count) if count else 0.0
+    finished = [run for run in runs if run["status"] == "ok"]
+    summary = {
+        "runs": count,
+        "successes": successes,
+        "success_rate": rate,
+        "success_margin": margin,
+        "errors": sum(1 for run in runs if run["status"].startswith("error")),
+        "timed_out": sum(1 for run in runs if run["status"] == "time limit"),
+        "distributions": {},
+        "sensitivity": {},
+    }
+    for name in ("x", "y", "heading", "pose_error", "heading_error", "time"):
+        summary["distributions"][name] = distribution([run[name] for run in finished])
+    # How strongly each random factor goes with the pose error (-1 .. 1)
+    errors = [run["pose_error"] for run in finished]
+    for factor in FACTORS:
+        values = [run[factor] for run in finished]
+        try:
+            summary["sensitivity"][factor] = statistics.correlation(values, errors)
+        except statistics.StatisticsError:     # fewer than 2 runs, or no spread
+            summary["sensitivity"][factor] = 0.0
+    return summary
+
+
+def format_summary(summary, worst=()):
+    lines = ["success: %d of %d runs (%.1f%% +/- %.1f%%)" % (
+        summary["successes"], summary["runs"], 100.0 * summary["success_rate"],
+        100.0 * summary["success_margin"])]
+    if summary["errors"] or summary["timed_out"]:
+        lines.append("errors: %d  time limit: %d" % (summary["errors"], summary["timed_out"]))
+    lines.append("")
+    lines.append("%-14s %8s %7s %8s %8s %8s %8s" % ("", "mean", "std", "p5", "p50", "p95", "max"))
+    for name, stats in summary["distributions"].items():
+        lines.append("%-14s %8.2f %7.2f %8.2f %8.2f %8.2f %8.2f" % (
+            name, stats["mean"], stats["std"], stats["p5"], stats["p50"], stats["p95"],
+            stats["max"]))
+    lines.append("")
+    lines.append("what goes with a bigger pose error (correlation):")
+    order = sorted(summary["sensitivity"].items(), key=lambda item: -abs(item[1]))
+    for factor, value in order:
+        lines.append("  %-15s %+.2f" % (factor, value))
+    if worst:
+        lines.append("")
+        lines.append("worst runs (replay with --replay N):")
+        for run in worst:
+            lines.append("  run %-6d pose error %6.2f in, heading error %5.1f deg  %s" % (
+                run["run"], run["pose_error"], run["heading_error"], run["status"]))
+    return "\n".join(lines)
+
+
+def _worst(runs, count=5):
+    return sorted(runs, key=lambda run: (run["status"] == "ok", -run["pose_error"]))[:count]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("program", help="program to test, e.g. main-09.py")
+    parser.add_argument("--call", help="function to run, e.g. autonomous")
+    parser.add_argument("--target", required=True,
+                        help="where the robot should end up: x,y,heading")
+    parser.add_argument("--start", default="0,0,0", help="planned start pose: x,y,heading")
+    parser.add_argument("--runs", type=int, default=1000)
+    parser.add_argument("--tolerance", type=float, default=2.0,
+                        help="success: this close to the target (inches, default 2)")
+    parser.add_argument("--heading-tolerance", type=float, default=5.0,
+                        help="success: this close to the target heading (degrees, default 5)")
+    for name, value in NOISE.items():
+        parser.add_argument("--" + name.replace("_", "-"), type=float, default=value,
+                            help="default %s" % value)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--limit", type=float, default=15.0,
+                        help="simulated seconds per run (default 15, the autonomous period)")
+    parser.add_argument("--constants", help="JSON file of constants, e.g. from sim/tune.py")
+    parser.add_argument("--workers", type=int, help="worker processes (default: all CPUs)")
+    parser.add_argument("--replay", type=int, metavar="N", help="run number N again and show it")
+    parser.add_argument("--out", help="save the summary and every run as JSON")
+    args = parser.parse_args(argv)
+
+    target = tuple(float(part) for part in args.target.split(","))
+    start = tuple(float(part) for part in args.start.split(","))
+    noise = {name: getattr(args, name) for name in NOISE}
+    constants = {}
+    if args.constants:
+        with open(args.constants) as handle:
+            data = json.load(handle)
+        constants.update(data.get("constants", data))
+    options = dict(call=args.call, tolerance=args.tolerance,
+                   heading_tolerance=args.heading_tolerance, noise=noise, start=start,
+                   seed=args.seed, limit=args.limit, constants=constants)
+
+    if args.replay is not None:
+        job = dict(options, program=args.program, target=target, noise=noise)
+        run = run_once(job, args.replay)
+        for name, value in run.items():
+            print("%-15s %s" % (name, "%.3f" % value if isinstance(value, float) else value))
+        return 0 if run["success"] else 1
+
+    began = time.perf_counter()
+    runs = study(args.program, target, runs=args.runs, workers=args.workers, **options)
+    took = time.perf_counter() - began
+    summary = summarize(runs)
+    print(format_summary(summary, _worst(runs)))
+    print("\n%d runs in %.1f s (%.0f runs/s)" % (len(runs), took, len(runs) / took))
+    if args.out:
+        with open(args.out, "w") as handle:
+            json.dump({"program": args.program, "call": args.call, "target": target,
+                       "noise": noise, "seed": args.seed, "summary": summary,
+                       "runs": runs}, handle, indent=1)
+            handle.write("\n")
+        print("results saved to", args.out)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,246 @@
+"""
+Run a curriculum program in the headless simulator.
+
+Examples:
+    python sim/run.py main-06.py                        # the square demo
+    python sim/run.py main-09.py --call autonomous      # just the autonomous
+    python sim/run.py main-09.py --match                # a whole match, like the field
+    python sim/run.py main-05.py --limit 10 --input drive.json
+    python sim/run.py main-06.py --set TURN_SPEED=50    # try a different constant
+
+The program runs exactly as written: `from vex import *` picks up sim/vex.py,
+and wait() advances a virtual clock instead of sleeping.
+"""
+
+import argparse
+import ast
+import json
+import os
+import re
+import runpy
+import sys
+import time
+from dataclasses import dataclass, field
+
+SIM_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_DIR = os.path.dirname(SIM_DIR)
+for _path in (SIM_DIR, REPO_DIR):
+    if _path not in sys.path:
+        sys.path.insert(0, _path)
+
+import vex  # noqa: E402  (the simulator, found through SIM_DIR)
+
+DISABLED_MS = 3000       # before autonomous, while pre_autonomous runs
+AUTONOMOUS_MS = 15000
+DRIVER_MS = 105000
+
+
+@dataclass
+class Result:
+    """What happened during one simulated run."""
+
+    program: str
+    sim_time: float                      # seconds of simulated time
+    wall_time: float                     # seconds of real time
+    pose: tuple                          # final (x, y, heading)
+    screen: list = field(default_factory=list)
+    stats: dict = field(default_factory=dict)
+    errors: list = field(default_factory=list)
+    timed_out: bool = False
+    namespace: dict = field(default_factory=dict, repr=False)
+    world: object = field(default=None, repr=False)
+
+
+def set_constants(source, constants):
+    """
+    Replace top-level `NAME = ...` lines in a program's source, so the
+    program runs with different constants. Every name must be found.
+    """
+    for name, value in constants.items():
+        pattern = re.compile(r"^%s\s*=.*$" % re.escape(name), re.MULTILINE)
+        source, count = pattern.subn("%s = %r" % (name, value), source, count=1)
+        if count == 0:
+            raise KeyError("no constant %s in the program" % name)
+    return source
+
+
+def parse_value(text):
+    """A constant from the command line: a number, True/False, or a string."""
+    try:
+        return ast.literal_eval(text)
+    except (ValueError, SyntaxError):
+        return text
+
+
+def load_program(path, as_main=True, constants=None):
+    """
+    Execute a program file. Returns its globals (functions, motors, ...).
+    constants: {name: value} to use instead of the values in the file.
+    """
+    run_name = "__main__" if as_main else "__sim__"
+    if as_main and not constants:
+        return runpy.run_path(path, run_name=run_name)
+    namespace = {"__name__": run_name, "__file__": path}
+    exec(_compiled(path, constants or {}), namespace)
+    return namespace
+
+
+_CODE_CACHE = {}
+
+
+def _compiled(path, constants):
+    """
+    The program's code with `constants` filled in. Compiled once per file
+    version and set of constants, so repeated runs (sim/tune.py,
+    sim/montecarlo.py) skip reading and compiling it again.
+    """
+    key = (os.path.abspath(path), os.path.getmtime(path), repr(sorted(constants.items())))
+    code = _CODE_CACHE.get(key)
+    if code is None:
+        with open(path) as handle:
+            source = set_constants(handle.read(), constants)
+        code = _CODE_CACHE[key] = compile(source, path, "exec")
+    return code
+
+
+def run_match(world, autonomous_ms=AUTONOMOUS_MS, driver_ms=DRIVER_MS,
+              disabled_ms=DISABLED_MS):
+    """
+    Field control: the robot waits disabled for `disabled_ms` (while its
+    pre-autonomous setup runs), then each phase is enabled with the callbacks
+    the program registered. Runs in its own thread beside the program, like
+    the real field, and ends the run when the match is over.
+    """
+    vex.wait(disabled_ms, vex.MSEC)
+    competition = world.competition
+    if competition is None:
+        raise RuntimeError("program did not create a Competition")
+    for phase, callback, duration in (("autonomous", competition._autonomous, autonomous_ms),
+                                      ("driver", competition._driver, driver_ms)):
+        if callback is None or duration <= 0:
+            continue
+        competition.phase = phase
+        thread = vex.Thread(callback)
+        vex.wait(duration, vex.MSEC)
+        thread.stop()
+        for motor in world.motors.values():
+            motor.goal = None
+            motor.target = 0.0
+        competition.phase = "disabled"
+    world.time_limit = world.now      # the match is over: end the run here
+
+
+def run_program(path, call=None, match=False, time_limit=120.0, model=None,
+                field=None, inputs=None, as_main=True, costs=None, setup=None,
+                constants=None):
+    """
+    Run a program headlessly and return a Result.
+
+    path:       program file, e.g. "main-09.py"
+    call:       name of a function to call after loading (e.g. "autonomous")
+    match:      play a full match with the registered Competition callbacks
+                (the program may keep running, e.g. in a CompetitionRuntime)
+    time_limit: simulated seconds before the run is stopped (with match, at
+                least the length of the match)
+    model:      vex.RobotModel (robot size, noise, start pose)
+    field:      vex.Field (lines and colors for the optical sensor)
+    inputs:     controller script, list of (time_ms, name, value)
+    setup:      optional function(namespace) called before `call`, e.g. to
+                start a monitor thread
+    constants:  {name: value} replacing constants at the top of the program
+    """
+    limit_ms = time_limit * 1000.0
+    if match:
+        # the whole match, and a second to spare
+        limit_ms = max(limit_ms, DISABLED_MS + AUTONOMOUS_MS + DRIVER_MS + 1000.0)
+    world = vex.reset(model=model, field=field, time_limit=limit_ms, costs=costs)
+    if inputs:
+        world.script_inputs(inputs)
+    if match:
+        vex.Thread(run_match, (world,))
+    namespace = {}
+    timed_out = False
+    start = time.perf_counter()
+    try:
+        namespace = load_program(path, as_main=as_main, constants=constants)
+        if setup is not None:
+            setup(namespace)
+        if call:
+            namespace[call]()
+        while match:
+            vex.wait(100, vex.MSEC)     # until run_match ends the run
+    except vex.SimulationEnd:
+        # run_match lowers the limit when the match is over; that is not a timeout
+        timed_out = world.time_limit >= limit_ms
+    finally:
+        world.shutdown()
+    wall = time.perf_counter() - start
+    screen = world.screen_lines
+    return Result(program=path, sim_time=world.now / 1000.0, wall_time=wall,
+                  pose=world.pose(), screen=list(screen), stats=dict(world.stats),
+                  errors=list(world.errors), timed_out=timed_out,
+                  namespace=namespace, world=world)
+
+
+def _load_inputs(path):
+    """
+    Input scripts are JSON lists of [time_ms, name, value], or driver
+    recordings from robot/replay.py ("time_ms name value" lines).
+    """
+    with open(path) as handle:
+        text = handle.read()
+    if text.lstrip().startswith("["):
+        return [tuple(event) for event in json.loads(text)]
+    from robot.replay import parse_events
+    return parse_events(text)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("program", help="program to run, e.g. main-09.py")
+    parser.add_argument("--call", help="function to call after loading, e.g. autonomous")
+    parser.add_argument("--match", action="store_true",
+                        help="play 3 s disabled, 15 s autonomous, then 1:45 driver control")
+    parser.add_argument("--limit", type=float, default=120.0,
+                        help="stop after this many simulated seconds (default 120)")
+    parser.add_argument("--input", help="JSON controller script [[time_ms, name, value], ...]")
+    parser.add_argument("--set", action="append", default=[], metavar="NAME=VALUE",
+                        help="run with a different constant (repeat for more)")
+    parser.add_argument("--constants", help="JSON file of constants, e.g. from sim/tune.py")
+    parser.add_argument("--quiet", action="store_true", help="do not print the screen output")
+    args = parser.parse_args(argv)
+
+    inputs = _load_inputs(args.input) if args.input else None
+    constants = {}
+    if args.constants:
+        with open(args.constants) as handle:
+            data = json.load(handle)
+        constants.update(data.get("constants", data))
+    for item in args.set:
+        name, _, value = item.partition("=")
+        constants[name.strip()] = parse_value(value.strip())
+    # With --call, load the program without running its main block (which
+    # may never return, like main-09's runtime.run())
+    result = run_program(args.program, call=args.call, match=args.match,
+                         time_limit=args.limit, inputs=inputs, constants=constants,
+                         as_main=not args.call)
+
+    if not args.quiet:
+        for line in result.screen:
+            print("screen |", line)
+    x, y, heading = result.pose
+    print("simulated time: %.3f s%s" % (result.sim_time,
+                                        " (time limit reached)" if result.timed_out else ""))
+    print("wall time:      %.3f s" % result.wall_time)
+    print("final pose:     x=%.2f in  y=%.2f in  heading=%.1f deg" % (x, y, heading))
+    print("device calls:   %d motor commands, %d sensor reads, %d screen calls" % (
+        result.stats["motor_commands"], result.stats["sensor_reads"],
+        result.stats["screen_calls"]))
+    for error in result.errors:
+        print("thread error:  ", repr(error))
+    return 1 if result.errors else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
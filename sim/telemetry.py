@@ -0,0 +1,87 @@
+"""
+Load a telemetry log recorded by robot/telemetry.py into NumPy arrays.
+
+Examples:
+    python sim/telemetry.py auton.vxt                 # list channels and stats
+    python sim/telemetry.py auton.vxt --csv out.csv   # convert to CSV
+
+From Python:
+    from telemetry import load
+
+    log = load("auton.vxt")
+    log["time_ms"]                 # uint32 array, one entry per sample
+    log["imu.heading"]             # float32 array
+    log.dtype.names                # every channel
+
+Logs recorded in the simulator are in World.sd_files; pass the bytes to
+decode(). Needs NumPy (pip install numpy).
+"""
+
+import argparse
+import os
+import struct
+import sys
+
+import numpy as np
+
+SIM_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_DIR = os.path.dirname(SIM_DIR)
+for _path in (SIM_DIR, REPO_DIR):
+    if _path not in sys.path:
+        sys.path.insert(0, _path)
+
+from robot.telemetry import HEADER_FORMAT, MAGIC  # noqa: E402
+
+
+def decode(data):
+    """
+    Turn the bytes of a log into a NumPy structured array with a
+    "time_ms" field and one float32 field per channel.
+    """
+    data = bytes(data)
+    header_size = struct.calcsize(HEADER_FORMAT)
+    magic, names_size = struct.unpack_from(HEADER_FORMAT, data, 0)
+    if magic != MAGIC:
+        raise ValueError("not a telemetry log (bad magic %r)" % magic)
+    names_end = header_size + names_size
+    names = data[header_size:names_end].decode().split(",") if names_size else []
+    dtype = np.dtype([("time_ms", "<u4")] + [(name, "<f4") for name in names])
+    count = (len(data) - names_end) // dtype.itemsize
+    return np.frombuffer(data, dtype=dtype, count=count, offset=names_end)
+
+
+def load(path):
+    """Read a log file from disk (see decode())."""
+    with open(path, "rb") as handle:
+        return decode(handle.read())
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("log", help="telemetry file copied from the SD card")
+    parser.add_argument("--csv", help="also write every sample to this CSV file")
+    args = parser.parse_args(argv)
+
+    log = load(args.log)
+    if len(log) == 0:
+        print("no samples")
+        return 0
+    times = log["time_ms"].astype(np.float64)
+    print("%d samples over %.2f s" % (len(log), (times[-1] - times[0]) / 1000.0))
+    if len(log) > 1:
+        gaps = np.diff(times)
+        print("sample period: mean %.2f ms, max %.2f ms" % (gaps.mean(), gaps.max()))
+    for name in log.dtype.names[1:]:
+        values = log[name]
+        print("%-20s min %10.2f  mean %10.2f  max %10.2f" % (
+            name, values.min(), values.mean(), values.max()))
+    if args.csv:
+        np.savetxt(args.csv, np.column_stack([log[name] for name in log.dtype.names]),
+                   delimiter=",", header=",".join(log.dtype.names), comments="",
+                   fmt="%.6g")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,275 @@
+"""
+Tune a program's constants by running it many times in the simulator.
+
+Each trial runs the program with different constants, in parallel worker
+processes, and gets a score (lower is better):
+
+    score = time_weight * simulated seconds
+          + pose_weight * inches from --target
+          + heading_weight * degrees from the target heading
+          + line_weight * RMS inches off the line edge (with --field line)
+
+Examples:
+    # the square of main-06.py: fast, and back where it started
+    python sim/tune.py main-06.py --target 0,0,0 \\
+        --param MAX_TURN_SPEED=40,60,80,100 --param TURN_TOLERANCE=0.5,1,2
+
+    # main-08.py's follow_line_simple(8) on a taped line, 40 random tries
+    python sim/tune.py main-08.py --call follow_line_simple --args 8 --field line \\
+        --param DRIVE_SPEED=20:60 --param TURN_SPEED=5:30 \\
+        --param BRIGHTNESS_THRESHOLD=30:70 --search random --trials 40
+
+A parameter is a list (A,B,C) or a range (LOW:HIGH, or LOW:HIGH:STEP for a
+grid). Whole-number ranges give whole numbers. The best constants are saved
+to a JSON file that sim/run.py can use:
+
+    python sim/run.py main-06.py --constants tuned-main-06.json
+"""
+
+import argparse
+import itertools
+import json
+import math
+import os
+import random
+import sys
+from concurrent.futures import ProcessPoolExecutor
+
+SIM_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_DIR = os.path.dirname(SIM_DIR)
+for _path in (SIM_DIR, REPO_DIR):
+    if _path not in sys.path:
+        sys.path.insert(0, _path)
+
+import vex  # noqa: E402
+from run import parse_value, run_program  # noqa: E402
+
+LINE_WIDTH = 0.75
+# A straight, a bend to the right, and a long straight
+LINE_SEGMENTS = [(0.0, -20.0, 0.0, 60.0), (0.0, 60.0, 30.0, 120.0), (30.0, 120.0, 30.0, 400.0)]
+
+
+def make_field(name):
+    """A named test field (and the robot's start pose on it)."""
+    if name is None:
+        return None, None
+    if name == "line":
+        lines = [segment + (LINE_WIDTH,) for segment in LINE_SEGMENTS]
+        # Start just left of the line, so the sensor sits on its left edge
+        return vex.Field(lines=lines, edge=0.5), vex.RobotModel(start_pose=(-0.4, 0.0, 0.0))
+    raise ValueError("unknown field: " + name)
+
+
+# ============================================================================
+# PARAMETERS
+# ============================================================================
+
+def parse_param(text):
+    """
+    "NAME=A,B,C" -> (NAME, [A, B, C])
+    "NAME=LOW:HIGH:STEP" -> (NAME, [LOW, LOW+STEP, ..., HIGH])
+    "NAME=LOW:HIGH" -> (NAME, (LOW, HIGH)), a range for random search
+    """
+    name, _, spec = text.partition("=")
+    name = name.strip()
+    if not name or not spec:
+        raise ValueError("expected NAME=VALUES, got %r" % text)
+    if ":" in spec:
+        parts = [parse_value(part) for part in spec.split(":")]
+        if len(parts) == 2:
+            return name, (parts[0], parts[1])
+        low, high, step = parts
+        count = int(math.floor((high - low) / step + 1e-9)) + 1
+        return name, [_tidy(low + i * step) for i in range(count)]
+    return name, [parse_value(part.strip()) for part in spec.split(",")]
+
+
+def _tidy(value):
+    return round(value, 6) if isinstance(value, float) else value
+
+
+def grid(params):
+    """Every combination. Ranges without a step are split into 5 values."""
+    names = [name for name, _ in params]
+    choices = []
+    for _, values in params:
+        if isinstance(values, tuple):
+            low, high = values
+            values = [_pick(low, high, i / 4.0) for i in range(5)]
+            values = sorted(set(values), key=values.index)
+        choices.append(values)
+    return [dict(zip(names, combo)) for combo in itertools.product(*choices)]
+
+
+def random_search(params, trials, seed=0):
+    """`trials` random combinations (lists: one of the values, ranges: anywhere)."""
+    rng = random.Random(seed)
+    combos = []
+    for _ in range(trials):
+        combo = {}
+        for name, values in params:
+            if isinstance(values, tuple):
+                combo[name] = _pick(values[0], values[1], rng.random())
+            else:
+                combo[name] = rng.choice(values)
+        combos.append(combo)
+    return combos
+
+
+def _pick(low, high, fraction):
+    value = low + (high - low) * fraction
+    if isinstance(low, int) and isinstance(high, int):
+        return int(round(value))
+    return round(value, 4)
+
+
+# ============================================================================
+# TRIALS
+# ============================================================================
+
+def run_trial(job):
+    """Run the program once with one set of constants (in a worker process)."""
+    constants = job["constants"]
+    field, model = make_field(job["field"])
+    line_errors = []
+
+    def setup(namespace):
+        if job["field"] == "line":
+            vex.Thread(_watch_line, (line_errors,))
+        if job["call"]:
+            namespace[job["call"]](*job["args"])
+
+    trial = {"constants": constants}
+    try:
+        result = run_program(job["program"], time_limit=job["limit"], field=field,
+                             model=model, as_main=not job["call"], setup=setup,
+                             constants=constants)
+    except Exception as error:        # a bad value can crash the program
+        trial.update(status="error: %r" % error, score=math.inf)
+        return trial
+
+    x, y, heading = result.pose
+    trial["time"] = result.sim_time
+    trial["pose"] = (round(x, 2), round(y, 2), round(heading, 1))
+    score = job["time_weight"] * result.sim_time
+    if job["target"] is not None:
+        tx, ty, theading = job["target"]
+        trial["pose_error"] = math.hypot(x - tx, y - ty)
+        trial["heading_error"] = abs((heading - theading + 180) % 360 - 180)
+        score += job["pose_weight"] * trial["pose_error"]
+        score += job["heading_weight"] * trial["heading_error"]
+    if line_errors:
+        trial["line_rms"] = math.sqrt(sum(e * e for e in line_errors) / len(line_errors))
+        score += job["line_weight"] * trial["line_rms"]
+
+    if result.errors:
+        trial.update(status="error: %r" % result.errors[0], score=math.inf)
+    elif result.timed_out and not job["call"]:
+        trial.update(status="time limit", score=math.inf)
+    else:
+        trial.update(status="ok", score=score)
+    return trial
+
+
+def _watch_line(errors, period_ms=20):
+    """Record how far the optical sensor is from the line's edge."""
+    world = vex.world()
+    while True:
+        x, y = world.optical_point()
+        distance = min(vex._distance_to_segment(x, y, *segment) for segment in LINE_SEGMENTS)
+        errors.append(abs(distance - LINE_WIDTH / 2))
+        vex.wait(period_ms, vex.MSEC)
+
+
+def tune(program, combos, call=None, args=(), field=None, target=None, limit=60.0,
+         workers=None, time_weight=1.0, pose_weight=1.0, heading_weight=0.1,
+         line_weight=10.0):
+    """Run every combination and return the trials, best first."""
+    base = {"program": program, "call": call, "args": tuple(args), "field": field,
+            "target": target, "limit": limit, "time_weight": time_weight,
+            "pose_weight": pose_weight, "heading_weight": heading_weight,
+            "line_weight": line_weight}
+    jobs = [dict(base, constants=combo) for combo in combos]
+    if workers == 1:
+        trials = [run_trial(job) for job in jobs]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            trials = list(pool.map(run_trial, jobs))
+    return sorted(trials, key=lambda trial: trial["score"])
+
+
+def format_table(trials, names, top=10):
+    """The best `top` trials as a text table."""
+    line = any("line_rms" in trial for trial in trials)
+    columns = ["rank", "score", "time"] + list(names) + ["pose"]
+    columns += ["off line"] if line else []
+    columns += ["status"]
+    rows = []
+    for rank, trial in enumerate(trials[:top], 1):
+        row = [str(rank), "%.3f" % trial["score"], "%.2f" % trial.get("time", math.nan)]
+        row += [str(trial["constants"][name]) for name in names]
+        row += [str(trial.get("pose", "-"))]
+        row += ["%.2f" % trial.get("line_rms", math.nan)] if line else []
+        row += [trial["status"]]
+        rows.append(row)
+    widths = [max(len(column), *(len(row[i]) for row in rows)) if rows else len(column)
+              for i, column in enumerate(columns)]
+    lines = ["  ".join(column.ljust(width) for column, width in zip(columns, widths))]
+    for row in rows:
+        lines.append("  ".join(cell.ljust(width) for cell, width in zip(row, widths)))
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("program", help="program to tune, e.g. main-06.py")
+    parser.add_argument("--param", action="append", required=True, metavar="NAME=VALUES",
+                        help="a constant to try: A,B,C or LOW:HIGH[:STEP] (repeat for more)")
+    parser.add_argument("--call", help="function to run instead of the main program")
+    parser.add_argument("--args", nargs="*", default=[], help="arguments for --call")
+    parser.add_argument("--field", choices=["line"], help="test field (line = taped line)")
+    parser.add_argument("--target", help="where the robot should end up: x,y,heading")
+    parser.add_argument("--search", choices=["grid", "random"], default="grid")
+    parser.add_argument("--trials", type=int, default=30, help="tries for --search random")
+    parser.add_argument("--seed", type=int, default=0, help="random seed for --search random")
+    parser.add_argument("--workers", type=int, help="worker processes (default: all CPUs)")
+    parser.add_argument("--limit", type=float, default=60.0, help="simulated seconds per run")
+    parser.add_argument("--time-weight", type=float, default=1.0)
+    parser.add_argument("--pose-weight", type=float, default=1.0)
+    parser.add_argument("--heading-weight", type=float, default=0.1)
+    parser.add_argument("--line-weight", type=float, default=10.0)
+    parser.add_argument("--top", type=int, default=10, help="rows to print")
+    parser.add_argument("--out", help="best constants file (default tuned-<program>.json)")
+    args = parser.parse_args(argv)
+
+    params = [parse_param(text) for text in args.param]
+    if args.search == "grid":
+        combos = grid(params)
+    else:
+        combos = random_search(params, args.trials, args.seed)
+    target = tuple(float(part) for part in args.target.split(",")) if args.target else None
+
+    print("%d trials of %s" % (len(combos), args.program))
+    trials = tune(args.program, combos, call=args.call,
+                  args=[parse_value(arg) for arg in args.args], field=args.field,
+                  target=target, limit=args.limit, workers=args.workers,
+                  time_weight=args.time_weight, pose_weight=args.pose_weight,
+                  heading_weight=args.heading_weight, line_weight=args.line_weight)
+    print(format_table(trials, [name for name, _ in params], args.top))
+
+    best = trials[0]
+    if math.isinf(best["score"]):
+        print("every trial failed")
+        return 1
+    out = args.out or "tuned-%s.json" % os.path.splitext(os.path.basename(args.program))[0]
+    with open(out, "w") as handle:
+        json.dump({"program": args.program, "score": best["score"],
+                   "constants": best["constants"]}, handle, indent=2)
+        handle.write("\n")
+    print("best constants saved to", out)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
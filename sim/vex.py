@@ -0,0 +1,1255 @@
+# Headless VEX Simulator
+# A pure-Python stand-in for the V5 `vex` module so every main-XX.py can run on
+# a laptop, faster than real time.
+#
+# How it works:
+# - A VIRTUAL CLOCK replaces the real one. wait() advances simulated time
+#   instead of sleeping, so a 15 second autonomous finishes in milliseconds.
+# - Threads are COOPERATIVE, just like on the V5 brain: only one runs at a time,
+#   and a thread only gives up control when it calls wait().
+# - The drive motors move a DIFFERENTIAL-DRIVE ROBOT around a virtual field.
+#   The inertial sensor reads the robot's heading, and the optical sensor reads
+#   the field underneath it.
+#
+# This file is only for the computer. The real brain has its own vex module.
+# Run a program with:  python sim/run.py main-09.py --call autonomous
+
+import heapq
+import math
+import random
+import threading
+
+__all__ = [
+    # Devices
+    "Brain", "Motor", "Inertial", "Optical", "Controller", "Competition",
+    "Thread", "Timer", "Event",
+    # Functions
+    "wait", "sleep",
+    # Unit and type namespaces
+    "Ports", "DistanceUnits", "RotationUnits", "TimeUnits", "DirectionType",
+    "VelocityUnits", "PercentUnits", "CurrentUnits", "TorqueUnits",
+    "VoltageUnits", "TemperatureUnits", "BrakeType", "SoundType", "FontType",
+    "Color", "LedStateType", "GearSetting", "TurnType",
+    # Shortcut constants (the real vex module exports these too)
+    "FORWARD", "REVERSE", "PERCENT", "RPM", "DPS", "DEGREES", "TURNS",
+    "SECONDS", "MSEC", "INCHES", "MM", "HOLD", "BRAKE", "COAST",
+]
+
+# ============================================================================
+# CONSTANTS AND UNITS
+# ============================================================================
+
+class _Const:
+    """A named constant, like DirectionType.FWD on the real brain."""
+
+    def __init__(self, group, name, value):
+        self.group = group
+        self.name = name
+        self.value = value
+
+    def __repr__(self):
+        return self.group + "." + self.name
+
+
+def _namespace(group, **values):
+    """Build a class whose attributes are _Const objects (DirectionType.FWD...)."""
+    attrs = {}
+    for name, value in values.items():
+        attrs[name] = _Const(group, name, value)
+    return type(group, (), attrs)
+
+
+Ports = _namespace("Ports", **{"PORT" + str(n): n for n in range(1, 22)})
+DistanceUnits = _namespace("DistanceUnits", IN=25.4, MM=1.0, CM=10.0)
+RotationUnits = _namespace("RotationUnits", DEG=1.0, REV=360.0, RAW=1.0)
+TimeUnits = _namespace("TimeUnits", SEC=1000.0, MSEC=1.0)
+DirectionType = _namespace("DirectionType", FWD=1, REV=-1, UNDEFINED=0)
+VelocityUnits = _namespace("VelocityUnits", PCT="pct", RPM="rpm", DPS="dps")
+PercentUnits = _namespace("PercentUnits", PERCENT="pct")
+CurrentUnits = _namespace("CurrentUnits", AMP="amp")
+TorqueUnits = _namespace("TorqueUnits", NM="nm", INLB="inlb")
+VoltageUnits = _namespace("VoltageUnits", VOLT="volt", MV="mv")
+TemperatureUnits = _namespace("TemperatureUnits", CELSIUS="c", FAHRENHEIT="f")
+BrakeType = _namespace("BrakeType", COAST="coast", BRAKE="brake", HOLD="hold")
+SoundType = _namespace("SoundType", SIREN="siren", POWER_DOWN="power_down",
+                       TADA="tada", ALARM="alarm", DOOR_CLOSE="door_close")
+FontType = _namespace("FontType", MONO12=12, MONO15=15, MONO20=20, MONO30=30,
+                      MONO40=40, MONO60=60, PROP20=20, PROP30=30)
+LedStateType = _namespace("LedStateType", ON=1, OFF=0)
+GearSetting = _namespace("GearSetting", RATIO_36_1=100, RATIO_18_1=200,
+                         RATIO_6_1=600)
+TurnType = _namespace("TurnType", LEFT=-1, RIGHT=1)
+Color = _namespace("Color", BLACK=0x000000, WHITE=0xFFFFFF, RED=0xFF0000,
+                   GREEN=0x00FF00, BLUE=0x0000FF, YELLOW=0xFFFF00,
+                   ORANGE=0xFFA500, PURPLE=0xFF00FF, CYAN=0x00FFFF,
+                   TRANSPARENT=-1)
+
+FORWARD = DirectionType.FWD
+REVERSE = DirectionType.REV
+PERCENT = VelocityUnits.PCT
+RPM = VelocityUnits.RPM
+DPS = VelocityUnits.DPS
+DEGREES = RotationUnits.DEG
+TURNS = RotationUnits.REV
+SECONDS = TimeUnits.SEC
+MSEC = TimeUnits.MSEC
+INCHES = DistanceUnits.IN
+MM = DistanceUnits.MM
+HOLD = BrakeType.HOLD
+BRAKE = BrakeType.BRAKE
+COAST = BrakeType.COAST
+
+
+def _ms(time, units):
+    """Convert a time in the given units to milliseconds."""
+    if isinstance(units, _Const):
+        return time * units.value
+    return time
+
+
+def _direction_sign(direction):
+    if isinstance(direction, _Const):
+        return direction.value
+    return 1
+
+
+# ============================================================================
+# SIMULATION SETTINGS
+# ============================================================================
+
+class RobotModel:
+    """
+    Physical description of the simulated robot.
+
+    The defaults match the curriculum robot: four 200 RPM motors on 4 inch
+    wheels, left side on PORT20/PORT19, right side on PORT11/PORT12.
+    The noise settings are all zero, so runs are repeatable unless you ask
+    for randomness (see montecarlo.py).
+    """
+
+    def __init__(self, **settings):
+        self.left_ports = (20, 19)
+        self.right_ports = (11, 12)
+        self.wheel_diameter = 4.0          # inches
+        self.track_width = 12.0            # inches between left and right wheels
+        self.gear_ratio = 1.0              # wheel turns per motor turn
+        self.max_rpm = 200.0               # green cartridge
+        self.motor_time_constant = 0.06    # seconds for a motor to reach ~63% of target
+        self.coast_time_constant = 0.35    # seconds to spin down when coasting
+        self.start_pose = (0.0, 0.0, 0.0)  # x inches, y inches, heading degrees
+        self.optical_offset = 6.0          # optical sensor distance in front of center
+        # Limited travel for mechanism motors: {port: (min_degrees, max_degrees)},
+        # in degrees from where the motor was at the start. The grabber
+        # (PORT1) starts 20 degrees closed from its fully open end stop.
+        self.hard_stops = {1: (-20.0, 110.0)}
+        # Noise (all off by default)
+        self.motor_gain = {}               # {port: multiplier on achieved speed}
+        self.wheel_slip = 0.0              # fraction of wheel travel lost
+        self.imu_drift = 0.0               # degrees per second of heading drift
+        self.imu_noise = 0.0               # degrees of random heading noise
+        self.battery = 1.0                 # fraction of full voltage (sag < 1.0)
+        self.seed = None
+        for name, value in settings.items():
+            if not hasattr(self, name):
+                raise AttributeError("RobotModel has no setting '" + name + "'")
+            setattr(self, name, value)
+
+    @property
+    def wheel_circumference(self):
+        return self.wheel_diameter * math.pi
+
+
+class Field:
+    """
+    What the optical sensor sees on the floor.
+
+    lines:   list of (x1, y1, x2, y2, width) dark tape segments, in inches
+    patches: list of (x, y, radius, hue) colored circles, in inches
+    edge:    width in inches over which brightness fades from line to floor
+             (the real sensor sees a small spot, not a point). 0 = sharp edge.
+    """
+
+    def __init__(self, lines=(), patches=(), floor_brightness=80.0,
+                 line_brightness=10.0, floor_hue=200.0, noise=0.0, edge=0.0):
+        self.lines = list(lines)
+        self.patches = list(patches)
+        self.floor_brightness = floor_brightness
+        self.line_brightness = line_brightness
+        self.floor_hue = floor_hue
+        self.noise = noise
+        self.edge = edge
+
+    def brightness_at(self, x, y):
+        brightness = self.floor_brightness
+        for x1, y1, x2, y2, width in self.lines:
+            outside = _distance_to_segment(x, y, x1, y1, x2, y2) - width / 2
+            if self.edge > 0:
+                fraction = min(1.0, max(0.0, outside / self.edge + 0.5))
+            else:
+                fraction = 0.0 if outside <= 0 else 1.0
+            seen = self.line_brightness + (self.floor_brightness - self.line_brightness) * fraction
+            brightness = min(brightness, seen)
+        return brightness
+
+    def hue_at(self, x, y):
+        for px, py, radius, hue in self.patches:
+            if (x - px) ** 2 + (y - py) ** 2 <= radius * radius:
+                return hue
+        return self.floor_hue
+
+
+def _distance_to_segment(x, y, x1, y1, x2, y2):
+    dx = x2 - x1
+    dy = y2 - y1
+    length_squared = dx * dx + dy * dy
+    if length_squared == 0:
+        return math.hypot(x - x1, y - y1)
+    t = max(0.0, min(1.0, ((x - x1) * dx + (y - y1) * dy) / length_squared))
+    return math.hypot(x - (x1 + t * dx), y - (y1 + t * dy))
+
+
+# Simulated cost of device calls, in milliseconds of brain time.
+# The real brain is not infinitely fast; screen drawing is the slowest thing.
+DEFAULT_COSTS = {
+    "motor_command": 0.02,
+    "sensor_read": 0.01,
+    "screen": 0.4,
+    "render": 2.0,
+}
+
+
+# ============================================================================
+# THE SIMULATED WORLD (virtual clock, threads and physics)
+# ============================================================================
+
+class SimulationEnd(BaseException):
+    """Raised inside the program when the simulated time limit is reached."""
+
+
+class _TaskExit(BaseException):
+    """Raised inside a background thread to stop it."""
+
+
+class _Wakeup:
+    """
+    Hands the turn to a waiting thread. Like threading.Event, but wait()
+    also clears it, and it is built on a bare lock, which is much cheaper
+    when the turn changes hands hundreds of times per simulated second.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._lock.acquire()
+
+    def set(self):
+        try:
+            self._lock.release()
+        except RuntimeError:
+            pass                # already set
+
+    def wait(self, timeout=-1):
+        return self._lock.acquire(timeout=timeout)
+
+
+class _Task:
+    """One cooperative thread of the simulated program."""
+
+    def __init__(self, world, callback, args, is_main=False):
+        self.world = world
+        self.callback = callback
+        self.args = args
+        self.is_main = is_main
+        self.resume = _Wakeup()
+        self.killed = False
+        self.finished = False
+        self.thread = None
+        self.commands = 0          # motor commands sent from this thread
+        self.first_command = None  # when the first and last of them were sent
+        self.last_command = None
+        self.wake_times = []       # when each wait() in this thread ended
+
+    def start(self):
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        self.thread.start()
+
+    def _run(self):
+        self.resume.wait()
+        try:
+            if not self.killed and not self.world.ended:
+                self.callback(*self.args)
+        except (_TaskExit, SimulationEnd):
+            pass
+        except Exception as error:  # a crash in a thread should not hang the sim
+            self.world.errors.append(error)
+        finally:
+            self.finished = True
+            if self.world.shutting_down:
+                pass
+            elif self.world.ended:
+                self.world._main.resume.set()
+            else:
+                self.world._hand_off()
+
+
+class _SimMotor:
+    """Physics state for one motor."""
+
+    def __init__(self, port, reversed_):
+        self.port = port
+        self.reversed = reversed_
+        self.position = 0.0      # shaft degrees, in the motor's own frame
+        self.zero = 0.0          # where set_position() moved the encoder's zero to
+        self.velocity = 0.0      # shaft RPM, in the motor's own frame
+        self.target = 0.0        # commanded RPM
+        self.goal = None         # position goal for spin_for / spin_to_position
+        self.stopping = "brake"
+        self.hold_at = None
+        self.current = 0.0
+        self.commands = 0
+
+
+class World:
+    """
+    Everything that exists in one simulation run.
+
+    Use reset() to start a fresh run. Devices created after reset() belong
+    to the new world.
+    """
+
+    def __init__(self, model=None, field=None, time_limit=None, costs=None):
+        self.model = model or RobotModel()
+        self.field = field or Field()
+        self.physics_step = 5.0                      # milliseconds
+        self._physics_time = 0.0
+        self.time_limit = time_limit                 # milliseconds, or None
+        self.costs = dict(DEFAULT_COSTS)
+        if costs:
+            self.costs.update(costs)
+        self.random = random.Random(self.model.seed)
+        self.now = 0.0                               # milliseconds
+        self.x, self.y, self.heading = self.model.start_pose
+        self.rotation = self.heading                 # unwrapped heading
+        self.motors = {}
+        self.imu_bias = 0.0
+        self.calibrate_until = 0.0
+        self.controllers = []
+        self.competition = None
+        self.screen_lines = []
+        self.sounds = []
+        self.sd_files = {}
+        self.inputs = []                             # scripted controller input
+        self.errors = []
+        self.stats = {"motor_commands": 0, "sensor_reads": 0, "screen_calls": 0}
+        self.ended = False
+        self.shutting_down = False
+        self._queue = []
+        self._seq = 0
+        self._tasks = []
+        self._current = _Task(self, None, (), is_main=True)
+        self._main = self._current
+
+    # ---- virtual clock ------------------------------------------------------
+
+    @property
+    def time_limit(self):
+        """Simulated milliseconds before the run ends, or None."""
+        return self._time_limit
+
+    @time_limit.setter
+    def time_limit(self, ms):
+        self._time_limit = ms
+        self._plan_quiet()
+
+    def _plan_quiet(self):
+        """Until when the clock can move without anything else to do."""
+        self._quiet_until = self._physics_time + self.physics_step
+        if self._time_limit is not None:
+            self._quiet_until = min(self._quiet_until, self._time_limit)
+
+    def charge(self, kind):
+        """Spend the simulated time a device call takes (see DEFAULT_COSTS)."""
+        cost = self.costs.get(kind, 0.0)
+        if cost:
+            t = self.now + cost
+            if t < self._quiet_until:
+                self.now = t            # nothing to step yet (see _advance_to)
+            else:
+                self._advance_to(t)
+
+    def sleep(self, ms):
+        """Block the current thread for ms of simulated time."""
+        task = self._current
+        self._seq += 1
+        heapq.heappush(self._queue, (self.now + max(ms, 0.0), self._seq, task))
+        self._switch(task)
+        task.wake_times.append(self.now)
+
+    def threads(self):
+        """Every thread of the program, the main program first."""
+        return [self._main] + self._tasks
+
+    def spawn(self, callback, args=()):
+        """Start a new cooperative thread; it runs at the next wait()."""
+        task = _Task(self, callback, args)
+        self._tasks.append(task)
+        task.start()
+        self._seq += 1
+        heapq.heappush(self._queue, (self.now, self._seq, task))
+        return task
+
+    def _switch(self, task):
+        """Give control to the next thread that is due, then wait our turn."""
+        try:
+            nxt = self._next_task()
+        except SimulationEnd:
+            if task.is_main:
+                raise
+            raise _TaskExit()
+        if nxt is task:
+            self._check_killed(task)
+            return
+        self._current = nxt
+        nxt.resume.set()
+        task.resume.wait()
+        self._current = task
+        self._check_killed(task)
+
+    def _next_task(self):
+        while True:
+            wake, _, nxt = heapq.heappop(self._queue)
+            if nxt.killed or nxt.finished:
+                continue
+            self._advance_to(wake)
+            self._apply_inputs()
+            return nxt
+
+    def _hand_off(self):
+        """Called when a background thread finishes: wake the next thread."""
+        nxt = self._next_task_or_end()
+        if nxt is not None:
+            self._current = nxt
+            nxt.resume.set()
+
+    def _next_task_or_end(self):
+        try:
+            return self._next_task()
+        except SimulationEnd:
+            self._main.resume.set()
+            return None
+
+    def _check_killed(self, task):
+        if self.ended and task.is_main:
+            raise SimulationEnd()
+        if task.killed or self.ended:
+            raise _TaskExit()
+
+    def _advance_to(self, t):
+        # Device calls move the clock forward a tiny bit, thousands of times a
+        # run. Until _quiet_until (the next physics step, or the time limit)
+        # there is nothing to do but move it.
+        if t < self._quiet_until:
+            if t > self.now:
+                self.now = t
+            return
+        if self._time_limit is not None and t > self._time_limit:
+            t = self._time_limit
+            self._step_physics(t)
+            self.now = t
+            self.ended = True
+            raise SimulationEnd()
+        if t > self.now:
+            self._step_physics(t)
+            self.now = t
+
+    def shutdown(self):
+        """Stop every background thread. Call once the main program is done."""
+        self.ended = True
+        self.shutting_down = True
+        for task in self._tasks:
+            if not task.finished and task.thread is not None:
+                task.killed = True
+                task.resume.set()
+                task.thread.join(timeout=1.0)
+
+    # ---- scripted controller input -------------------------------------------
+
+    def script_inputs(self, events):
+        """
+        Feed controller input at given times.
+
+        events: list of (time_ms, name, value), for example
+                (0, "axis3", 50), (1200, "buttonR1", True), (1300, "buttonR1", False)
+        """
+        self.inputs = sorted(events, key=lambda event: event[0])
+
+    def _apply_inputs(self):
+        while self.inputs and self.inputs[0][0] <= self.now:
+            _, name, value = self.inputs.pop(0)
+            for controller in self.controllers:
+                controller._set(name, value)
+
+    # ---- physics ------------------------------------------------------------
+
+    def _step_physics(self, t):
+        while self._physics_time + self.physics_step <= t:
+            self._physics_time += self.physics_step
+            self._integrate(self.physics_step / 1000.0)
+        self._plan_quiet()
+
+    def _integrate(self, dt):
+        model = self.model
+        integrate_motor = self._integrate_motor
+        for motor in self.motors.values():
+            integrate_motor(motor, dt)
+
+        left = self._side_speed(model.left_ports, 1)
+        right = self._side_speed(model.right_ports, -1)
+        if left is None or right is None:
+            return
+        slip = 1.0 - model.wheel_slip
+        left *= slip
+        right *= slip
+        forward = (left + right) / 2
+        turn_rate = math.degrees((left - right) / model.track_width)  # clockwise
+        mid_heading = math.radians(self.heading + turn_rate * dt / 2)
+        self.x += forward * math.sin(mid_heading) * dt
+        self.y += forward * math.cos(mid_heading) * dt
+        self.heading = (self.heading + turn_rate * dt) % 360
+        self.rotation += turn_rate * dt
+        self.imu_bias += model.imu_drift * dt
+
+    def _side_speed(self, ports, mounting):
+        """Average wheel speed of one side in inches per second, or None."""
+        model = self.model
+        motors = self.motors
+        total = 0
+        count = 0
+        for port in ports:
+            motor = motors.get(port)
+            if motor is None:
+                continue
+            shaft = -motor.velocity if motor.reversed else motor.velocity
+            wheel_rpm = mounting * shaft * model.gear_ratio
+            total += wheel_rpm / 60.0 * model.wheel_circumference
+            count += 1
+        if not count:
+            return None
+        return total / count
+
+    def _integrate_motor(self, motor, dt):
+        model = self.model
+        gain = model.motor_gain.get(motor.port, 1.0) * model.battery
+        target = motor.target * gain
+
+        if motor.goal is not None:
+            remaining = motor.goal - motor.position
+            speed = abs(motor.target) * gain
+            # Slow down near the goal, like the motor's built-in controller
+            speed = min(speed, abs(remaining) / 360.0 * 60.0 / 0.1)
+            target = math.copysign(speed, remaining)
+        elif motor.hold_at is not None:
+            target = max(-model.max_rpm, min(model.max_rpm,
+                         (motor.hold_at - motor.position) * 2.0))
+
+        tau = model.motor_time_constant
+        if motor.target == 0 and motor.goal is None and motor.stopping == "coast":
+            tau = model.coast_time_constant
+        motor.velocity += (target - motor.velocity) * min(1.0, dt / tau)
+        motor.position += motor.velocity / 60.0 * 360.0 * dt
+
+        stalled = False
+        stops = model.hard_stops.get(motor.port)
+        if stops is not None:
+            # The stops are where they are, wherever the encoder was zeroed
+            low, high = stops[0] + motor.zero, stops[1] + motor.zero
+            if motor.position <= low and motor.velocity <= 0:
+                motor.position = low
+                stalled = target < 0
+                motor.velocity = 0.0
+            elif motor.position >= high and motor.velocity >= 0:
+                motor.position = high
+                stalled = target > 0
+                motor.velocity = 0.0
+
+        if stalled:
+            motor.current = 2.5
+        else:
+            motor.current = min(2.5, 0.1 + abs(target - motor.velocity) / model.max_rpm * 2.5)
+
+        if motor.goal is not None and (abs(motor.goal - motor.position) < 1.0 or stalled):
+            motor.goal = None
+            motor.target = 0.0
+            motor.hold_at = motor.position if motor.stopping == "hold" else None
+
+    def optical_point(self):
+        """Field position (x, y) directly under the optical sensor."""
+        offset = self.model.optical_offset
+        angle = math.radians(self.heading)
+        return (self.x + offset * math.sin(angle), self.y + offset * math.cos(angle))
+
+    def pose(self):
+        """Current (x, y, heading) of the simulated robot."""
+        return (self.x, self.y, self.heading)
+
+
+_world = World()
+
+
+def reset(model=None, field=None, time_limit=None, costs=None):
+    """Start a fresh simulation. Returns the new World."""
+    global _world
+    _world.shutdown()
+    _world = World(model, field, time_limit, costs)
+    return _world
+
+
+def world():
+    """The World that devices created right now will belong to."""
+    return _world
+
+
+# ============================================================================
+# FUNCTIONS
+# ============================================================================
+
+def wait(time, units=MSEC):
+    """Wait for an amount of simulated time. Other threads run meanwhile."""
+    _world.sleep(_ms(time, units))
+
+
+def sleep(time, units=MSEC):
+    """Same as wait()."""
+    _world.sleep(_ms(time, units))
+
+
+class Thread:
+    """A cooperative thread. It starts running at the next wait()."""
+
+    def __init__(self, callback, args=()):
+        self._task = _world.spawn(callback, tuple(args))
+
+    def stop(self):
+        self._task.killed = True
+
+    @staticmethod
+    def sleep_for(time, units=MSEC):
+        wait(time, units)
+
+
+class Event:
+    """A group of callbacks started together with broadcast()."""
+
+    def __init__(self, callback=None, args=()):
+        self._callbacks = []
+        if callback is not None:
+            self(callback, args)
+
+    def __call__(self, callback, args=()):
+        self._callbacks.append((callback, tuple(args)))
+
+    def broadcast(self):
+        for callback, args in self._callbacks:
+            Thread(callback, args)
+
+    def broadcast_and_wait(self, timeout=60000):
+        threads = [Thread(callback, args) for callback, args in self._callbacks]
+        end = _world.now + timeout
+        while _world.now < end and not all(t._task.finished for t in threads):
+            wait(5, MSEC)
+
+
+class Timer:
+    """Measures simulated time since it was created or cleared."""
+
+    def __init__(self):
+        self._world = _world
+        self._start = self._world.now
+
+    def time(self, units=MSEC):
+        elapsed = self._world.now - self._start
+        return elapsed / units.value if isinstance(units, _Const) else elapsed
+
+    def value(self):
+        return self.time(SECONDS)
+
+    def clear(self):
+        self._start = self._world.now
+
+    def reset(self):
+        self.clear()
+
+    def system(self):
+        return int(self._world.now)
+
+    def system_high_res(self):
+        return int(self._world.now * 1000)
+
+    def event(self, callback, delay, args=()):
+        def _later():
+            wait(delay, MSEC)
+            callback(*args)
+        Thread(_later)
+
+
+# ============================================================================
+# DEVICES
+# ============================================================================
+
+class _Screen:
+    """The brain screen. Text is kept so the runner can show it."""
+
+    ROWS = 12
+    COLUMNS = 48
+
+    def __init__(self, world):
+        self._world = world
+        self._rows = [""] * self.ROWS
+        self._row = 0
+        self._column = 0
+
+    def _touch(self):
+        self._world.charge("screen")
+        self._world.stats["screen_calls"] += 1
+
+    def print(self, *args, sep=" ", precision=2):
+        self._touch()
+        parts = []
+        for arg in args:
+            if isinstance(arg, float):
+                parts.append(("%." + str(precision) + "f") % arg)
+            else:
+                parts.append(str(arg))
+        text = sep.join(parts)
+        if self._row < self.ROWS:
+            line = self._rows[self._row].ljust(self._column)
+            self._rows[self._row] = (line[:self._column] + text)[:self.COLUMNS]
+            self._column += len(text)
+        self._world.screen_lines.append(text)
+
+    def print_at(self, *args, x=0, y=0, sep=" ", opaque=True):
+        self._touch()
+        text = sep.join(str(arg) for arg in args)
+        self._world.screen_lines.append(text)
+
+    def new_line(self):
+        self._touch()
+        self._row += 1
+        self._column = 0
+
+    def next_row(self):
+        self.new_line()
+
+    def set_cursor(self, row, column):
+        self._touch()
+        self._row = max(0, row - 1)
+        self._column = max(0, column - 1)
+
+    def clear_screen(self, color=None):
+        self._touch()
+        self._rows = [""] * self.ROWS
+        self._row = 0
+        self._column = 0
+
+    def clear_line(self, row=None, color=None):
+        self._touch()
+        index = self._row if row is None else row - 1
+        if 0 <= index < self.ROWS:
+            self._rows[index] = ""
+
+    def render(self):
+        self._world.charge("render")
+        self._world.stats["screen_calls"] += 1
+        return True
+
+    def row(self):
+        return self._row + 1
+
+    def column(self):
+        return self._column + 1
+
+    def text(self):
+        """Everything currently on the screen, one string per row."""
+        return list(self._rows)
+
+    # Drawing calls are accepted and timed, but not drawn.
+    def set_font(self, font): self._touch()
+    def set_pen_color(self, color): self._touch()
+    def set_fill_color(self, color): self._touch()
+    def set_pen_width(self, width): self._touch()
+    def draw_pixel(self, x, y): self._touch()
+    def draw_line(self, x1, y1, x2, y2): self._touch()
+    def draw_rectangle(self, x, y, width, height, color=None): self._touch()
+    def draw_circle(self, x, y, radius, color=None): self._touch()
+    def pressing(self): return False
+    def x_position(self): return 0
+    def y_position(self): return 0
+
+
+class _Battery:
+    def __init__(self, world):
+        self._world = world
+
+    def voltage(self, units=None):
+        return 12.8 * self._world.model.battery
+
+    def capacity(self):
+        return 100.0 * self._world.model.battery
+
+    def current(self, units=None):
+        return sum(abs(m.current) for m in self._world.motors.values())
+
+
+class _SdCard:
+    """An SD card that stores files in memory (see World.sd_files)."""
+
+    def __init__(self, world):
+        self._world = world
+
+    def is_inserted(self):
+        return True
+
+    def savefile(self, filename, data):
+        self._world.sd_files[filename] = bytearray(data)
+        return len(data)
+
+    def appendfile(self, filename, data):
+        self._world.sd_files.setdefault(filename, bytearray()).extend(data)
+        return len(data)
+
+    def loadfile(self, filename):
+        return bytearray(self._world.sd_files.get(filename, b""))
+
+    def exists(self, filename):
+        return filename in self._world.sd_files
+
+    def filesize(self, filename):
+        return len(self._world.sd_files.get(filename, b""))
+
+
+class Brain:
+    """The V5 brain: screen, timer, battery, SD card and speaker."""
+
+    def __init__(self):
+        self._world = _world
+        self.screen = _Screen(self._world)
+        self.timer = Timer()
+        self.battery = _Battery(self._world)
+        self.sdcard = _SdCard(self._world)
+        self.three_wire_port = None
+
+    def play_sound(self, sound):
+        self._world.sounds.append((self._world.now, sound))
+
+    def program_stop(self):
+        raise SimulationEnd()
+
+
+class Motor:
+    """
+    A V5 smart motor.
+
+    Motor(Ports.PORT11, True) makes a reversed motor, just like on the robot.
+    A gear setting may be passed before the reverse flag.
+    """
+
+    def __init__(self, port, *settings):
+        self._world = _world
+        reversed_ = False
+        self._max_rpm = self._world.model.max_rpm
+        for setting in settings:
+            if isinstance(setting, bool):
+                reversed_ = setting
+            elif isinstance(setting, _Const) and setting.group == "GearSetting":
+                self._max_rpm = float(setting.value)
+        self._port = port.value if isinstance(port, _Const) else port
+        self._sim = _SimMotor(self._port, reversed_)
+        self._world.motors[self._port] = self._sim
+        self._velocity_pct = 50.0
+        self._timeout = None
+
+    # ---- helpers ------------------------------------------------------------
+
+    def _command(self):
+        self._world.charge("motor_command")
+        self._world.stats["motor_commands"] += 1
+        task = self._world._current
+        task.commands += 1
+        if task.first_command is None:
+            task.first_command = self._world.now
+        task.last_command = self._world.now
+        self._sim.commands += 1
+
+    def _read(self):
+        self._world.charge("sensor_read")
+        self._world.stats["sensor_reads"] += 1
+
+    def _to_rpm(self, velocity, units):
+        if velocity is None:
+            velocity, units = self._velocity_pct, PERCENT
+        if units is None or units is PERCENT or units is PercentUnits.PERCENT:
+            rpm = velocity / 100.0 * self._max_rpm
+        elif units is DPS:
+            rpm = velocity / 6.0
+        else:
+            rpm = velocity
+        return max(-self._max_rpm, min(self._max_rpm, rpm))
+
+    def _wait_done(self):
+        start = self._world.now
+        while self._sim.goal is not None:
+            if self._timeout is not None and self._world.now - start >= self._timeout:
+                self.stop()
+                return False
+            wait(10, MSEC)
+        return True
+
+    # ---- commands -----------------------------------------------------------
+
+    def spin(self, direction, velocity=None, units=PERCENT):
+        """Spin forever at a velocity."""
+        self._command()
+        self._sim.goal = None
+        self._sim.hold_at = None
+        self._sim.target = _direction_sign(direction) * self._to_rpm(velocity, units)
+
+    def spin_for(self, direction, amount, units=DEGREES, velocity=None,
+                 units_v=PERCENT, wait=True):
+        """Spin a set amount, then stop. wait=True blocks until it is done."""
+        if isinstance(units, _Const) and units.group == "TimeUnits":
+            self.spin(direction, velocity, units_v)
+            if wait:
+                sleep(amount, units)     # `wait` here is the argument
+                self.stop()
+            return True
+        degrees = amount * (units.value if isinstance(units, _Const) else 1.0)
+        goal = self._sim.position + _direction_sign(direction) * degrees
+        return self._go_to(goal, velocity, units_v, wait)
+
+    def spin_to_position(self, rotation, units=DEGREES, velocity=None,
+                         units_v=PERCENT, wait=True):
+        """Spin to an absolute position, then stop."""
+        goal = rotation * (units.value if isinstance(units, _Const) else 1.0)
+        return self._go_to(goal, velocity, units_v, wait)
+
+    def _go_to(self, goal, velocity, units_v, wait):
+        self._command()
+        self._sim.hold_at = None
+        self._sim.goal = goal
+        self._sim.target = abs(self._to_rpm(velocity, units_v))
+        if wait:
+            return self._wait_done()
+        return True
+
+    def stop(self, mode=None):
+        """Stop using the stopping mode (brake by default)."""
+        self._command()
+        if mode is not None:
+            self._sim.stopping = mode.value
+        self._sim.goal = None
+        self._sim.target = 0.0
+        self._sim.hold_at = self._sim.position if self._sim.stopping == "hold" else None
+
+    def set_stopping(self, mode):
+        self._command()
+        self._sim.stopping = mode.value
+
+    def set_velocity(self, velocity, units=PERCENT):
+        self._command()
+        self._velocity_pct = self._to_rpm(velocity, units) / self._max_rpm * 100.0
+
+    def set_position(self, value, units=DEGREES):
+        self._command()
+        sim = self._sim
+        shift = value * (units.value if isinstance(units, _Const) else 1.0) - sim.position
+        sim.position += shift
+        sim.zero += shift
+        if sim.goal is not None:
+            sim.goal += shift
+        if sim.hold_at is not None:
+            sim.hold_at += shift
+
+    def reset_position(self):
+        self.set_position(0, DEGREES)
+
+    def set_timeout(self, value, units=MSEC):
+        self._timeout = _ms(value, units)
+
+    def set_max_torque(self, value, units=PERCENT):
+        self._command()
+
+    # ---- readings -----------------------------------------------------------
+
+    def position(self, units=DEGREES):
+        self._read()
+        scale = units.value if isinstance(units, _Const) else 1.0
+        return self._sim.position / scale
+
+    def velocity(self, units=RPM):
+        self._read()
+        rpm = self._sim.velocity
+        if units is PERCENT or units is PercentUnits.PERCENT:
+            return rpm / self._max_rpm * 100.0
+        if units is DPS:
+            return rpm * 6.0
+        return rpm
+
+    def current(self, units=None):
+        self._read()
+        return self._sim.current
+
+    def torque(self, units=None):
+        self._read()
+        return self._sim.current * 0.4
+
+    def power(self, units=None):
+        self._read()
+        return self._sim.current * 12.8 * self._world.model.battery
+
+    def efficiency(self, units=None):
+        self._read()
+        return 50.0
+
+    def temperature(self, units=None):
+        self._read()
+        return 35.0
+
+    def is_spinning(self):
+        self._read()
+        return abs(self._sim.velocity) > 0.5 or self._sim.target != 0
+
+    def is_done(self):
+        self._read()
+        return self._sim.goal is None
+
+    def installed(self):
+        return True
+
+
+class Inertial:
+    """
+    The inertial sensor (IMU). Heading follows the simulated robot.
+
+    calibrate() takes about 2 seconds of simulated time, like the real sensor.
+    """
+
+    CALIBRATION_MS = 2000.0
+
+    def __init__(self, port):
+        self._world = _world
+        self._port = port.value if isinstance(port, _Const) else port
+        self._heading_offset = 0.0
+        self._rotation_offset = 0.0
+
+    def _read(self):
+        self._world.charge("sensor_read")
+        self._world.stats["sensor_reads"] += 1
+
+    def _raw(self):
+        world = self._world
+        noise = 0.0
+        if world.model.imu_noise:
+            noise = world.random.gauss(0.0, world.model.imu_noise)
+        return world.rotation + world.imu_bias + noise
+
+    def calibrate(self):
+        self._world.calibrate_until = self._world.now + self.CALIBRATION_MS
+        self._world.imu_bias = 0.0
+
+    def is_calibrating(self):
+        self._read()
+        return self._world.now < self._world.calibrate_until
+
+    def heading(self, units=DEGREES):
+        self._read()
+        return (self._raw() - self._heading_offset) % 360
+
+    def rotation(self, units=DEGREES):
+        self._read()
+        return self._raw() - self._rotation_offset
+
+    def reset_heading(self):
+        self._heading_offset = self._raw()
+
+    def reset_rotation(self):
+        self._rotation_offset = self._raw()
+
+    def set_heading(self, value, units=DEGREES):
+        self._heading_offset = self._raw() - value
+
+    def set_rotation(self, value, units=DEGREES):
+        self._rotation_offset = self._raw() - value
+
+    def gyro_rate(self, axis=None, units=None):
+        self._read()
+        return 0.0
+
+    def installed(self):
+        return True
+
+
+class Optical:
+    """The optical (line/color) sensor. It looks at the field under the robot."""
+
+    def __init__(self, port):
+        self._world = _world
+        self._port = port.value if isinstance(port, _Const) else port
+        self._light = 0.0
+        self._integration_ms = 100.0
+
+    def _read(self):
+        self._world.charge("sensor_read")
+        self._world.stats["sensor_reads"] += 1
+
+    def brightness(self, read_raw=False):
+        self._read()
+        world = self._world
+        x, y = world.optical_point()
+        value = world.field.brightness_at(x, y)
+        if world.field.noise:
+            value += world.random.gauss(0.0, world.field.noise)
+        return max(0.0, min(100.0, value))
+
+    def hue(self):
+        self._read()
+        x, y = self._world.optical_point()
+        return self._world.field.hue_at(x, y) % 360
+
+    def is_near_object(self):
+        self._read()
+        return False
+
+    def set_light(self, value):
+        self._light = 100.0 if value is LedStateType.ON else (
+            0.0 if value is LedStateType.OFF else float(value))
+
+    def set_light_power(self, value, units=PERCENT):
+        self._light = float(value)
+
+    def integration_time(self, value=None):
+        if value is not None:
+            self._integration_ms = float(value)
+        return self._integration_ms
+
+    def object_detect_threshold(self, value):
+        pass
+
+    def object_detected(self, callback, args=()):
+        pass
+
+    def object_lost(self, callback, args=()):
+        pass
+
+    def installed(self):
+        return True
+
+
+class _Axis:
+    def __init__(self, controller):
+        self._controller = controller
+        self._value = 0
+        self._changed = []
+
+    def position(self):
+        self._controller._world.charge("sensor_read")
+        return self._value
+
+    def value(self):
+        return self.position()
+
+    def changed(self, callback, args=()):
+        self._changed.append((callback, tuple(args)))
+
+
+class _Button:
+    def __init__(self, controller):
+        self._controller = controller
+        self._down = False
+        self._pressed = []
+        self._released = []
+
+    def pressing(self):
+        self._controller._world.charge("sensor_read")
+        return self._down
+
+    def pressed(self, callback, args=()):
+        """Run callback in a new thread whenever the button is pressed."""
+        self._pressed.append((callback, tuple(args)))
+
+    def released(self, callback, args=()):
+        """Run callback in a new thread whenever the button is released."""
+        self._released.append((callback, tuple(args)))
+
+
+class Controller:
+    """The V5 controller. In the simulator its input comes from a script."""
+
+    AXES = ("axis1", "axis2", "axis3", "axis4")
+    BUTTONS = ("buttonL1", "buttonL2", "buttonR1", "buttonR2", "buttonUp",
+               "buttonDown", "buttonLeft", "buttonRight", "buttonX", "buttonB",
+               "buttonY", "buttonA")
+
+    def __init__(self, *kind):
+        self._world = _world
+        for name in self.AXES:
+            setattr(self, name, _Axis(self))
+        for name in self.BUTTONS:
+            setattr(self, name, _Button(self))
+        self.screen = _Screen(self._world)
+        self.rumbles = []
+        self._world.controllers.append(self)
+
+    def rumble(self, pattern):
+        self.rumbles.append((self._world.now, pattern))
+
+    def _set(self, name, value):
+        """Apply one scripted input (used by World.script_inputs)."""
+        item = getattr(self, name)
+        if isinstance(item, _Axis):
+            item._value = int(max(-100, min(100, value)))
+            for callback, args in item._changed:
+                Thread(callback, args)
+        elif isinstance(item, _Button):
+            value = bool(value)
+            if value == item._down:
+                return
+            item._down = value
+            for callback, args in (item._pressed if value else item._released):
+                Thread(callback, args)
+
+
+class Competition:
+    """
+    Competition control. The simulator decides when each phase runs.
+
+    Accepts both Competition(driver, autonomous) from the VEX API and the
+    curriculum's Competition(controller, brain) followed by
+    competition.autonomous(...) and competition.drivercontrol(...).
+    """
+
+    def __init__(self, driver=None, autonomous=None):
+        self._world = _world
+        self._driver = driver if callable(driver) and not isinstance(driver, Controller) else None
+        self._autonomous = autonomous if callable(autonomous) and not isinstance(autonomous, Brain) else None
+        self.phase = "disabled"
+        self._world.competition = self
+
+    def autonomous(self, callback):
+        self._autonomous = callback
+
+    def drivercontrol(self, callback):
+        self._driver = callback
+
+    def is_enabled(self):
+        return self.phase in ("autonomous", "driver")
+
+    def is_autonomous(self):
+        return self.phase == "autonomous"
+
+    def is_driver_control(self):
+        return self.phase == "driver"
+
+    def is_competition_switch(self):
+        return True
+
+    def is_field_control(self):
+        return False
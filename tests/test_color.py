@@ -0,0 +1,39 @@
+"""The hue table in robot/color.py: half-degree bins, one lookup."""
+
+import pytest
+
+from robot.color import COLOR_NAMES, build_hue_codes, check_table, color_of, hue_index
+
+
+def test_table_matches_the_ranges():
+    assert check_table() == []
+
+
+def test_each_range_starts_at_its_first_hue():
+    assert color_of(14.999) == "red"
+    assert color_of(15.0) == "orange"
+    assert color_of(329.999) == "purple"
+    assert color_of(330.0) == "unknown"
+    assert color_of(344.999) == "unknown"
+    assert color_of(345.0) == "red"
+    assert color_of(345.3) == "red"
+
+
+def test_hues_wrap_around_the_color_wheel():
+    assert hue_index(360.0) == hue_index(0.0)
+    assert color_of(365.0) == color_of(5.0)
+    assert color_of(-0.3) == "red"
+
+
+def test_custom_ranges_use_the_same_bins():
+    codes = build_hue_codes((("blue", 100, 120.5),))
+    blue = COLOR_NAMES.index("blue")
+    assert codes[hue_index(100.0)] == blue
+    assert codes[hue_index(120.4)] == blue
+    assert codes[hue_index(120.5)] == 0
+    assert codes[hue_index(99.9)] == 0
+
+
+def test_custom_ranges_must_be_on_half_degrees():
+    with pytest.raises(ValueError):
+        build_hue_codes((("red", 345.2, 360),))
@@ -0,0 +1,32 @@
+"""The gear ratio from the robot's config reaches every distance in main-09.py."""
+
+import math
+import os
+
+import vex
+from conftest import REPO_DIR
+from run import load_program
+
+MAIN_09 = os.path.join(REPO_DIR, "main-09.py")
+
+
+def load_geared(gear_ratio):
+    """main-09.py's globals, built in a fresh simulated world."""
+    vex.reset()
+    return load_program(MAIN_09, as_main=False, constants={"GEAR_RATIO": gear_ratio})
+
+
+def test_motor_degrees_use_the_gear_ratio():
+    ns = load_geared(0.5)
+    circumference = ns["WHEEL_CIRCUMFERENCE"]
+    assert math.isclose(ns["to_inches"](360, ns["DEGREES"]), circumference * 0.5)
+    assert ns["to_inches"](24, ns["INCHES"]) == 24
+
+
+def test_drive_classes_get_the_gear_ratio():
+    ns = load_geared(0.5)
+    inches_per_degree = ns["WHEEL_CIRCUMFERENCE"] * 0.5 / 360
+    assert math.isclose(ns["odometry"].inches_per_degree, inches_per_degree)
+    assert math.isclose(ns["route_follower"].inches_per_degree, inches_per_degree)
+    assert math.isclose(ns["velocity_drive"].degrees_per_inch, 1 / inches_per_degree)
+    assert ns["motion"].gear_ratio == 0.5
@@ -0,0 +1,59 @@
+"""The motion engine in main-09.py: start_...() commands, and clean-up."""
+
+import os
+
+import vex
+from conftest import REPO_DIR
+from run import run_program
+
+MAIN_09 = os.path.join(REPO_DIR, "main-09.py")
+
+
+def run_main_09(check, time_limit=20.0):
+    """Load main-09.py without its main block and run check(namespace)."""
+    found = {}
+
+    def setup(namespace):
+        found.update(check(namespace) or {})
+
+    result = run_program(MAIN_09, as_main=False, setup=setup, time_limit=time_limit)
+    assert not result.errors
+    return result, found
+
+
+def test_start_move_runs_once_the_engine_is_started():
+    def check(ns):
+        ns["motion"].start()
+        drive = ns["start_move"](ns["FORWARD"], 24, ns["INCHES"])
+        turn = ns["start_turn"](ns["RIGHT"], 90, after=drive)
+        ns["motion"].wait_all(10000)
+        return {"drive": drive.state, "turn": turn.state}
+
+    result, found = run_main_09(check)
+    assert found == {"drive": "done", "turn": "done"}
+    x, y, heading = result.pose
+    assert abs(y - 24) < 1.0
+    assert abs(heading - 90) < 2.0
+
+
+def test_stop_robot_cancels_queued_and_running_commands():
+    def check(ns):
+        motion = ns["motion"]
+        motion.start()
+        drive = ns["start_move"](ns["FORWARD"], 48, ns["INCHES"])
+        turn = ns["start_turn"](ns["RIGHT"], 90, after=drive)
+        vex.wait(300, vex.MSEC)
+        ns["stop_robot"]()
+        stopped_at = vex.world().pose()
+        vex.wait(1000, vex.MSEC)
+        return {"drive": drive.state, "turn": turn.state, "idle": motion.idle(),
+                "stopped_at": stopped_at}
+
+    result, found = run_main_09(check)
+    assert found["drive"] == "cancelled"
+    assert found["turn"] == "cancelled"
+    assert found["idle"]
+    # Nothing kept driving after stop_robot()
+    x, y, heading = found["stopped_at"]
+    assert abs(result.pose[1] - y) < 1.0
+    assert result.pose[1] < 24
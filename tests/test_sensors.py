@@ -0,0 +1,31 @@
+"""The sensor hub in main-09.py: one sample per tick, fewer sensor reads."""
+
+import vex
+from test_motion import run_main_09
+
+# Sensor reads in autonomous before the hub (route follower, odometry and
+# telemetry each reading the sensors themselves)
+READS_WITHOUT_HUB = 12669
+
+
+def run_autonomous():
+    def check(ns):
+        start_ms = vex.world().now
+        ns["autonomous"]()
+        return {"samples": ns["sensors"].samples,
+                "ticks": (vex.world().now - start_ms) / ns["odometry"].period_ms,
+                "telemetry": ns["telemetry"].samples}
+
+    return run_main_09(check)
+
+
+def test_autonomous_samples_the_hub_once_per_tick():
+    result, found = run_autonomous()
+    assert abs(found["samples"] - found["ticks"]) <= 1
+    # Telemetry recorded every tick from those samples
+    assert abs(found["telemetry"] - found["ticks"]) <= 1
+
+
+def test_autonomous_reads_the_sensors_less_often():
+    result, found = run_autonomous()
+    assert result.stats["sensor_reads"] < READS_WITHOUT_HUB